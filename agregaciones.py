@@ -0,0 +1,108 @@
+# agregaciones.py
+"""
+Agregaciones por grupo sobre códigos enteros: conteos, moda y top-k de una
+columna de valores para cada valor de una columna de grupo, en una sola
+pasada vectorizada (un bincount sobre grupo × valor).
+
+Los empates se resuelven por el orden de las categorías del valor (alfabético
+para las columnas categóricas de datos.py), que es el mismo que usa
+`value_counts`. Los grupos son los observados, en el orden de sus categorías,
+y las filas con grupo o valor nulo no cuentan.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+def codificar(serie):
+    """Códigos enteros (-1 para nulos) y categorías de una serie"""
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        return np.asarray(serie.cat.codes, dtype=np.int64), list(serie.cat.categories)
+    codigos, categorias = pd.factorize(serie, sort=True)
+    return np.asarray(codigos, dtype=np.int64), list(categorias)
+
+
+def conteos_por_grupo(df, grupo, valor):
+    """
+    Matriz grupo × valor de conteos. Devuelve (grupos, valores, matriz, filas)
+    donde `filas` es el número de filas de cada grupo (con o sin valor).
+    """
+    codigos_grupo, grupos = codificar(df[grupo])
+    codigos_valor, valores = codificar(df[valor])
+    validos = (codigos_grupo >= 0) & (codigos_valor >= 0)
+    planos = codigos_grupo[validos] * len(valores) + codigos_valor[validos]
+    matriz = np.bincount(planos, minlength=len(grupos) * len(valores)).reshape(len(grupos), len(valores))
+    filas = np.bincount(codigos_grupo[codigos_grupo >= 0], minlength=len(grupos))
+    return grupos, valores, matriz, filas
+
+
+def moda_por_grupo(df, grupo, valor):
+    """
+    Valor más frecuente de cada grupo, como
+    `df.groupby(grupo)[valor].agg(lambda x: x.value_counts().index[0])`.
+    """
+    grupos, valores, matriz, filas = conteos_por_grupo(df, grupo, valor)
+    observados = np.flatnonzero(filas > 0)
+    # argmax devuelve el primer máximo: los empates quedan por orden de categoría
+    modas = matriz[observados].argmax(axis=1)
+    return pd.Series([valores[i] for i in modas], index=pd.Index([grupos[i] for i in observados], name=grupo),
+                     name=valor, dtype=object)
+
+
+def top_k_por_grupo(df, grupo, valor, k=None):
+    """Los k valores más frecuentes de cada grupo: {grupo: [(valor, conteo), ...]}"""
+    grupos, valores, matriz, filas = conteos_por_grupo(df, grupo, valor)
+    orden = np.argsort(-matriz, axis=1, kind='stable')[:, :k]
+    resultado = {}
+    for i in np.flatnonzero(filas > 0):
+        resultado[grupos[i]] = [(valores[j], int(matriz[i, j])) for j in orden[i] if matriz[i, j] > 0]
+    return resultado
+
+
+def tabla_cruzada(df, grupo, valor):
+    """Conteos grupo × valor como `pd.crosstab(df[grupo], df[valor])` (sin filas ni columnas vacías)"""
+    grupos, valores, matriz, _ = conteos_por_grupo(df, grupo, valor)
+    filas = np.flatnonzero(matriz.sum(axis=1) > 0)
+    columnas = np.flatnonzero(matriz.sum(axis=0) > 0)
+    return pd.DataFrame(matriz[np.ix_(filas, columnas)],
+                        index=pd.Index([grupos[i] for i in filas], name=grupo),
+                        columns=pd.Index([valores[j] for j in columnas], name=valor))
+
+
+# --- COSELECCIÓN (pares de opciones elegidas juntas) ---
+
+TOP_PARES = 20
+MINIMO_CONTEO_PAR = 5
+SOPORTE_MINIMO = 0.01
+
+
+def matriz_lift(matriz, respondientes):
+    """Lift de cada par: P(a y b) / (P(a)·P(b)); 0 donde alguna opción no se eligió"""
+    conteos = np.diag(matriz).astype(np.float64)
+    esperado = np.outer(conteos, conteos) / max(respondientes, 1)
+    return np.divide(matriz, esperado, out=np.zeros(matriz.shape), where=esperado > 0)
+
+
+def resumen_coseleccion(vocabulario, matriz, respondientes, n=TOP_PARES):
+    """
+    Pares de opciones elegidas juntas a partir de la matriz de coocurrencias
+    (diagonal = conteo de cada opción): los más frecuentes y los de mayor lift
+    entre los que alcanzan un mínimo de respuestas. No depende del orden del
+    vocabulario: los pares y los empates se ordenan por nombre.
+    """
+    minimo = max(MINIMO_CONTEO_PAR, int(np.ceil(SOPORTE_MINIMO * respondientes)))
+    lift = matriz_lift(matriz, respondientes)
+    filas, columnas = np.triu_indices(len(vocabulario), k=1)
+    seleccion = matriz[filas, columnas] >= minimo
+
+    pares = []
+    for i, j in zip(filas[seleccion], columnas[seleccion]):
+        a, b = sorted((vocabulario[i], vocabulario[j]))
+        pares.append({'cursos': [a, b], 'conteo': int(matriz[i, j]),
+                      'soporte': round(float(matriz[i, j]) / respondientes, 4), 'lift': round(float(lift[i, j]), 3)})
+    return {
+        'respondientes': int(respondientes),
+        'minimo_conteo': minimo,
+        'pares_frecuentes': sorted(pares, key=lambda p: (-p['conteo'], -p['lift'], p['cursos']))[:n],
+        'pares_por_lift': sorted(pares, key=lambda p: (-p['lift'], -p['conteo'], p['cursos']))[:n]
+    }
@@ -1,138 +1,138 @@
 # analisis.py
 
-import matplotlib
-matplotlib.use('Agg')
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
 import os
+import argparse
+import logging
 import numpy as np
-import json
-from json import JSONEncoder
-from collections import Counter
-
-# Add a custom JSON encoder class to handle NumPy types
-class NumpyEncoder(JSONEncoder):
-    """ Custom encoder for numpy data types """
-    def default(self, obj):
-        if isinstance(obj, (np.integer, np.int64, np.int32)):
-            return int(obj)
-        elif isinstance(obj, (np.floating, np.float64, np.float32)):
-            return float(obj)
-        elif isinstance(obj, np.ndarray):
-            return obj.tolist()
-        elif isinstance(obj, np.bool_):
-            return bool(obj)
-        return super(NumpyEncoder, self).default(obj)
+from datos import RUTA_CSV, COLUMNAS_CURSOS, cargar_encuesta, calcular_tablas_dashboard
+from esquema import AREAS, COLUMNAS, SEPARADOR_OPCIONES
+from snapshot import escribir_snapshot, hash_archivo
+from indices import IndiceMultiple
+from agregaciones import moda_por_grupo, tabla_cruzada, resumen_coseleccion, matriz_lift
+from etapas import GrafoEtapas
+from resultados import RUTA_RESULTADOS, construir_resultados, disposicion_por_ciclo_json, guardar_resultados
+from metricas import obtener_log, registrar_evento, cronometro, perfilar
+from sugerencias import IndiceSugerencias, guardar_indice
+from contactos import IndiceContactos, guardar_indice as guardar_indice_contactos
+from estaticos import construir_estaticos
+from graficos import (CISCO_COLORS, CATALOGO_GRAFICOS, DIRECTORIO_GRAFICOS, DPI, CacheGraficos, renderizar,
+                      renderizar_en_paralelo, procesos_desde_entorno)
 
 # --- CONFIGURACIÓN INICIAL ---
-# Estilo de los gráficos
-plt.style.use('ggplot')
-plt.rcParams['figure.figsize'] = (12, 7)
-plt.rcParams['font.sans-serif'] = ['Arial', 'sans-serif']
+# Los avisos y tiempos se registran como líneas JSON en stderr (ver metricas.py)
+LOG = obtener_log('analisis')
 
-# Colores personalizados (paleta de Cisco)
-CISCO_COLORS = ['#049fd9', '#33ab84', '#8bc34a', '#ffc107', '#ff9800', '#ff5722', '#e91e63', '#9c27b0']
-sns.set_palette(CISCO_COLORS)
+# El estilo de los gráficos y la paleta de Cisco se configuran en graficos.py
 
 # Crear carpetas para guardar los gráficos si no existen
-if not os.path.exists('static/images'):
-    os.makedirs('static/images')
+if not os.path.exists(DIRECTORIO_GRAFICOS):
+    os.makedirs(DIRECTORIO_GRAFICOS)
+
+# Renderizado paralelo: número de procesos (0 = dibujar en serie)
+PROCESOS_GRAFICOS = procesos_desde_entorno()
+TRABAJOS_PENDIENTES = []
+
+# Caché de gráficos: se omiten los PNG cuyos datos no cambiaron (ANALISIS_SIN_CACHE=1 la desactiva)
+USAR_CACHE_GRAFICOS = os.environ.get('ANALISIS_SIN_CACHE', '').strip().lower() not in ('1', 'true', 'si', 'sí')
+CACHE_GRAFICOS = CacheGraficos()
 
 # --- CARGA DE DATOS ---
+# La limpieza (renombrar columnas, quitar filas vacías, tipos categóricos) se hace en
+# datos.py, que además reutiliza la caché columnar si el CSV no cambió. `df` tiene las
+# columnas de respuesta única; las de selección múltiple llegan como índices dispersos.
 try:
-    df = pd.read_csv('respuestas_cisco.csv')
-    print("✅ Archivo CSV cargado exitosamente.")
+    with cronometro(LOG, 'carga_datos', ruta=RUTA_CSV):
+        encuesta = cargar_encuesta(RUTA_CSV)
+    df = encuesta.respuestas
     
     # Validación básica de datos
     if df.empty:
-        print("⚠️ Advertencia: El archivo CSV está vacío.")
+        registrar_evento(LOG, 'csv_vacio', logging.WARNING, ruta=RUTA_CSV)
     elif len(df.columns) < 5:
-        print("⚠️ Advertencia: El archivo CSV parece no tener suficientes columnas.")
+        registrar_evento(LOG, 'csv_sin_columnas_suficientes', logging.WARNING, columnas=len(df.columns))
     else:
-        print(f"📊 {len(df)} respuestas encontradas con {len(df.columns)} campos.")
+        registrar_evento(LOG, 'datos_cargados', respuestas=len(df),
+                         campos=len(df.columns) + len(encuesta.multiples))
 except FileNotFoundError:
-    print("❌ Error: El archivo 'respuestas_cisco.csv' no se encontró.")
+    registrar_evento(LOG, 'csv_no_encontrado', logging.ERROR, ruta=RUTA_CSV)
     exit()
 except Exception as e:
-    print(f"❌ Error al cargar el CSV: {str(e)}")
+    registrar_evento(LOG, 'error_carga_csv', logging.ERROR, error=str(e))
     exit()
 
-# --- LIMPIEZA Y PREPARACIÓN ---
-# Renombrar columnas para un acceso más fácil
-df.rename(columns={
-    '¿En qué ciclo se encuentra actualmente?': 'ciclo',
-    '¿Ha tomado anteriormente algún curso en la plataforma Cisco NetAcad?': 'experiencia_previa',
-    'Redes y ciberseguridad ': 'cursos_redes', # El espacio al final es importante
-    'IA y Ciencia de Datos': 'cursos_ia',
-    'Programación': 'cursos_programacion',
-    'Hardware  y Sistemas Operativos': 'cursos_so',
-    '¿Qué modalidad prefiere para tomar estos cursos?': 'modalidad',
-    '¿Qué tan dispuesto/a estaría a participar en un curso opcional de este tipo durante el semestre?': 'disposicion',
-    '¿Qué días y horarios prefiere para tomar este tipo de cursos presenciales o síncronos?': 'horario'
-}, inplace=True)
-
-# Eliminar filas completamente vacías y valores nulos en columnas clave
-df = df.dropna(how='all')
+# --- ÍNDICES DE SELECCIÓN MÚLTIPLE ---
+# Las columnas separadas por comas se tokenizan una sola vez al cargar; todos los
+# conteos (top, por ciclo y totales) salen de estas matrices respondiente × opción.
+INDICES = encuesta.multiples
+INDICE_CURSOS = IndiceMultiple.combinar([INDICES[col] for col in COLUMNAS_CURSOS if col in INDICES])
 
 # --- FUNCIONES DE ANÁLISIS MEJORADAS ---
 
+def dibujar(trabajo):
+    """
+    Dibuja un trabajo de gráfico ahora mismo o, en modo paralelo, lo deja
+    pendiente para enviarlo al pool cuando todos los agregados estén listos.
+    """
+    trabajo.setdefault('dpi', DPI)
+    if USAR_CACHE_GRAFICOS and CACHE_GRAFICOS.vigente(trabajo):
+        registrar_evento(LOG, 'grafico_sin_cambios', ruta=trabajo['ruta'])
+    elif PROCESOS_GRAFICOS:
+        TRABAJOS_PENDIENTES.append(trabajo)
+    else:
+        renderizar(trabajo)
+        CACHE_GRAFICOS.registrar(trabajo)
+    return trabajo['ruta']
+
+def vaciar_trabajos_pendientes():
+    """Renderiza en el pool de procesos los gráficos pendientes y guarda el manifiesto"""
+    rutas = []
+    if TRABAJOS_PENDIENTES:
+        registrar_evento(LOG, 'dibujo_paralelo', graficos=len(TRABAJOS_PENDIENTES), procesos=PROCESOS_GRAFICOS)
+        rutas = renderizar_en_paralelo(list(TRABAJOS_PENDIENTES), PROCESOS_GRAFICOS)
+        for trabajo in TRABAJOS_PENDIENTES:
+            CACHE_GRAFICOS.registrar(trabajo)
+        TRABAJOS_PENDIENTES.clear()
+    CACHE_GRAFICOS.guardar()
+    return rutas
+
 def analizar_respuestas_multiples(dataframe, columna, titulo, archivo_salida, max_items=10):
     """
     Toma una columna con strings de valores separados por comas,
     los separa, cuenta las ocurrencias y genera un gráfico de barras horizontal.
     """
-    # Verificar si la columna existe
-    if columna not in dataframe.columns:
-        print(f"❌ Error: La columna '{columna}' no existe en el dataframe.")
+    # 1. Usar el índice precalculado (o tokenizar si es otro dataframe)
+    if dataframe is df and columna in INDICES:
+        indice = INDICES[columna]
+    elif columna in dataframe.columns:
+        indice = IndiceMultiple.desde_serie(dataframe[columna], SEPARADOR_OPCIONES)
+    else:
+        registrar_evento(LOG, 'columna_inexistente', logging.ERROR, columna=columna)
         return pd.Series()
     
-    # 1. Separar los strings por comas, eliminar espacios, valores vacíos y crear una lista única
-    items_series = dataframe[columna].dropna().astype(str)
-    all_items = []
-    
-    for respuesta in items_series:
-        # Solo procesar si no es una cadena vacía
-        if respuesta and respuesta.strip():
-            items = [item.strip() for item in respuesta.split(',') if item.strip()]
-            all_items.extend(items)
-    
     # 2. Contar la frecuencia de cada item y obtener los más populares
-    counter = Counter(all_items)
-    conteo = pd.Series(dict(counter.most_common(max_items)))
+    conteo = indice.top(max_items)
     
     if conteo.empty:
-        print(f"⚠️ Advertencia: No hay datos para analizar en '{columna}'.")
+        registrar_evento(LOG, 'columna_sin_datos', logging.WARNING, columna=columna)
         return pd.Series()
     
-    # 3. Ordenar por frecuencia y generar el gráfico horizontal
-    plt.figure(figsize=(12, max(7, len(conteo)*0.4)))  # Ajustar altura dinámicamente
-    ax = sns.barplot(x=conteo.values, y=conteo.index, palette='viridis', hue=conteo.index, dodge=False, legend=False)
-    
-    # Añadir valores numéricos a las barras
-    for i, v in enumerate(conteo.values):
-        ax.text(v + 0.5, i, str(v), va='center')
-    
-    ax.set_title(titulo, fontsize=16, fontweight='bold')
-    ax.set_xlabel('Número de Estudiantes', fontsize=12)
-    ax.set_ylabel('Cursos', fontsize=12)
-    
-    # Mejorar el formato del gráfico
-    ax.grid(axis='x', alpha=0.3)
-    plt.tight_layout()
-    
-    # 4. Guardar el gráfico
-    ruta_guardado = f'static/images/{archivo_salida}'
-    plt.savefig(ruta_guardado, dpi=100, bbox_inches='tight')
-    plt.close()
-    print(f"📊 Gráfico generado: {ruta_guardado}")
+    # 3-4. Generar y guardar el gráfico horizontal (ordenado por frecuencia)
+    dibujar({
+        'tipo': 'respuestas_multiples',
+        'ruta': f'{DIRECTORIO_GRAFICOS}/{archivo_salida}',
+        'titulo': titulo,
+        'etiquetas': [str(x) for x in conteo.index],
+        'valores': [int(v) for v in conteo.values],
+        'paleta': 'viridis'
+    })
     
     # 5. Calcular estadísticas adicionales
     total_selecciones = sum(conteo.values)
     promedio = total_selecciones / len(conteo) if len(conteo) > 0 else 0
     
-    print(f"   - Total de selecciones: {total_selecciones}")
-    print(f"   - Promedio por opción: {promedio:.2f}")
+    registrar_evento(LOG, 'selecciones', columna=columna, total=int(total_selecciones),
+                     promedio_por_opcion=round(float(promedio), 2))
     
     return conteo
 
@@ -142,59 +142,27 @@ def analizar_respuesta_unica(dataframe, columna, titulo, archivo_salida, tipo_gr
     """
     # Verificar si la columna existe
     if columna not in dataframe.columns:
-        print(f"❌ Error: La columna '{columna}' no existe en el dataframe.")
+        registrar_evento(LOG, 'columna_inexistente', logging.ERROR, columna=columna)
         return pd.DataFrame()
     
     # Filtrar valores nulos y contar frecuencias
     serie_filtrada = dataframe[columna].dropna()
     if serie_filtrada.empty:
-        print(f"⚠️ Advertencia: No hay datos para analizar en '{columna}'.")
+        registrar_evento(LOG, 'columna_sin_datos', logging.WARNING, columna=columna)
         return pd.DataFrame()
     
     conteo = serie_filtrada.value_counts()
     
-    plt.figure(figsize=(12, 8))
-    
-    if tipo_grafico == 'pie':
-        # Calcular porcentajes para las etiquetas
-        sizes = conteo.values
-        total = sum(sizes)
-        labels = [f"{item} ({size/total*100:.1f}%)" for item, size in zip(conteo.index, sizes)]
-        
-        # Crear gráfico de pastel con destacado de la porción más grande
-        explode = [0.1 if i == conteo.values.argmax() else 0 for i in range(len(conteo))]
-        
-        plt.pie(sizes, labels=labels, explode=explode, autopct='%1.1f%%', 
-                startangle=140, colors=CISCO_COLORS[:len(conteo)],
-                shadow=True, wedgeprops={'edgecolor': 'white', 'linewidth': 1})
-        plt.title(titulo, fontsize=16, fontweight='bold', pad=20)
-        plt.axis('equal')  # Para que el círculo sea un círculo
-        
-    else:  # Gráfico de barras
-        # Fix seaborn warning by using hue parameter correctly
-        ax = sns.barplot(x=conteo.index, y=conteo.values, hue=conteo.index, palette=CISCO_COLORS[:len(conteo)], legend=False)
-        
-        # Añadir valores sobre las barras
-        for i, v in enumerate(conteo.values):
-            ax.text(i, v + 0.1, str(v), ha='center')
-            
-        ax.set_title(titulo, fontsize=16, fontweight='bold')
-        ax.set_ylabel('Número de Estudiantes', fontsize=12)
-        ax.set_xlabel('')
-        
-        # Rotar etiquetas si son largas
-        if max([len(str(x)) for x in conteo.index]) > 10:
-            plt.xticks(rotation=30, ha="right")
-        
-        ax.grid(axis='y', alpha=0.3)
-
-    plt.tight_layout()
-    
-    # Guardar el gráfico
-    ruta_guardado = f'static/images/{archivo_salida}'
-    plt.savefig(ruta_guardado, dpi=100, bbox_inches='tight')
-    plt.close()
-    print(f"📊 Gráfico generado: {ruta_guardado}")
+    # Generar y guardar el gráfico de pastel o de barras
+    dibujar({
+        'tipo': 'respuesta_unica',
+        'ruta': f'{DIRECTORIO_GRAFICOS}/{archivo_salida}',
+        'titulo': titulo,
+        'tipo_grafico': tipo_grafico,
+        'etiquetas': [str(x) for x in conteo.index],
+        'valores': [int(v) for v in conteo.values],
+        'paleta': CISCO_COLORS
+    })
     
     # Convertir a DataFrame con porcentajes
     total = conteo.sum()
@@ -234,111 +202,88 @@ def generar_resumen_estadistico():
     return resumen
 
 # Función para analizar interés por área
-def analizar_interes_por_area():
+def analizar_interes_por_area(interes=None):
     """
     Compara el interés en las diferentes áreas temáticas
     """
-    # Contar respuestas no vacías en cada columna de cursos
-    areas = ['cursos_redes', 'cursos_ia', 'cursos_programacion', 'cursos_so']
-    nombres = ['Redes y Ciberseguridad', 'IA y Ciencia de Datos', 'Programación', 'Hardware y SO']
-    
-    # Contar respuestas no vacías (que indican interés)
-    interes = {}
-    for area, nombre in zip(areas, nombres):
-        interes[nombre] = df[area].notna().sum()
-    
-    # Crear gráfico
-    plt.figure(figsize=(10, 6))
-    ax = sns.barplot(x=list(interes.keys()), y=list(interes.values()), 
-                     hue=list(interes.keys()), palette=CISCO_COLORS[:4], legend=False)
-    
-    # Añadir etiquetas
-    for i, v in enumerate(interes.values()):
-        ax.text(i, v + 1, str(v), ha='center')
-    
-    ax.set_title('Interés por Área Temática', fontsize=16, fontweight='bold')
-    ax.set_ylabel('Número de Estudiantes Interesados', fontsize=12)
-    ax.set_xlabel('')
-    plt.tight_layout()
-    
-    # Guardar
-    plt.savefig('static/images/interes_por_area.png', dpi=100, bbox_inches='tight')
-    plt.close()
+    # Contar respuestas con al menos un curso (que indican interés)
+    if interes is None:
+        interes = analizar_interes_por_area_json()
+    
+    # Crear y guardar el gráfico
+    dibujar({
+        'tipo': 'interes_por_area',
+        'ruta': f'{DIRECTORIO_GRAFICOS}/interes_por_area.png',
+        'titulo': 'Interés por Área Temática',
+        'etiquetas': list(interes.keys()),
+        'valores': [int(v) for v in interes.values()],
+        'paleta': CISCO_COLORS
+    })
     
     return interes
 
 # Función para analizar disposición por ciclo
-def analizar_disposicion_por_ciclo():
+def analizar_disposicion_por_ciclo(pivot=None):
     """
     Analiza la disposición a participar según el ciclo académico
     """
     # Crear tabla pivote
-    pivot = pd.crosstab(df['ciclo'], df['disposicion'])
+    if pivot is None:
+        pivot = tabla_cruzada(df, 'ciclo', 'disposicion')
     
     # Normalizar por fila para obtener porcentajes
     pivot_norm = pivot.div(pivot.sum(axis=1), axis=0) * 100
-    
-    # Graficar
-    plt.figure(figsize=(12, 8))
-    ax = pivot_norm.plot(kind='bar', stacked=True, colormap='viridis')
-    
-    ax.set_title('Disposición a Participar por Ciclo Académico', fontsize=16, fontweight='bold')
-    ax.set_ylabel('Porcentaje (%)', fontsize=12)
-    ax.set_xlabel('Ciclo', fontsize=12)
-    ax.legend(title='Disposición')
-    
-    # Guardar
-    plt.tight_layout()
-    plt.savefig('static/images/disposicion_por_ciclo.png', dpi=100, bbox_inches='tight')
-    plt.close()
+    # Columnas en el orden de la escala, de menor a mayor disposición (ver esquema.py)
+    pivot_norm = pivot_norm[[c for c in COLUMNAS['disposicion'].opciones if c in pivot_norm.columns]]
+    
+    # Graficar y guardar
+    dibujar({
+        'tipo': 'disposicion_por_ciclo',
+        'ruta': f'{DIRECTORIO_GRAFICOS}/disposicion_por_ciclo.png',
+        'titulo': 'Disposición a Participar por Ciclo Académico',
+        'filas': [str(c) for c in pivot_norm.index],
+        'columnas': [str(c) for c in pivot_norm.columns],
+        'valores': pivot_norm.values.tolist(),
+        'paleta': 'viridis'
+    })
     
     return pivot
 
-# Función para analizar los cursos más populares por ciclo académico
-def analizar_cursos_por_ciclo():
+# Función para calcular los cursos más populares por ciclo académico
+def calcular_cursos_por_ciclo():
     """
-    Analiza los cursos más populares para cada ciclo académico
-    y genera un gráfico comparativo.
+    Obtiene el curso más popular (y su conteo) para cada ciclo académico.
     """
-    print("\nAnalizando cursos más populares por ciclo académico:")
-    
-    # Definir los ciclos y columnas de cursos
-    ciclos = df['ciclo'].unique()
-    columnas_cursos = ['cursos_redes', 'cursos_ia', 'cursos_programacion', 'cursos_so']
+    # Codificar los ciclos y contar todos los cursos por ciclo en una sola pasada
+    codigos_ciclo, ciclos = pd.factorize(df['ciclo'])
+    mejores, conteos = INDICE_CURSOS.top_por_grupo(codigos_ciclo, len(ciclos))
     
     # Diccionario para almacenar el curso más popular por ciclo
     cursos_por_ciclo = {}
     
-    # Para cada ciclo, encontrar el curso más popular entre todas las categorías
-    for ciclo in ciclos:
-        # Filtrar el dataframe para este ciclo
-        df_ciclo = df[df['ciclo'] == ciclo]
-        
-        # Contar todos los cursos mencionados en todas las categorías
-        all_cursos = []
-        
-        for col in columnas_cursos:
-            items_series = df_ciclo[col].dropna().astype(str)
-            
-            for respuesta in items_series:
-                if respuesta and respuesta.strip():
-                    items = [item.strip() for item in respuesta.split(',') if item.strip()]
-                    all_cursos.extend(items)
-        
+    # Para cada ciclo, guardar el curso más popular entre todas las categorías
+    for ciclo, mejor, conteo in zip(ciclos, mejores, conteos):
         # Si no hay cursos para este ciclo, continuar con el siguiente
-        if not all_cursos:
+        if mejor < 0:
             continue
         
-        # Encontrar el curso más popular
-        counter = Counter(all_cursos)
-        curso_mas_popular, conteo = counter.most_common(1)[0]
-        
         # Almacenar el resultado
         cursos_por_ciclo[ciclo] = {
-            'curso': curso_mas_popular,
-            'conteo': conteo
+            'curso': INDICE_CURSOS.vocabulario[mejor],
+            'conteo': int(conteo)
         }
     
+    return cursos_por_ciclo
+
+# Función para analizar los cursos más populares por ciclo académico
+def analizar_cursos_por_ciclo(cursos_por_ciclo=None):
+    """
+    Analiza los cursos más populares para cada ciclo académico
+    y genera un gráfico comparativo.
+    """
+    if cursos_por_ciclo is None:
+        cursos_por_ciclo = calcular_cursos_por_ciclo()
+    
     # Preparar datos para graficar
     ciclos_ord = sorted(cursos_por_ciclo.keys(), 
                         key=lambda x: (
@@ -355,36 +300,16 @@ def analizar_cursos_por_ciclo():
     cursos_graf = [cursos_por_ciclo[c]['curso'] for c in ciclos_ord]
     conteos_graf = [cursos_por_ciclo[c]['conteo'] for c in ciclos_ord]
     
-    # Crear gráfico
-    plt.figure(figsize=(14, 8))
-    
-    # Usar barras horizontales para nombres de cursos largos
-    ax = plt.barh(ciclos_graf, conteos_graf, color=CISCO_COLORS[:len(ciclos_graf)])
-    
-    # Agregar etiquetas con el nombre del curso en cada barra
-    for i, (curso, conteo) in enumerate(zip(cursos_graf, conteos_graf)):
-        # Acortar nombre del curso si es muy largo
-        curso_texto = curso if len(curso) < 30 else curso[:27] + "..."
-        plt.text(
-            conteo + 0.3,  # Posición x (ligeramente a la derecha de la barra)
-            i,             # Posición y (índice de la barra)
-            curso_texto,   # Texto a mostrar
-            va='center',   # Alineación vertical centrada
-            fontsize=9,    # Tamaño de fuente
-            fontweight='bold'
-        )
-    
-    plt.title('Curso Más Popular por Ciclo Académico', fontsize=16, fontweight='bold')
-    plt.xlabel('Número de Estudiantes', fontsize=12)
-    plt.ylabel('Ciclo Académico', fontsize=12)
-    plt.grid(axis='x', alpha=0.3)
-    plt.tight_layout()
-    
-    # Guardar gráfico
-    ruta_guardado = 'static/images/cursos_por_ciclo.png'
-    plt.savefig(ruta_guardado, dpi=100, bbox_inches='tight')
-    plt.close()
-    print(f"📊 Gráfico generado: {ruta_guardado}")
+    # Crear y guardar el gráfico
+    dibujar({
+        'tipo': 'cursos_por_ciclo',
+        'ruta': f'{DIRECTORIO_GRAFICOS}/cursos_por_ciclo.png',
+        'titulo': 'Curso Más Popular por Ciclo Académico',
+        'etiquetas': ciclos_graf,
+        'cursos': cursos_graf,
+        'valores': conteos_graf,
+        'paleta': CISCO_COLORS
+    })
     
     return cursos_por_ciclo
 
@@ -394,154 +319,251 @@ def exportar_resultados_json():
     Exporta los resultados del análisis a un archivo JSON estructurado
     para facilitar la generación de informes.
     """
-    print("\nExportando resultados a JSON...")
-    
-    # Análisis de cursos por ciclo
-    cursos_por_ciclo = analizar_cursos_por_ciclo()
-    
-    # Crear estructura del JSON
-    resultados = {
-        "meta": {
-            "fecha_analisis": pd.Timestamp.now().strftime("%Y-%m-%d %H:%M:%S"),
-            "version": "1.0",
-            "total_respuestas": int(len(df))  # Convert to regular Python int
-        },
-        "resumen": {k: (int(v) if isinstance(v, (np.integer, np.int64)) else v) 
-                    for k, v in generar_resumen_estadistico().items()},
-        "preferencias": {
-            "modalidad": {str(k): int(v) for k, v in df['modalidad'].value_counts().to_dict().items()},
-            "disposicion": {str(k): int(v) for k, v in df['disposicion'].value_counts().to_dict().items()},
-            "horarios": analizar_horarios_preferidos()
-        },
-        "interes_por_area": analizar_interes_por_area_json(),
-        "cursos_populares": {
-            "redes_ciberseguridad": obtener_top_cursos('cursos_redes', 10),
-            "ia_ciencia_datos": obtener_top_cursos('cursos_ia', 10),
-            "programacion": obtener_top_cursos('cursos_programacion', 10),
-            "hardware_so": obtener_top_cursos('cursos_so', 10)
-        },
-        "analisis_por_ciclo": {
-            "modalidad_preferida": {str(k): str(v) for k, v in df.groupby('ciclo')['modalidad'].agg(lambda x: x.value_counts().index[0]).to_dict().items()},
-            "disposicion": obtener_disposicion_por_ciclo_json(),
-            "curso_mas_popular": {str(k): {"curso": v["curso"], "conteo": int(v["conteo"])} for k, v in cursos_por_ciclo.items()}
-        },
-        "experiencia_previa": {str(k): int(v) for k, v in df['experiencia_previa'].value_counts().to_dict().items()},
-        "sugerencias": obtener_sugerencias()
-    }
+    # Los agregados salen del grafo, así que no se recalculan ni se vuelven a graficar
+    cursos_por_ciclo = GRAFO.obtener('cursos_por_ciclo')
+    
+    # Crear estructura del JSON (compartida con el modo por bloques, ver resultados.py)
+    resultados = construir_resultados(
+        total_respuestas=len(df),
+        resumen=GRAFO.obtener('resumen'),
+        modalidad=df['modalidad'].value_counts(),
+        disposicion=df['disposicion'].value_counts(),
+        horarios=GRAFO.obtener('horarios'),
+        interes_por_area=GRAFO.obtener('interes_por_area'),
+        top_cursos={col: GRAFO.obtener(f'top_{col}') for col in COLUMNAS_CURSOS},
+        modalidad_por_ciclo=GRAFO.obtener('modalidad_por_ciclo'),
+        tabla_disposicion_por_ciclo=GRAFO.obtener('tabla_disposicion_por_ciclo'),
+        cursos_por_ciclo=cursos_por_ciclo,
+        experiencia_previa=df['experiencia_previa'].value_counts(),
+        sugerencias=obtener_sugerencias(),
+        coseleccion_cursos=resumen_coseleccion(*GRAFO.obtener('coseleccion_cursos')),
+        respuestas_por_ciclo=df['ciclo'].value_counts()
+    )
     
     # Guardar el JSON usando el encoder personalizado
-    ruta_json = 'static/resultados_analisis.json'
-    with open(ruta_json, 'w', encoding='utf-8') as f:
-        json.dump(resultados, f, ensure_ascii=False, indent=4, cls=NumpyEncoder)
+    ruta_json = guardar_resultados(resultados, RUTA_RESULTADOS)
     
-    print(f"✅ Resultados exportados a: {ruta_json}")
+    registrar_evento(LOG, 'resultados_exportados', ruta=ruta_json)
+
+    # Índice de búsqueda de las sugerencias para /api/sugerencias
+    with cronometro(LOG, 'indice_sugerencias_exportado'):
+        guardar_indice(IndiceSugerencias.construir(resultados['sugerencias']))
     return resultados
 
+# Función para calcular la coselección de cursos
+def calcular_coseleccion_cursos():
+    """
+    Matriz curso × curso con el número de estudiantes que eligieron ambos, sobre
+    todas las áreas de cursos: Xᵀ·X de la matriz de incidencia estudiante × curso,
+    sumado por bloques de filas densos en float32 (ver IndiceMultiple.coocurrencias).
+    Devuelve (vocabulario, matriz, respondientes con algún curso).
+    """
+    return INDICE_CURSOS.vocabulario, INDICE_CURSOS.coocurrencias(), int(INDICE_CURSOS.respondientes().sum())
+
+# Función para graficar la coselección de cursos
+def analizar_coseleccion_cursos(coseleccion=None, n=20):
+    """
+    Mapa de calor del lift entre los n cursos más elegidos, anotado con el
+    número de estudiantes que eligieron cada par.
+    """
+    if coseleccion is None:
+        coseleccion = calcular_coseleccion_cursos()
+    vocabulario, matriz, respondientes = coseleccion
+
+    # Los más elegidos (empates por nombre, para no depender del orden del vocabulario)
+    conteos = np.diag(matriz)
+    elegidos = sorted((i for i in range(len(vocabulario)) if conteos[i] > 0),
+                      key=lambda i: (-conteos[i], vocabulario[i]))[:n]
+    lift = matriz_lift(matriz, respondientes)[np.ix_(elegidos, elegidos)]
+
+    dibujar({
+        'tipo': 'coseleccion',
+        'ruta': f'{DIRECTORIO_GRAFICOS}/coseleccion_cursos.png',
+        'titulo': 'Coselección de Cursos (lift)',
+        'etiquetas': [vocabulario[i] for i in elegidos],
+        'valores': np.round(lift, 3).tolist(),
+        'conteos': matriz[np.ix_(elegidos, elegidos)].tolist()
+    })
+
+    return coseleccion
+
 # Funciones auxiliares para el JSON
 
 def analizar_horarios_preferidos():
     """Obtiene los horarios preferidos en formato de diccionario"""
-    horarios = df['horario'].dropna().astype(str)
-    all_horarios = []
-    
-    for respuesta in horarios:
-        if respuesta and respuesta.strip():
-            items = [item.strip() for item in respuesta.split(',') if item.strip()]
-            all_horarios.extend(items)
-    
-    # Convert Counter results to regular Python types
-    return {str(k): int(v) for k, v in Counter(all_horarios).most_common()}
+    # Convert index counts to regular Python types
+    return {str(k): int(v) for k, v in INDICES['horario'].top().items()}
 
 def analizar_interes_por_area_json():
     """Análisis de interés por área en formato para JSON"""
-    areas = ['cursos_redes', 'cursos_ia', 'cursos_programacion', 'cursos_so']
-    nombres = ['Redes y Ciberseguridad', 'IA y Ciencia de Datos', 'Programación', 'Hardware y SO']
-    
     interes = {}
-    for area, nombre in zip(areas, nombres):
+    for columna, area in AREAS.items():
         # Convert NumPy int64 to regular Python int
-        interes[nombre] = int(df[area].notna().sum())
+        interes[area.etiqueta] = int(INDICES[columna].respondientes().sum()) if columna in INDICES else 0
     
     return interes
 
 def obtener_top_cursos(columna, n=10):
     """Obtiene los top n cursos más populares de una columna"""
-    if columna not in df.columns:
+    if columna not in INDICES:
         return {}
     
-    items_series = df[columna].dropna().astype(str)
-    all_items = []
-    
-    for respuesta in items_series:
-        if respuesta and respuesta.strip():
-            items = [item.strip() for item in respuesta.split(',') if item.strip()]
-            all_items.extend(items)
-    
-    counter = Counter(all_items)
     # Convert to regular Python types for JSON serialization
-    return {str(k): int(v) for k, v in counter.most_common(n)}
+    return {str(k): int(v) for k, v in INDICES[columna].top(n).items()}
 
-def obtener_disposicion_por_ciclo_json():
+def obtener_disposicion_por_ciclo_json(pivot=None):
     """Obtiene la disposición por ciclo en formato JSON"""
-    pivot = pd.crosstab(df['ciclo'], df['disposicion'])
-    result = {}
-    
-    for ciclo in pivot.index:
-        # Convert all values to regular Python types
-        result[str(ciclo)] = {str(k): int(v) for k, v in pivot.loc[ciclo].to_dict().items()}
-    
-    return result
+    if pivot is None:
+        pivot = tabla_cruzada(df, 'ciclo', 'disposicion')
+    return disposicion_por_ciclo_json(pivot)
+
+def obtener_modalidad_por_ciclo():
+    """Modalidad más solicitada en cada ciclo"""
+    return moda_por_grupo(df, 'ciclo', 'modalidad')
+
+def exportar_snapshot_dashboard(modalidad_por_ciclo=None):
+    """Guarda las tablas y el resumen del dashboard para que app.py no necesite pandas"""
+    contenido = calcular_tablas_dashboard(df, modalidad_por_ciclo)
+    ruta = escribir_snapshot(contenido, hash_archivo(RUTA_CSV))
+    registrar_evento(LOG, 'snapshot_exportado', ruta=ruta)
+    return contenido
+
+def exportar_indice_contactos():
+    """Guarda el índice de contactos por curso para /api/contactos y contactos.py (contiene correos)"""
+    indice = IndiceContactos.construir(encuesta, hash_archivo(RUTA_CSV))
+    ruta = guardar_indice_contactos(indice)
+    registrar_evento(LOG, 'indice_contactos_exportado', ruta=ruta, contactos=len(indice.correos))
+    return indice
 
 def obtener_sugerencias():
     """Extrae las sugerencias de los estudiantes"""
-    if '¿Qué sugerencias tiene para estos cursos o qué otros temas le gustaría que se incluyan?' in df.columns:
-        col = '¿Qué sugerencias tiene para estos cursos o qué otros temas le gustaría que se incluyan?'
-        return df[col].dropna().tolist()
+    if 'sugerencias' in df.columns:
+        return df['sugerencias'].dropna().tolist()
     return []
 
+# --- GRAFO DE ETAPAS ---
+# Cada agregado y cada gráfico es una etapa con nombre; el grafo memoriza los
+# resultados para que nada se calcule ni se dibuje dos veces en una corrida.
+def registrar_etapa(nombre, segundos):
+    """Registra el tiempo propio de cada etapa del grafo"""
+    registrar_evento(LOG, 'etapa', etapa=nombre, ms=round(segundos * 1000, 2))
+
+GRAFO = GrafoEtapas(observador=registrar_etapa)
+
+# Gráficos de cursos por área, de horarios y de respuesta única (ver CATALOGO_GRAFICOS)
+for _definicion in CATALOGO_GRAFICOS.values():
+    if _definicion['tipo'] == 'respuestas_multiples':
+        _funcion = lambda d=_definicion: analizar_respuestas_multiples(df, d['columna'], d['titulo'], d['archivo'])
+    else:
+        _funcion = lambda d=_definicion: analizar_respuesta_unica(df, d['columna'], d['titulo'], d['archivo'],
+                                                                 tipo_grafico=d['tipo_grafico'])
+    GRAFO.agregar(f"grafico_{_definicion['columna']}", _funcion)
+
+# Agregados
+for _col in COLUMNAS_CURSOS:
+    GRAFO.agregar(f'top_{_col}', lambda col=_col: obtener_top_cursos(col, 10))
+GRAFO.agregar('horarios', analizar_horarios_preferidos)
+GRAFO.agregar('interes_por_area', analizar_interes_por_area_json)
+GRAFO.agregar('tabla_disposicion_por_ciclo', lambda: tabla_cruzada(df, 'ciclo', 'disposicion'))
+GRAFO.agregar('modalidad_por_ciclo', obtener_modalidad_por_ciclo)
+GRAFO.agregar('cursos_por_ciclo', calcular_cursos_por_ciclo)
+GRAFO.agregar('resumen', generar_resumen_estadistico)
+GRAFO.agregar('coseleccion_cursos', calcular_coseleccion_cursos)
+
+# Gráficos que reutilizan agregados
+GRAFO.agregar('grafico_interes_por_area', lambda interes_por_area: analizar_interes_por_area(interes_por_area),
+              dependencias=['interes_por_area'])
+GRAFO.agregar('grafico_disposicion_por_ciclo',
+              lambda tabla_disposicion_por_ciclo: analizar_disposicion_por_ciclo(tabla_disposicion_por_ciclo),
+              dependencias=['tabla_disposicion_por_ciclo'])
+GRAFO.agregar('grafico_cursos_por_ciclo', lambda cursos_por_ciclo: analizar_cursos_por_ciclo(cursos_por_ciclo),
+              dependencias=['cursos_por_ciclo'])
+GRAFO.agregar('grafico_coseleccion_cursos', lambda coseleccion_cursos: analizar_coseleccion_cursos(coseleccion_cursos),
+              dependencias=['coseleccion_cursos'])
+
+# Índice de contactos para el servidor web
+GRAFO.agregar('indice_contactos', exportar_indice_contactos)
+
+# Renderizado de los gráficos pendientes (modo paralelo) y manifiesto de la caché
+_GRAFICOS = [f"grafico_{d['columna']}" for d in CATALOGO_GRAFICOS.values()] + [
+    'grafico_interes_por_area', 'grafico_disposicion_por_ciclo', 'grafico_cursos_por_ciclo',
+    'grafico_coseleccion_cursos']
+GRAFO.agregar('graficos', lambda **graficos: vaciar_trabajos_pendientes(), dependencias=_GRAFICOS)
+# Copias versionadas de los gráficos nuevos para /estaticos/ (ver estaticos.py)
+GRAFO.agregar('estaticos', lambda graficos: construir_estaticos(), dependencias=['graficos'])
+
+# Exportación final
+# (exportar_resultados_json lee los agregados del grafo; se declaran para calcularlos antes)
+GRAFO.agregar('resultados_json', lambda **agregados: exportar_resultados_json(),
+              dependencias=['resumen', 'horarios', 'interes_por_area', 'tabla_disposicion_por_ciclo',
+                            'modalidad_por_ciclo', 'cursos_por_ciclo', 'coseleccion_cursos'] + [f'top_{col}' for col in COLUMNAS_CURSOS])
+
+# Snapshot para el servidor web: se escribe al final, cuando los demás archivos que
+# vigila el recargador de app.py ya están completos, para que los vea todos juntos
+GRAFO.agregar('snapshot_dashboard',
+              lambda modalidad_por_ciclo, **escritos: exportar_snapshot_dashboard(modalidad_por_ciclo),
+              dependencias=['modalidad_por_ciclo', 'resultados_json', 'indice_contactos', 'estaticos'])
+
 # Función principal que ejecuta todos los análisis
-def generar_todos_los_analisis():
-    print("\n--- INICIANDO ANÁLISIS ---")
-    
-    # 1. Cursos más populares por área
-    print("\nAnalizando preferencias de cursos por área:")
-    analizar_respuestas_multiples(df, 'cursos_redes', 'Top Cursos de Redes y Ciberseguridad', 'cursos_redes.png')
-    analizar_respuestas_multiples(df, 'cursos_ia', 'Top Cursos de IA y Ciencia de Datos', 'cursos_ia.png')
-    analizar_respuestas_multiples(df, 'cursos_programacion', 'Top Cursos de Programación', 'cursos_programacion.png')
-    analizar_respuestas_multiples(df, 'cursos_so', 'Top Cursos de Hardware y SO', 'cursos_so.png')
-    
-    # 2. Análisis general
-    print("\nAnalizando preferencias generales:")
-    analizar_respuesta_unica(df, 'modalidad', 'Modalidad Preferida por los Estudiantes', 'modalidad.png', tipo_grafico='bar')
-    analizar_respuesta_unica(df, 'disposicion', 'Disposición a Participar en Cursos', 'disposicion.png')
-    analizar_respuestas_multiples(df, 'horario', 'Horarios de Preferencia', 'horarios.png')
-    analizar_respuesta_unica(df, 'experiencia_previa', 'Experiencia Previa en Cisco NetAcad', 'experiencia.png')
-    
-    # 3. Análisis por ciclo
-    print("\nAnalizando datos por segmentos:")
-    ciclos_interes = df.groupby('ciclo')['modalidad'].agg(lambda x: x.value_counts().index[0])
-    print("\nModalidad preferida por ciclo:")
-    print(ciclos_interes)
-    
-    # 4. Nuevos análisis
-    print("\nGenerando análisis adicionales:")
-    analizar_interes_por_area()
-    analizar_disposicion_por_ciclo()
-    analizar_cursos_por_ciclo()  # Agregar esta línea
-    
-    # 5. Resumen estadístico
-    print("\nGenerando resumen estadístico:")
-    resumen = generar_resumen_estadistico()
-    for key, value in resumen.items():
-        print(f"   - {key}: {value}")
+def generar_todos_los_analisis(procesos=None, usar_cache=None):
+    """
+    Ejecuta todos los análisis. Con `procesos` (o ANALISIS_PARALELO) mayor que 0,
+    primero se calculan los agregados y luego los gráficos se dibujan en paralelo.
+    Con `usar_cache=False` se vuelven a dibujar todos los gráficos.
+    """
+    global PROCESOS_GRAFICOS, USAR_CACHE_GRAFICOS
+    if procesos is not None:
+        PROCESOS_GRAFICOS = procesos
+    if usar_cache is not None:
+        USAR_CACHE_GRAFICOS = usar_cache
+    
+    # PERFILAR=cprofile,tracemalloc guarda un perfil de toda la corrida (ver metricas.py)
+    with perfilar('analisis', log=LOG), cronometro(LOG, 'analisis_completo', procesos=PROCESOS_GRAFICOS):
+        # Cada etapa registra su tiempo como evento 'etapa' (ver registrar_etapa)
+        GRAFO.reiniciar()
+    
+        # 1. Cursos más populares por área
+        GRAFO.ejecutar([f'grafico_{col}' for col in COLUMNAS_CURSOS])
+    
+        # 2. Análisis general
+        GRAFO.ejecutar(['grafico_modalidad', 'grafico_disposicion', 'grafico_horario', 'grafico_experiencia_previa'])
+    
+        # 3. Análisis por ciclo
+        GRAFO.obtener('modalidad_por_ciclo')
+    
+        # 4. Nuevos análisis
+        GRAFO.ejecutar(['grafico_interes_por_area', 'grafico_disposicion_por_ciclo', 'grafico_cursos_por_ciclo',
+                        'grafico_coseleccion_cursos'])
     
-    # 6. Exportar resultados a JSON
-    print("\nExportando resultados a JSON:")
-    exportar_resultados_json()
+        # 5. Resumen estadístico
+        resumen = GRAFO.obtener('resumen')
     
-    print("\n--- ANÁLISIS COMPLETADO ---\n")
+        # 6. Exportar resultados a JSON
+        GRAFO.obtener('resultados_json')
+        GRAFO.obtener('indice_contactos')
+    
+        # 7. Gráficos pendientes (modo paralelo), manifiesto de la caché y estáticos versionados
+        GRAFO.obtener('estaticos')
+
+        # El snapshot del dashboard va último (ver snapshot_dashboard)
+        GRAFO.obtener('snapshot_dashboard')
+    
+    # Único resumen para personas (el detalle de cada etapa va en el log estructurado)
+    print("\n--- ANÁLISIS COMPLETADO ---")
+    for key, value in resumen.items():
+        print(f"   - {key}: {value}")
+    print("\nTiempo por etapa:")
+    print(GRAFO.reporte_tiempos())
     return True
 
 # Si ejecutamos este script directamente, generará los gráficos
 if __name__ == '__main__':
-    generar_todos_los_analisis()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description='Análisis de la encuesta Cisco NetAcad')
+    parser.add_argument('--paralelo', nargs='?', const='auto', default=None, metavar='N',
+                        help="dibuja los gráficos en N procesos ('auto' = uno por núcleo); "
+                             "por defecto se usa la variable ANALISIS_PARALELO")
+    parser.add_argument('--forzar', action='store_true',
+                        help='vuelve a dibujar todos los gráficos aunque sus datos no hayan cambiado')
+    args = parser.parse_args()
+    generar_todos_los_analisis(procesos_desde_entorno(args.paralelo) if args.paralelo is not None else None,
+                               usar_cache=False if args.forzar else None)
\ No newline at end of file
@@ -1,82 +1,547 @@
 # app.py (versión optimizada)
+#
+# Los workers no importan pandas: las tablas y el resumen salen del snapshot que
+# genera analisis.py. pandas solo se carga si el snapshot falta o está desactualizado,
+# o la primera vez que se usa /api/aggregate.
+#
+# /metrics expone latencias, recargas y la caché de gráficos en formato Prometheus
+# (por worker). Con PERFILAR=cprofile y/o tracemalloc se perfila cada petición.
 
-from flask import Flask, render_template, send_file, jsonify
-import pandas as pd
+from flask import Flask, Response, render_template, jsonify, request, g, send_from_directory
+from types import MappingProxyType
+from collections import namedtuple
+import contextlib
+import logging
 import os
 import datetime
 import json
+import gzip
+import mimetypes
+import hashlib
+import hmac
+import threading
+import time
+from snapshot import RUTA_SNAPSHOT, Perezoso, hash_archivo, leer_snapshot
+from cache import CacheLRU
+from metricas import ColeccionMetricas, obtener_log, registrar_evento, perfilar, modos_perfilado
+from sugerencias import RUTA_INDICE_SUGERENCIAS, IndiceSugerencias, leer_indice
+from eventos import Difusor, formatear_evento
+from esquema import AREAS
+from estaticos import DIRECTORIO_DIST, RUTA_MANIFIESTO_ESTATICOS, leer_manifiesto
+from contactos import DIMENSIONES, RUTA_INDICE_CONTACTOS, IndiceContactos, leer_indice as leer_indice_contactos
+from periodos import ARCHIVO_AGREGADOS, listar_periodos, leer_agregados, ruta_periodo, tendencias, comparar
+
+try:
+    import brotli
+except ImportError:  # brotli es opcional: sin él solo se ofrece gzip
+    brotli = None
 
 app = Flask(__name__)
 
-# --- CARGA DE DATOS SOLO PARA LAS TABLAS ---
-# Hacemos esto fuera de la ruta para que se cargue una sola vez al iniciar la app.
-try:
-    df = pd.read_csv('respuestas_cisco.csv')
-    
-    # Pre-calculamos las tablas que necesita el HTML
-    modalidad_por_ciclo = df.groupby('¿En qué ciclo se encuentra actualmente?')['¿Qué modalidad prefiere para tomar estos cursos?'].agg(
-        lambda x: x.value_counts().index[0]
-    ).reset_index()
-    modalidad_por_ciclo.rename(columns={
-        '¿En qué ciclo se encuentra actualmente?': 'Ciclo',
-        '¿Qué modalidad prefiere para tomar estos cursos?': 'Modalidad Preferida'
-    }, inplace=True)
-    
-    experiencia_counts = df['¿Ha tomado anteriormente algún curso en la plataforma Cisco NetAcad?'].value_counts().to_frame().reset_index()
-    experiencia_counts.columns = ['Respuesta', 'Número de Estudiantes']
-
-    TABLA_CICLOS_HTML = modalidad_por_ciclo.to_html(classes='table table-striped table-hover', index=False, justify='center')
-    TABLA_EXPERIENCIA_HTML = experiencia_counts.to_html(classes='table table-striped table-hover', index=False, justify='center')
-    
-    # Calcular datos para el resumen
-    modalidad_preferida = df['¿Qué modalidad prefiere para tomar estos cursos?'].value_counts()
-    experiencia_previa = df['¿Ha tomado anteriormente algún curso en la plataforma Cisco NetAcad?'].value_counts()
-    
-    # Crear el diccionario resumen que espera el template
-    RESUMEN = {
-        'Total de respuestas': len(df),
-        'Estudiantes con experiencia previa': experiencia_previa.get('Sí', 0),
-        'Modalidad más solicitada': modalidad_preferida.index[0] if len(modalidad_preferida) > 0 else 'No disponible',
-        'Número de estudiantes en modalidad preferida': modalidad_preferida.iloc[0] if len(modalidad_preferida) > 0 else 0
-    }
+RUTA_CSV = 'respuestas_cisco.csv'
+RUTA_RESULTADOS = 'static/resultados_analisis.json'
+
+# Columnas por las que se puede filtrar en /api/aggregate
+COLUMNAS_FILTRABLES = ['carrera', 'ciclo', 'experiencia_previa', 'modalidad', 'disposicion']
+
+# Gráficos a pedido: caché LRU acotada en bytes (por defecto 32 MB por worker)
+CACHE_GRAFICOS = CacheLRU(int(os.environ.get('MAX_BYTES_GRAFICOS', str(32 * 1024 * 1024))))
+FORMATOS_GRAFICOS = {'png': 'image/png', 'svg': 'image/svg+xml'}
+
+# Secciones de /api/results/<seccion> ya serializadas (por snapshot, sección, campos y página)
+CACHE_SECCIONES = CacheLRU(int(os.environ.get('MAX_BYTES_SECCIONES', str(8 * 1024 * 1024))),
+                           tamano=lambda r: len(r.cuerpo) + len(r.gzip) + len(r.br or b''))
+LIMITE_PAGINA = 50
+LIMITE_PAGINA_MAXIMO = 500
+
+# Respuestas de /api/periodos ya serializadas, por firma de los agregados que usan
+CACHE_PERIODOS = CacheLRU(int(os.environ.get('MAX_BYTES_PERIODOS', str(8 * 1024 * 1024))),
+                          tamano=lambda r: len(r.cuerpo) + len(r.gzip) + len(r.br or b''))
+
+# Token de /api/contactos (Authorization: Bearer <token>); sin token la ruta queda deshabilitada
+TOKEN_CONTACTOS = os.environ.get('TOKEN_CONTACTOS', '')
+
+# /api/stream: segundos entre latidos (mantienen viva la conexión) y clientes por worker
+LATIDO_STREAM = float(os.environ.get('LATIDO_STREAM', '15'))
+MAX_CLIENTES_STREAM = int(os.environ.get('MAX_CLIENTES_STREAM', '1000'))
+
+# Archivos versionados de /estaticos/ (python estaticos.py): el nombre cambia con el contenido
+MAX_AGE_ESTATICOS = 365 * 24 * 3600
+
+# Segundos entre revisiones de los archivos de datos (0 desactiva la recarga automática)
+INTERVALO_RECARGA = float(os.environ.get('INTERVALO_RECARGA', '5'))
+# Segundos que la firma de los archivos debe quedar quieta antes de recargar
+# (el análisis escribe varios archivos seguidos; sin esta espera se recargaría a medias)
+ESPERA_RECARGA = float(os.environ.get('ESPERA_RECARGA', '1'))
+
+# --- INSTRUMENTACIÓN ---
+LOG = obtener_log('app')
+MODOS_PERFILADO = modos_perfilado()
+
+METRICAS = ColeccionMetricas()
+LATENCIA_PETICIONES = METRICAS.histograma('http_peticion_segundos', 'Latencia de las peticiones por ruta.',
+                                          etiquetas=('ruta', 'metodo', 'estado'))
+DURACION_RECARGAS = METRICAS.histograma('snapshot_recarga_segundos', 'Tiempo de construcción del snapshot de datos.',
+                                        etiquetas=('resultado',))
+METRICAS.medidor('cache_graficos_aciertos_total', 'Gráficos servidos desde la caché.',
+                 lambda: CACHE_GRAFICOS.aciertos, tipo='counter')
+METRICAS.medidor('cache_graficos_fallos_total', 'Gráficos que hubo que dibujar.',
+                 lambda: CACHE_GRAFICOS.fallos, tipo='counter')
+METRICAS.medidor('cache_graficos_tasa_aciertos', 'Fracción de aciertos de la caché de gráficos.',
+                 lambda: CACHE_GRAFICOS.aciertos / max(CACHE_GRAFICOS.aciertos + CACHE_GRAFICOS.fallos, 1))
+METRICAS.medidor('cache_graficos_bytes', 'Bytes ocupados por la caché de gráficos.',
+                 lambda: CACHE_GRAFICOS.bytes_usados)
+METRICAS.medidor('cache_graficos_entradas', 'Gráficos guardados en la caché.', lambda: len(CACHE_GRAFICOS))
+METRICAS.medidor('snapshot_edad_segundos', 'Segundos desde que se cargó el snapshot actual.',
+                 lambda: (datetime.datetime.now() - SNAPSHOT.cargado_en).total_seconds())
+
+# --- SNAPSHOT DE DATOS ---
+# Todo lo que necesitan las rutas se calcula fuera de las peticiones y se guarda en
+# un snapshot inmutable. El recargador construye uno nuevo cuando cambian los archivos
+# y lo reemplaza con una sola asignación, así que una petición siempre ve un estado completo.
+Snapshot = namedtuple('Snapshot', [
+    'tabla_ciclos_html',
+    'tabla_experiencia_html',
+    'resumen',
+    'resultados',
+    'api_resultados',
+    'descarga_resultados',
+    'indice_filtros',
+    'indice_sugerencias',
+    'indice_contactos',
+    'estaticos',
+    'pagina_inicio',
+    'actualizado_en',
+    'firma',
+    'version',
+    'cargado_en'
+])
+
+# Cuerpo ya serializado de una respuesta, con sus variantes comprimidas y validadores HTTP
+RespuestaCacheada = namedtuple('RespuestaCacheada', ['cuerpo', 'gzip', 'br', 'etag', 'ultima_modificacion'])
+
+
+def preparar_respuesta(cuerpo, ultima_modificacion):
+    """Precalcula ETag fuerte y las variantes gzip/brotli de un cuerpo de respuesta"""
+    return RespuestaCacheada(
+        cuerpo=cuerpo,
+        gzip=gzip.compress(cuerpo, compresslevel=9, mtime=0),
+        br=brotli.compress(cuerpo) if brotli is not None else None,
+        etag=hashlib.sha256(cuerpo).hexdigest()[:32],
+        ultima_modificacion=ultima_modificacion.replace(microsecond=0)
+    )
+
+
+def servir_cacheado(cacheada, mimetype, nombre_descarga=None):
+    """
+    Sirve una respuesta precalculada: 304 si el cliente ya la tiene
+    (If-None-Match o If-Modified-Since) y, si no, la variante comprimida
+    que acepte el cliente. Cada codificación tiene su propio ETag fuerte.
+    """
+    etags = {'identity': cacheada.etag, 'gzip': cacheada.etag + '-gz', 'br': cacheada.etag + '-br'}
+    if request.if_none_match:
+        no_modificado = any(request.if_none_match.contains(etag) for etag in etags.values())
+    elif request.if_modified_since is not None:
+        no_modificado = cacheada.ultima_modificacion <= request.if_modified_since
+    else:
+        no_modificado = False
+
+    # Elegir la codificación: brotli, luego gzip, luego sin comprimir
+    codificacion, cuerpo = 'identity', cacheada.cuerpo
+    if cacheada.br is not None and request.accept_encodings['br'] > 0:
+        codificacion, cuerpo = 'br', cacheada.br
+    elif request.accept_encodings['gzip'] > 0:
+        codificacion, cuerpo = 'gzip', cacheada.gzip
+
+    respuesta = Response(b'' if no_modificado else cuerpo, status=304 if no_modificado else 200, mimetype=mimetype)
+    if codificacion != 'identity' and not no_modificado:
+        respuesta.headers['Content-Encoding'] = codificacion
+    respuesta.set_etag(etags[codificacion])
+    respuesta.last_modified = cacheada.ultima_modificacion
+    respuesta.vary.add('Accept-Encoding')
+    respuesta.cache_control.public = True
+    respuesta.cache_control.no_cache = True
+    if nombre_descarga:
+        respuesta.headers['Content-Disposition'] = f'attachment; filename={nombre_descarga}'
+    return respuesta
+
+
+def firma_archivos():
+    """(mtime, tamaño) de cada archivo de datos; None si no existe"""
+    firma = []
+    for ruta in (RUTA_CSV, RUTA_RESULTADOS, RUTA_SNAPSHOT, RUTA_INDICE_SUGERENCIAS, RUTA_INDICE_CONTACTOS,
+                 RUTA_MANIFIESTO_ESTATICOS):
+        try:
+            estado = os.stat(ruta)
+            firma.append((estado.st_mtime_ns, estado.st_size))
+        except FileNotFoundError:
+            firma.append(None)
+    return tuple(firma)
+
+
+def version_datos(firma):
+    """Id de una versión de los datos: igual en todos los workers que leen los mismos archivos"""
+    return hashlib.sha256(repr(firma).encode()).hexdigest()[:16]
+
+
+def url_estatico(estaticos, nombre):
+    """URL versionada de un archivo de static/ (la normal si no pasó por estaticos.py)"""
+    info = estaticos.get(nombre)
+    return f"/estaticos/{info['ruta']}" if info else f'/static/{nombre}'
 
-except FileNotFoundError:
-    df = None
-    TABLA_CICLOS_HTML = "<p>Error: No se encontró el archivo de datos.</p>"
-    TABLA_EXPERIENCIA_HTML = "<p>Error: No se encontró el archivo de datos.</p>"
-    RESUMEN = {
-        'Total de respuestas': 0,
-        'Estudiantes con experiencia previa': 0,
-        'Modalidad más solicitada': 'No disponible',
-        'Número de estudiantes en modalidad preferida': 0
+
+def construir_indice_filtros(encuesta=None):
+    """Bitmaps por valor de todas las columnas que se pueden filtrar o contar"""
+    from datos import COLUMNAS_UNICAS, cargar_encuesta
+    from indices import IndiceBitmap
+
+    if encuesta is None:
+        encuesta = cargar_encuesta(RUTA_CSV)
+    df = encuesta.respuestas
+    indice = IndiceBitmap(len(df))
+    for col in COLUMNAS_UNICAS:
+        if col in df.columns:
+            indice.agregar_unica(col, df[col])
+    for col, indice_multiple in encuesta.multiples.items():
+        indice.agregar_multiple(col, indice_multiple)
+    return indice
+
+
+def formatear_actualizacion(momento):
+    return momento.strftime("%d/%m/%Y %H:%M:%S")
+
+
+def construir_snapshot(firma=None, estricto=False):
+    """
+    Lee los archivos de datos y precalcula las tablas HTML, el resumen y los
+    resultados. Un JSON de resultados inválido deja `resultados` en None; con
+    `estricto` (el recargador) se propaga el error para conservar el snapshot anterior.
+    """
+    firma = firma_archivos() if firma is None else firma
+
+    # --- TABLAS Y RESUMEN: DEL SNAPSHOT O, SI NO HAY, DESDE EL CSV ---
+    try:
+        hash_fuente = hash_archivo(RUTA_CSV)
+        dashboard = leer_snapshot(hash_fuente)
+        if dashboard is not None:
+            indice_filtros = Perezoso(construir_indice_filtros)
+        else:
+            from datos import cargar_encuesta, calcular_tablas_dashboard
+            encuesta = cargar_encuesta(RUTA_CSV)
+            dashboard = calcular_tablas_dashboard(encuesta.respuestas)
+            indice_filtros = Perezoso(lambda: construir_indice_filtros(encuesta))
+
+        tabla_ciclos_html = dashboard['tabla_ciclos_html']
+        tabla_experiencia_html = dashboard['tabla_experiencia_html']
+        resumen = dashboard['resumen']
+
+    except FileNotFoundError:
+        tabla_ciclos_html = "<p>Error: No se encontró el archivo de datos.</p>"
+        tabla_experiencia_html = "<p>Error: No se encontró el archivo de datos.</p>"
+        resumen = {
+            'Total de respuestas': 0,
+            'Estudiantes con experiencia previa': 0,
+            'Modalidad más solicitada': 'No disponible',
+            'Número de estudiantes en modalidad preferida': 0
+        }
+        indice_filtros = None
+        hash_fuente = None
+
+    # Resultados del análisis (si ya se generaron): se parsean y serializan una sola vez
+    resultados = api_resultados = descarga_resultados = None
+    if os.path.exists(RUTA_RESULTADOS):
+        with open(RUTA_RESULTADOS, 'rb') as f:
+            contenido = f.read()
+        try:
+            resultados = json.loads(contenido.decode('utf-8'))
+        except ValueError as e:
+            # JSON a medio escribir o dañado: el dashboard arranca igual, sin resultados
+            if estricto:
+                raise
+            registrar_evento(LOG, 'resultados_invalidos', logging.WARNING, ruta=RUTA_RESULTADOS, error=str(e))
+        if resultados is not None:
+            modificado = datetime.datetime.fromtimestamp(os.path.getmtime(RUTA_RESULTADOS), datetime.timezone.utc)
+            api_resultados = preparar_respuesta(app.json.response(resultados).get_data(), modificado)
+            descarga_resultados = preparar_respuesta(contenido, modificado)
+
+    # Índice de las sugerencias: el que exportó el análisis o, si no hay, uno construido a partir del JSON
+    def cargar_indice_sugerencias():
+        indice = leer_indice()
+        if indice is None and resultados is not None:
+            indice = IndiceSugerencias.construir(resultados.get('sugerencias', []))
+        return indice
+
+    # Índice de contactos: el que exportó el análisis para este CSV o, si no hay, uno construido en memoria
+    def cargar_indice_contactos():
+        if hash_fuente is None:
+            return None
+        indice = leer_indice_contactos(hash_fuente=hash_fuente)
+        if indice is None:
+            from datos import cargar_encuesta
+            indice = IndiceContactos.construir(cargar_encuesta(RUTA_CSV), hash_fuente)
+        return indice
+
+    # Última actualización de los datos (CSV, resultados o snapshot), no la hora de la petición
+    mtimes = [parte[0] for parte in firma[:3] if parte is not None]
+    actualizado_en = (datetime.datetime.fromtimestamp(max(mtimes) / 1e9) if mtimes
+                      else datetime.datetime.now()).replace(microsecond=0)
+    estaticos = leer_manifiesto()
+
+    # La página de inicio se renderiza una vez por snapshot (en la primera petición)
+    def renderizar_pagina_inicio():
+        cuerpo = render_template('index.html',
+                                 titulo_pagina="Dashboard de Intereses Cisco NetAcad",
+                                 tabla_ciclos_html=tabla_ciclos_html,
+                                 tabla_experiencia_html=tabla_experiencia_html,
+                                 resumen=resumen,
+                                 version_datos=version_datos(firma),
+                                 areas=AREAS,
+                                 nombres_areas={area.clave: area.titulo for area in AREAS.values()},
+                                 estatico=lambda nombre: url_estatico(estaticos, nombre),
+                                 tiempo_actualizacion=formatear_actualizacion(actualizado_en))
+        return preparar_respuesta(cuerpo.encode('utf-8'), actualizado_en.astimezone(datetime.timezone.utc))
+
+    return Snapshot(
+        tabla_ciclos_html=tabla_ciclos_html,
+        tabla_experiencia_html=tabla_experiencia_html,
+        resumen=MappingProxyType(resumen),
+        resultados=resultados,
+        api_resultados=api_resultados,
+        descarga_resultados=descarga_resultados,
+        indice_filtros=indice_filtros,
+        indice_sugerencias=Perezoso(cargar_indice_sugerencias),
+        indice_contactos=Perezoso(cargar_indice_contactos),
+        estaticos=estaticos,
+        pagina_inicio=Perezoso(renderizar_pagina_inicio),
+        actualizado_en=actualizado_en,
+        firma=firma,
+        version=version_datos(firma),
+        cargado_en=datetime.datetime.now()
+    )
+
+
+_inicio = time.perf_counter()
+SNAPSHOT = construir_snapshot()
+DURACION_RECARGAS.observar(time.perf_counter() - _inicio, resultado='inicial')
+_candado_recarga = threading.Lock()
+
+
+def partes_dashboard(snapshot):
+    """
+    Lo que el dashboard actualiza en el lugar: tarjetas del resumen, tablas,
+    secciones de resultados, URLs versionadas de los gráficos y pie de página
+    """
+    secciones = {}
+    for clave, valor in (snapshot.resultados or {}).items():
+        # Las sugerencias se paginan aparte: basta con avisar cuántas hay
+        secciones[clave] = {'total': len(valor)} if clave == 'sugerencias' else valor
+    return {
+        'resumen': dict(snapshot.resumen),
+        'tablas': {'tabla_ciclos_html': snapshot.tabla_ciclos_html,
+                   'tabla_experiencia_html': snapshot.tabla_experiencia_html},
+        'secciones': secciones,
+        'estaticos': {nombre: url_estatico(snapshot.estaticos, nombre) for nombre in snapshot.estaticos},
+        'pagina': {'actualizacion': formatear_actualizacion(snapshot.actualizado_en)}
     }
 
 
+def diferencias(anterior, nuevo):
+    """
+    Solo lo que cambió entre dos estados de partes_dashboard, hasta el segundo
+    nivel (p. ej. un área de cursos_populares). Lo que desaparece va como None.
+    """
+    def comparar(previos, actuales, profundidad):
+        cambios = {}
+        for clave, valor in actuales.items():
+            previo = previos.get(clave)
+            if previo == valor:
+                continue
+            if profundidad > 1 and isinstance(previo, dict) and isinstance(valor, dict):
+                cambios[clave] = comparar(previo, valor, profundidad - 1)
+            else:
+                cambios[clave] = valor
+        cambios.update({clave: None for clave in previos if clave not in actuales})
+        return cambios
+
+    cambios = {}
+    for parte, actuales in nuevo.items():
+        cambiados = comparar(anterior.get(parte, {}), actuales, 2 if parte == 'secciones' else 1)
+        if cambiados:
+            cambios[parte] = cambiados
+    return cambios
+
+
+DIFUSOR = Difusor(SNAPSHOT.version)
+
+
+def en_hilo_del_sistema(funcion, *args, **kwargs):
+    """
+    Ejecuta `funcion` en un hilo real del sistema si el worker es de gevent
+    (gunicorn -k gevent): ahí el hilo recargador es un greenlet, y reconstruir
+    con pandas bloquearía el bucle de eventos, y con él todas las peticiones y
+    los clientes de /api/stream del worker. Sin gevent se llama directamente.
+    """
+    try:
+        from gevent import monkey
+    except ImportError:
+        return funcion(*args, **kwargs)
+    if not monkey.is_module_patched('threading'):
+        return funcion(*args, **kwargs)
+    import gevent
+    return gevent.get_hub().threadpool.spawn(funcion, *args, **kwargs).get()
+
+
+def recargar_si_cambio():
+    """Reconstruye y publica el snapshot si los archivos cambiaron; devuelve True si recargó"""
+    global SNAPSHOT
+    with _candado_recarga:
+        firma = firma_archivos()
+        if firma == SNAPSHOT.firma:
+            return False
+        # Si algo sigue cambiando, el análisis no terminó: se reintenta en la próxima vuelta
+        if ESPERA_RECARGA > 0:
+            time.sleep(ESPERA_RECARGA)
+            if firma_archivos() != firma:
+                return False
+        inicio = time.perf_counter()
+        try:
+            # El greenlet espera sin bloquear; el snapshot nuevo se publica desde aquí
+            nuevo = en_hilo_del_sistema(construir_snapshot, firma, estricto=True)
+        except Exception as e:
+            # Archivo a medio escribir o inválido: se conserva el snapshot anterior
+            DURACION_RECARGAS.observar(time.perf_counter() - inicio, resultado='error')
+            registrar_evento(LOG, 'recarga_fallida', logging.WARNING, error=str(e))
+            return False
+        duracion = time.perf_counter() - inicio
+        anterior, SNAPSHOT = SNAPSHOT, nuevo
+        DURACION_RECARGAS.observar(duracion, resultado='ok')
+        registrar_evento(LOG, 'datos_recargados', ms=round(duracion * 1000, 2))
+        # Los clientes de /api/stream reciben solo lo que cambió
+        cambios = diferencias(partes_dashboard(anterior), partes_dashboard(nuevo))
+        DIFUSOR.publicar(anterior.version, nuevo.version, cambios)
+        registrar_evento(LOG, 'cambios_publicados', partes=sorted(cambios), clientes=DIFUSOR.clientes)
+        return True
+
+
+def _bucle_recarga():
+    """Revisa periódicamente los archivos de datos en segundo plano"""
+    while True:
+        time.sleep(INTERVALO_RECARGA)
+        try:
+            recargar_si_cambio()
+        except Exception as e:
+            registrar_evento(LOG, 'error_recargador', logging.WARNING, error=str(e))
+
+
+def iniciar_recargador():
+    """Lanza el hilo recargador (uno por proceso/worker)"""
+    hilo = threading.Thread(target=_bucle_recarga, name='recargador-datos', daemon=True)
+    hilo.start()
+    return hilo
+
+
+if INTERVALO_RECARGA > 0:
+    iniciar_recargador()
+
+
+# --- MEDICIÓN DE PETICIONES ---
+@app.before_request
+def iniciar_medicion():
+    g.inicio_peticion = time.perf_counter()
+    if MODOS_PERFILADO:
+        g.perfil = contextlib.ExitStack()
+        g.perfil.enter_context(perfilar(f'peticion-{request.endpoint}', MODOS_PERFILADO, log=LOG))
+
+@app.after_request
+def registrar_latencia(respuesta):
+    ruta = request.url_rule.rule if request.url_rule is not None else 'sin_ruta'
+    LATENCIA_PETICIONES.observar(time.perf_counter() - g.inicio_peticion,
+                                 ruta=ruta, metodo=request.method, estado=respuesta.status_code)
+    return respuesta
+
+@app.teardown_request
+def terminar_perfil(error=None):
+    perfil = g.pop('perfil', None)
+    if perfil is not None:
+        perfil.close()
+
+
 # --- RUTAS ---
 @app.route('/')
 def dashboard():
-    # Ahora también pasamos el resumen y el tiempo de actualización
-    return render_template('index.html', 
-                           titulo_pagina="Dashboard de Intereses Cisco NetAcad",
-                           tabla_ciclos_html=TABLA_CICLOS_HTML,
-                           tabla_experiencia_html=TABLA_EXPERIENCIA_HTML,
-                           resumen=RESUMEN,
-                           tiempo_actualizacion=datetime.datetime.now().strftime("%d/%m/%Y %H:%M:%S")
-                          )
+    # Renderizada una vez por snapshot; 304 si el navegador ya tiene esta versión
+    return servir_cacheado(SNAPSHOT.pagina_inicio.valor(), 'text/html')
+
+# CSS, JS y gráficos con la huella del contenido en el nombre (ver estaticos.py):
+# se cachean un año y se sirve el .gz ya comprimido si el cliente lo acepta
+@app.route('/estaticos/<path:nombre>')
+def estaticos_versionados(nombre):
+    comprimido = (nombre.endswith(('.css', '.js', '.png'))
+                  and request.accept_encodings['gzip'] > 0
+                  and os.path.isfile(os.path.join(DIRECTORIO_DIST, nombre + '.gz')))
+    # Ruta absoluta: send_from_directory resolvería una relativa desde la carpeta de app.py,
+    # no desde el directorio de trabajo donde están el manifiesto y los demás datos
+    respuesta = send_from_directory(os.path.abspath(DIRECTORIO_DIST), nombre + '.gz' if comprimido else nombre,
+                                    mimetype=mimetypes.guess_type(nombre)[0], max_age=MAX_AGE_ESTATICOS,
+                                    conditional=True, etag=True)
+    if comprimido:
+        respuesta.headers['Content-Encoding'] = 'gzip'
+    respuesta.vary.add('Accept-Encoding')
+    respuesta.cache_control.public = True
+    respuesta.cache_control.immutable = True
+    return respuesta
+
+# Actualizaciones en vivo (Server-Sent Events): cada vez que se recargan los datos se
+# envía un evento 'cambios' con solo las partes que cambiaron. El cliente indica su
+# versión con ?desde= (o Last-Event-ID al reconectarse); si el historial no alcanza
+# para ponerlo al día recibe un evento 'estado' con todo. Con gunicorn -k gevent cada cliente
+# en espera es una greenlet, así que muchos clientes inactivos cuestan poco.
+@app.route('/api/stream')
+def api_stream():
+    if DIFUSOR.clientes >= MAX_CLIENTES_STREAM:
+        respuesta = jsonify({"error": "Demasiados clientes conectados; intente más tarde."})
+        respuesta.status_code = 503
+        respuesta.headers['Retry-After'] = '30'
+        return respuesta
+    desde = request.headers.get('Last-Event-ID') or request.args.get('desde')
+
+    def generar():
+        DIFUSOR.conectar()
+        try:
+            version = desde
+            yield f'retry: {int(LATIDO_STREAM * 1000)}\n\n'
+            while True:
+                eventos = DIFUSOR.esperar(version, LATIDO_STREAM)
+                if eventos is None:
+                    # Versión desconocida: se envía todo y el cliente reemplaza lo que tiene
+                    snapshot = SNAPSHOT
+                    version = snapshot.version
+                    yield formatear_evento('estado', partes_dashboard(snapshot), version)
+                elif not eventos:
+                    yield ': latido\n\n'
+                for evento in eventos or []:
+                    version = evento.id
+                    yield formatear_evento('cambios', evento.datos, version)
+        finally:
+            DIFUSOR.desconectar()
+
+    respuesta = Response(generar(), mimetype='text/event-stream')
+    respuesta.cache_control.no_cache = True
+    respuesta.headers['X-Accel-Buffering'] = 'no'  # Sin buffer en proxies (nginx)
+    return respuesta
 
 # Ruta para descargar el archivo JSON con los resultados
 @app.route('/download/results')
 def download_results():
     try:
-        # Comprobar si existe un archivo JSON de resultados
-        if os.path.exists('static/resultados_analisis.json'):
-            return send_file('static/resultados_analisis.json',
-                             mimetype='application/json',
-                             download_name='resultados_cisco_netacad.json',
-                             as_attachment=True)
+        snapshot = SNAPSHOT
+        # Comprobar si existe un archivo JSON de resultados (ya cargado en memoria)
+        if snapshot.descarga_resultados is not None:
+            return servir_cacheado(snapshot.descarga_resultados, 'application/json',
+                                   nombre_descarga='resultados_cisco_netacad.json')
         else:
             # Si no existe, devolver el resumen básico
-            return jsonify(RESUMEN)
+            return jsonify(dict(snapshot.resumen))
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -84,20 +549,287 @@ def download_results():
 @app.route('/api/results')
 def api_results():
     try:
-        if os.path.exists('static/resultados_analisis.json'):
-            with open('static/resultados_analisis.json', 'r', encoding='utf-8') as f:
-                return jsonify(json.load(f))
+        snapshot = SNAPSHOT
+        if snapshot.api_resultados is not None:
+            return servir_cacheado(snapshot.api_resultados, 'application/json')
         else:
             # Si no existe, devolver el resumen básico
             return jsonify({
                 "meta": {
                     "fecha_analisis": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                    "total_respuestas": RESUMEN['Total de respuestas']
+                    "total_respuestas": snapshot.resumen['Total de respuestas']
                 },
-                "resumen": RESUMEN
+                "resumen": dict(snapshot.resumen)
             })
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+# Una sección de los resultados. Las secciones de diccionario admiten
+# ?fields=a,b y las de lista (sugerencias) se paginan con ?cursor=...&limit=N.
+# Ejemplos: /api/results/preferencias?fields=modalidad,disposicion
+#           /api/results/sugerencias?limit=20
+@app.route('/api/results/<seccion>')
+def api_results_seccion(seccion):
+    snapshot = SNAPSHOT
+    if snapshot.resultados is None:
+        return jsonify({"error": "Todavía no hay resultados del análisis."}), 503
+    if seccion not in snapshot.resultados:
+        return jsonify({"error": f"Sección no válida: '{seccion}'.",
+                        "secciones_disponibles": list(snapshot.resultados)}), 404
+    valor = snapshot.resultados[seccion]
+
+    campos = tuple(c for c in request.args.get('fields', '').split(',') if c)
+    if campos:
+        if not isinstance(valor, dict):
+            return jsonify({"error": f"La sección '{seccion}' no admite fields."}), 400
+        desconocidos = [c for c in campos if c not in valor]
+        if desconocidos:
+            return jsonify({"error": f"Campos no válidos: {', '.join(desconocidos)}.",
+                            "campos_disponibles": list(valor)}), 400
+
+    pagina = None
+    if isinstance(valor, list):
+        # El cursor lleva la versión de los resultados: si se recargaron, la paginación empieza de nuevo
+        version = snapshot.api_resultados.etag[:8]
+        limite = min(max(request.args.get('limit', LIMITE_PAGINA, type=int), 1), LIMITE_PAGINA_MAXIMO)
+        inicio, _, version_cursor = request.args.get('cursor', f'0.{version}').partition('.')
+        if not inicio.isdigit() or version_cursor != version:
+            return jsonify({"error": "Cursor no válido o de resultados anteriores; vuelva a la primera página."}), 410
+        pagina = (int(inicio), limite, version)
+
+    def generar():
+        if pagina is not None:
+            inicio, limite, version = pagina
+            fin = inicio + limite
+            cuerpo = {"items": valor[inicio:fin], "total": len(valor),
+                      "siguiente": f'{fin}.{version}' if fin < len(valor) else None}
+        elif campos:
+            cuerpo = {c: valor[c] for c in campos}
+        else:
+            cuerpo = valor
+        return preparar_respuesta(app.json.response(cuerpo).get_data(), snapshot.api_resultados.ultima_modificacion)
+
+    # Cada sección tiene su propio ETag: solo cambia si cambia su contenido
+    cacheada = CACHE_SECCIONES.obtener_o_calcular((snapshot.firma, seccion, campos, pagina), generar)
+    return servir_cacheado(cacheada, 'application/json')
+
+# Búsqueda en las sugerencias, ordenada por relevancia y sin casi duplicados
+# Ejemplo: /api/sugerencias?q=cursos en español&limit=10
+# Sin q devuelve los totales y los temas más mencionados.
+@app.route('/api/sugerencias')
+def api_sugerencias():
+    indice = SNAPSHOT.indice_sugerencias.valor()
+    if indice is None:
+        return jsonify({"error": "Todavía no hay sugerencias indexadas."}), 503
+    consulta = request.args.get('q', '').strip()
+    if not consulta:
+        return jsonify(indice.resumen(request.args.get('temas', 20, type=int)))
+    limite = min(max(request.args.get('limit', 20, type=int), 1), LIMITE_PAGINA_MAXIMO)
+    return jsonify(indice.buscar(consulta, limite))
+
+# Correos de los estudiantes que pidieron aviso, por curso o área y filtrados por ciclo,
+# modalidad u horario (OR dentro de cada filtro y AND entre filtros; todos=1 exige todos
+# los cursos/áreas). Requiere Authorization: Bearer <TOKEN_CONTACTOS>.
+# Ejemplo: /api/contactos?curso=Linux 1&curso=Linux 2&ciclo=5.º - 6.º&limit=100
+def contactos_autorizados():
+    """None si la petición trae el token; si no, la respuesta de error"""
+    if not TOKEN_CONTACTOS:
+        return jsonify({"error": "La consulta de contactos no está habilitada (falta TOKEN_CONTACTOS)."}), 403
+    esquema, _, token = request.headers.get('Authorization', '').partition(' ')
+    if esquema.lower() != 'bearer' or not hmac.compare_digest(token.strip().encode(), TOKEN_CONTACTOS.encode()):
+        respuesta = jsonify({"error": "No autorizado."})
+        respuesta.status_code = 401
+        respuesta.headers['WWW-Authenticate'] = 'Bearer'
+        return respuesta
+    return None
+
+def respuesta_privada(datos):
+    """Respuesta con datos personales: no se guarda en ninguna caché"""
+    respuesta = jsonify(datos)
+    respuesta.cache_control.no_store = True
+    respuesta.cache_control.private = True
+    return respuesta
+
+@app.route('/api/contactos')
+def api_contactos():
+    error = contactos_autorizados()
+    if error is not None:
+        return error
+    indice = SNAPSHOT.indice_contactos.valor()
+    if indice is None:
+        return jsonify({"error": "No hay datos de la encuesta cargados."}), 503
+
+    filtros = {dimension: request.args.getlist(dimension) for dimension in DIMENSIONES if request.args.getlist(dimension)}
+    todos = request.args.get('todos', '').lower() in ('1', 'true', 'si', 'sí')
+    desde = max(request.args.get('desde', 0, type=int), 0)
+    limite = request.args.get('limit', type=int)
+    resultado = indice.buscar(filtros, todos, desde, None if limite is None else max(limite, 0))
+    registrar_evento(LOG, 'contactos_consultados', filtros=filtros, todos=todos, total=resultado['total'])
+    return respuesta_privada(resultado)
+
+# Contactos por valor de cada dimensión (cursos, áreas, ciclos, modalidades y horarios)
+@app.route('/api/contactos/opciones')
+def api_contactos_opciones():
+    error = contactos_autorizados()
+    if error is not None:
+        return error
+    indice = SNAPSHOT.indice_contactos.valor()
+    if indice is None:
+        return jsonify({"error": "No hay datos de la encuesta cargados."}), 503
+    return respuesta_privada(indice.opciones())
+
+# Ruta para contar las respuestas de una columna con filtros ad hoc
+# Ejemplo: /api/aggregate?columna=cursos_redes&ciclo=5.º - 6.º&modalidad=Presencial
+# Los valores repetidos de un mismo filtro se combinan con OR y los filtros entre sí con AND.
+@app.route('/api/aggregate')
+def api_aggregate():
+    if SNAPSHOT.indice_filtros is None:
+        return jsonify({"error": "No hay datos de la encuesta cargados."}), 503
+    indice = SNAPSHOT.indice_filtros.valor()
+
+    columna = request.args.get('columna')
+    if columna not in indice.vocabularios:
+        return jsonify({
+            "error": f"Columna no válida: '{columna}'.",
+            "columnas_disponibles": list(indice.vocabularios)
+        }), 400
+
+    filtros = leer_filtros(indice)
+    total, conteos = indice.agregar_consulta(columna, filtros)
+    return jsonify({
+        "columna": columna,
+        "filtros": filtros,
+        "total_respuestas": total,
+        "conteos": conteos
+    })
+
+def leer_filtros(indice):
+    """Filtros de la petición {columna: [valores]} para las columnas filtrables"""
+    filtros = {}
+    for nombre in COLUMNAS_FILTRABLES:
+        valores = request.args.getlist(nombre)
+        if valores and nombre in indice.vocabularios:
+            filtros[nombre] = valores
+    return filtros
+
+
+# Ruta para generar a pedido un gráfico del catálogo, opcionalmente filtrado
+# Ejemplo: /charts/cursos_redes.png?ciclo=5.º - 6.º&modalidad=Presencial
+@app.route('/charts/<nombre>.<formato>')
+def chart(nombre, formato):
+    # Importación diferida: matplotlib solo se carga si se usan los gráficos dinámicos
+    from graficos import CATALOGO_GRAFICOS, renderizar_en_memoria, trabajo_desde_conteos
+
+    if nombre not in CATALOGO_GRAFICOS or formato not in FORMATOS_GRAFICOS:
+        return jsonify({"error": f"Gráfico no disponible: '{nombre}.{formato}'.",
+                        "graficos_disponibles": list(CATALOGO_GRAFICOS)}), 404
+    snapshot = SNAPSHOT
+    if snapshot.indice_filtros is None:
+        return jsonify({"error": "No hay datos de la encuesta cargados."}), 503
+    indice = snapshot.indice_filtros.valor()
+    filtros = leer_filtros(indice)
+
+    def generar():
+        _, conteos = indice.agregar_consulta(CATALOGO_GRAFICOS[nombre]['columna'], filtros)
+        if not conteos:
+            # None no se guarda en la caché: filtros sin respuestas no ocupan memoria
+            return None
+        return renderizar_en_memoria(trabajo_desde_conteos(nombre, conteos), formato)
+
+    # La firma del snapshot forma parte de la clave: al recargar los datos se invalidan solos
+    clave = (snapshot.firma, nombre, formato, tuple(sorted((k, tuple(v)) for k, v in filtros.items())))
+    contenido = CACHE_GRAFICOS.obtener_o_calcular(clave, generar)
+    if contenido is None:
+        return jsonify({"error": "No hay respuestas para los filtros indicados.", "filtros": filtros}), 404
+
+    respuesta = Response(contenido, mimetype=FORMATOS_GRAFICOS[formato])
+    respuesta.set_etag(hashlib.sha256(contenido).hexdigest()[:32])
+    respuesta.cache_control.public = True
+    respuesta.cache_control.max_age = 300
+    return respuesta.make_conditional(request)
+
+# --- PERIODOS ---
+# Cada periodo es una partición con sus agregados ya calculados (ver periodos.py).
+# Las respuestas se serializan una vez por versión de los agregados que usan.
+def firma_periodos(periodos):
+    """(periodo, mtime, tamaño) del agregados.json de cada periodo; None si no existe"""
+    firma = []
+    for periodo in periodos:
+        try:
+            estado = os.stat(ruta_periodo(periodo, ARCHIVO_AGREGADOS))
+            firma.append((periodo, estado.st_mtime_ns, estado.st_size))
+        except FileNotFoundError:
+            firma.append((periodo, None, None))
+    return tuple(firma)
+
+
+def servir_periodos(clave, periodos, calcular):
+    """Sirve `calcular()` como JSON cacheado mientras no cambien los agregados de esos periodos"""
+    try:
+        firma = firma_periodos(periodos)
+
+        def generar():
+            modificado = max((mtime for _, mtime, _ in firma if mtime is not None), default=time.time_ns())
+            return preparar_respuesta(app.json.response(calcular()).get_data(),
+                                      datetime.datetime.fromtimestamp(modificado / 1e9, datetime.timezone.utc))
+
+        return servir_cacheado(CACHE_PERIODOS.obtener_o_calcular((clave, firma), generar), 'application/json')
+    except ValueError as e:
+        return jsonify({"error": str(e), "periodos_disponibles": listar_periodos()}), 404
+
+
+def resumen_periodos():
+    """Periodos disponibles con su total de respuestas y fecha de análisis"""
+    periodos = []
+    for periodo in listar_periodos():
+        datos = leer_agregados(periodo)
+        periodos.append({
+            "periodo": periodo,
+            "total_respuestas": datos['conteos']['total_respuestas'] if datos else None,
+            "fecha_analisis": datos['resultados']['meta']['fecha_analisis'] if datos else None
+        })
+    return {"periodos": periodos}
+
+
+def resultados_periodo(periodo):
+    datos = leer_agregados(periodo)
+    if datos is None:
+        raise ValueError(f"No hay resultados del periodo '{periodo}'.")
+    return datos['resultados']
+
+
+@app.route('/api/periodos')
+def api_periodos():
+    return servir_periodos('lista', listar_periodos(), resumen_periodos)
+
+# Evolución entre periodos (todos o los indicados)
+# Ejemplo: /api/periodos/tendencias?periodo=2024-2&periodo=2025-1&top=5
+@app.route('/api/periodos/tendencias')
+def api_periodos_tendencias():
+    periodos = request.args.getlist('periodo') or listar_periodos()
+    top = request.args.get('top', 10, type=int)
+    return servir_periodos(('tendencias', top), periodos, lambda: tendencias(periodos, top))
+
+# Diferencias entre dos periodos
+# Ejemplo: /api/periodos/comparar?a=2024-2&b=2025-1
+@app.route('/api/periodos/comparar')
+def api_periodos_comparar():
+    a, b = request.args.get('a'), request.args.get('b')
+    if not a or not b:
+        return jsonify({"error": "Indique los dos periodos con ?a=...&b=...",
+                        "periodos_disponibles": listar_periodos()}), 400
+    top = request.args.get('top', 10, type=int)
+    return servir_periodos(('comparar', top), [a, b], lambda: comparar(a, b, top))
+
+# Resultados de un periodo, con la misma forma que /api/results
+@app.route('/api/periodos/<periodo>')
+def api_periodo(periodo):
+    return servir_periodos('resultados', [periodo], lambda: resultados_periodo(periodo))
+
+# Métricas en formato de texto de Prometheus
+@app.route('/metrics')
+def metrics():
+    return Response(METRICAS.exponer(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
 if __name__ == '__main__':
-    app.run(debug=True)
\ No newline at end of file
+    app.run(debug=True)
@@ -0,0 +1,304 @@
+# benchmark.py
+"""
+Benchmark de escalado: genera encuestas sintéticas (ver sintetico.py) y mide
+el análisis (completo y por bloques), el informe y las rutas de la aplicación
+con cada tamaño.
+
+Cada fase se ejecuta en un proceso aparte dentro de un directorio de trabajo
+propio, así el pico de memoria (RSS máximo) corresponde solo a esa fase. Los
+resultados se comparan con benchmark_baseline.json para detectar regresiones.
+
+Uso:
+    python benchmark.py                       # 1k y 100k, compara con la línea base
+    python benchmark.py --tamanos 1k 100k 1m --guardar
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+from urllib.parse import urlencode
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+DIRECTORIO_PROYECTO = os.path.dirname(os.path.abspath(__file__))
+DIRECTORIO_TRABAJO = os.path.join(DIRECTORIO_PROYECTO, '.benchmark')
+RUTA_BASELINE = os.path.join(DIRECTORIO_PROYECTO, 'benchmark_baseline.json')
+
+TAMANOS_POR_DEFECTO = ['1k', '100k']
+
+# Una métrica es regresión si empeora más que la tolerancia relativa y,
+# para los tiempos, además más que el mínimo absoluto (evita falsos positivos
+# en operaciones de pocos milisegundos)
+TOLERANCIA = 0.25
+MINIMO_MS = 5.0
+
+REPETICIONES_RUTAS = 20
+
+# Token de /api/contactos en los procesos hijos (la ruta está deshabilitada sin token)
+TOKEN_CONTACTOS = 'benchmark'
+
+RUTAS = [
+    '/',
+    '/api/results',
+    '/download/results',
+    '/api/aggregate?' + urlencode({'columna': 'modalidad'}),
+    '/api/aggregate?' + urlencode({'columna': 'cursos_redes', 'ciclo': '5.º - 6.º'}),
+    '/charts/modalidad.png',
+    '/charts/cursos_redes.svg?' + urlencode({'ciclo': '5.º - 6.º'}),
+    '/metrics',
+    '/api/results/preferencias?' + urlencode({'fields': 'modalidad,disposicion'}),
+    '/api/results/sugerencias?' + urlencode({'limit': 20}),
+    '/api/sugerencias?' + urlencode({'q': 'cursos prácticos'}),
+    '/api/sugerencias',
+    '/api/contactos?' + urlencode({'curso': 'Fundamentos de redes', 'limit': 50}),
+    '/api/contactos/opciones',
+    # {original}: se reemplaza por su URL versionada del manifiesto (ver resolver_ruta)
+    '/estaticos/{images/modalidad.png}',
+    '/api/periodos',
+    '/api/periodos/tendencias',
+    '/api/periodos/comparar?' + urlencode({'a': '2024-2', 'b': '2025-1'}),
+    '/api/periodos/2025-1',
+]
+
+# Periodos que la fase 'periodos' crea con la encuesta sintética (las rutas /api/periodos los usan)
+PERIODOS = ['2024-2', '2025-1']
+
+
+def pico_memoria_mb():
+    """RSS máximo del proceso actual en MB (None si no se puede medir)"""
+    if resource is None:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux lo da en KB y macOS en bytes
+    return round(pico / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def _ms(segundos):
+    return round(segundos * 1000, 2)
+
+
+# --- Fases (se ejecutan en el proceso hijo, con el directorio de trabajo ya elegido) ---
+
+def medir_analisis():
+    """Carga (sin caché de datos), cada etapa del análisis y el total"""
+    shutil.rmtree('.cache_encuesta', ignore_errors=True)
+    salida = io.StringIO()
+    with contextlib.redirect_stdout(salida):
+        inicio = time.perf_counter()
+        import analisis
+        carga = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        analisis.generar_todos_los_analisis(procesos=0, usar_cache=False)
+        total = time.perf_counter() - inicio
+
+    metricas = {'carga_ms': _ms(carga), 'generar_todos_los_analisis_ms': _ms(total)}
+    for etapa, segundos in analisis.GRAFO.tiempos.items():
+        metricas[f'etapa.{etapa}_ms'] = _ms(segundos)
+    return metricas
+
+
+def medir_informe():
+    """Generación del informe a partir del JSON de resultados"""
+    import generar_informe
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        inicio = time.perf_counter()
+        generar_informe.main()
+        total = time.perf_counter() - inicio
+    return {'generar_informe_ms': _ms(total)}
+
+
+def medir_periodos():
+    """
+    Importación de un periodo (copia del CSV y agregados por bloques). El
+    segundo periodo es una copia del primero: sus agregados siguen siendo
+    válidos porque el CSV es el mismo.
+    """
+    import periodos
+
+    shutil.rmtree(periodos.DIRECTORIO_PERIODOS, ignore_errors=True)
+    with contextlib.redirect_stdout(io.StringIO()):
+        inicio = time.perf_counter()
+        periodos.importar_periodo(PERIODOS[0], 'respuestas_cisco.csv')
+        total = time.perf_counter() - inicio
+    for periodo in PERIODOS[1:]:
+        shutil.copytree(os.path.join(periodos.DIRECTORIO_PERIODOS, PERIODOS[0]),
+                        os.path.join(periodos.DIRECTORIO_PERIODOS, periodo))
+    return {'importar_periodo_ms': _ms(total)}
+
+
+def resolver_ruta(ruta):
+    """'/estaticos/{images/x.png}' -> URL con la huella del manifiesto de estaticos.py"""
+    if '{' not in ruta:
+        return ruta
+    from estaticos import leer_manifiesto
+
+    prefijo, nombre = ruta.rstrip('}').split('{')
+    return prefijo + leer_manifiesto()[nombre]['ruta']
+
+
+def medir_rutas():
+    """Arranque de la aplicación, primera petición y mediana/p95 de las siguientes"""
+    os.environ['INTERVALO_RECARGA'] = '0'
+    inicio = time.perf_counter()
+    from app import app
+    metricas = {'arranque_app_ms': _ms(time.perf_counter() - inicio)}
+
+    cliente = app.test_client()
+    cabeceras = {'Authorization': f"Bearer {os.environ.get('TOKEN_CONTACTOS', '')}"}
+    for ruta in RUTAS:
+        url = resolver_ruta(ruta)
+        inicio = time.perf_counter()
+        respuesta = cliente.get(url, headers=cabeceras)
+        primera = time.perf_counter() - inicio
+        if respuesta.status_code != 200:
+            raise RuntimeError(f'{ruta} respondió {respuesta.status_code}')
+
+        tiempos = []
+        for _ in range(REPETICIONES_RUTAS):
+            inicio = time.perf_counter()
+            cliente.get(url, headers=cabeceras)
+            tiempos.append(time.perf_counter() - inicio)
+        tiempos.sort()
+        metricas[f'ruta.{ruta}.primera_ms'] = _ms(primera)
+        metricas[f'ruta.{ruta}.mediana_ms'] = _ms(statistics.median(tiempos))
+        metricas[f'ruta.{ruta}.p95_ms'] = _ms(tiempos[int(0.95 * (len(tiempos) - 1))])
+    return metricas
+
+
+def medir_bloques():
+    """Análisis por bloques (bloques.py) del mismo CSV"""
+    import bloques
+
+    inicio = time.perf_counter()
+    bloques.exportar_resultados_por_bloques(ruta_json='static/resultados_bloques.json',
+                                            ruta_indice='static/indice_sugerencias_bloques.json')
+    return {'analisis_por_bloques_ms': _ms(time.perf_counter() - inicio)}
+
+
+FASES = {'analisis': medir_analisis, 'informe': medir_informe, 'periodos': medir_periodos, 'rutas': medir_rutas,
+         'bloques': medir_bloques}
+
+
+# --- Orquestación ---
+
+def preparar_directorio(tamano, semilla):
+    """Directorio de trabajo con la encuesta sintética (se reutiliza si ya existe)"""
+    from sintetico import filas_desde_tamano, generar_encuesta, guardar_encuesta
+
+    directorio = os.path.join(DIRECTORIO_TRABAJO, f'{tamano}-s{semilla}')
+    os.makedirs(os.path.join(directorio, 'static', 'images'), exist_ok=True)
+    ruta_csv = os.path.join(directorio, 'respuestas_cisco.csv')
+    if not os.path.exists(ruta_csv):
+        inicio = time.perf_counter()
+        guardar_encuesta(generar_encuesta(filas_desde_tamano(tamano), semilla), ruta_csv + '.tmp')
+        os.replace(ruta_csv + '.tmp', ruta_csv)
+        print(f"   Encuesta sintética de {tamano} generada en {time.perf_counter() - inicio:.1f} s")
+    return directorio
+
+
+def ejecutar_fase(fase, directorio):
+    """Ejecuta una fase en un proceso hijo y devuelve sus métricas"""
+    entorno = dict(os.environ, PYTHONPATH=DIRECTORIO_PROYECTO, MPLBACKEND='Agg', TOKEN_CONTACTOS=TOKEN_CONTACTOS)
+    proceso = subprocess.run([sys.executable, os.path.abspath(__file__), '--fase', fase],
+                             cwd=directorio, env=entorno, capture_output=True, text=True)
+    if proceso.returncode != 0:
+        raise RuntimeError(f"La fase '{fase}' falló:\n{proceso.stderr}")
+    return json.loads(proceso.stdout.strip().splitlines()[-1])
+
+
+def ejecutar_benchmark(tamanos, semilla):
+    resultados = {}
+    for tamano in tamanos:
+        print(f"\n📏 Tamaño {tamano}:")
+        directorio = preparar_directorio(tamano, semilla)
+        metricas = {}
+        for fase in FASES:
+            inicio = time.perf_counter()
+            metricas_fase = ejecutar_fase(fase, directorio)
+            metricas.update(metricas_fase)
+            print(f"   {fase:<10} {time.perf_counter() - inicio:7.1f} s   "
+                  f"pico de memoria {metricas_fase.get(f'pico_memoria_{fase}_mb')} MB")
+        resultados[tamano] = metricas
+    return resultados
+
+
+def comparar(resultados, baseline, tolerancia=TOLERANCIA):
+    """Lista de regresiones (tamaño, métrica, antes, ahora) frente a la línea base"""
+    regresiones = []
+    for tamano, metricas in resultados.items():
+        anteriores = baseline.get('resultados', {}).get(tamano, {})
+        for metrica, valor in metricas.items():
+            anterior = anteriores.get(metrica)
+            if anterior is None or valor is None:
+                continue
+            if valor > anterior * (1 + tolerancia) and (not metrica.endswith('_ms') or valor - anterior > MINIMO_MS):
+                regresiones.append((tamano, metrica, anterior, valor))
+    return regresiones
+
+
+def entorno_actual():
+    return {
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'procesadores': os.cpu_count(),
+        'fecha': datetime.now().strftime('%Y-%m-%d %H:%M')
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark de escalado del análisis y la aplicación')
+    parser.add_argument('--tamanos', nargs='+', default=TAMANOS_POR_DEFECTO,
+                        help="tamaños a medir, p. ej. 1k 100k 1m o un número de filas")
+    parser.add_argument('--semilla', type=int, default=42)
+    parser.add_argument('--guardar', action='store_true', help='guarda los resultados como nueva línea base')
+    parser.add_argument('--tolerancia', type=float, default=TOLERANCIA,
+                        help='empeoramiento relativo permitido antes de marcar una regresión')
+    parser.add_argument('--fase', choices=FASES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.fase:
+        # Proceso hijo: imprime las métricas como JSON en la última línea
+        metricas = FASES[args.fase]()
+        metricas[f'pico_memoria_{args.fase}_mb'] = pico_memoria_mb()
+        print(json.dumps(metricas, ensure_ascii=False))
+        sys.exit(0)
+
+    print("\n--- INICIANDO BENCHMARK ---")
+    resultados = ejecutar_benchmark(args.tamanos, args.semilla)
+
+    if os.path.exists(RUTA_BASELINE):
+        with open(RUTA_BASELINE, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regresiones = comparar(resultados, baseline, args.tolerancia)
+        if regresiones:
+            print(f"\n⚠️ Regresiones frente a la línea base ({baseline['entorno']['fecha']}):")
+            for tamano, metrica, anterior, valor in regresiones:
+                print(f"   [{tamano}] {metrica}: {anterior} → {valor}")
+        else:
+            print("\n✅ Sin regresiones frente a la línea base.")
+    else:
+        regresiones = []
+        print("\nℹ️ No hay línea base; use --guardar para crearla.")
+
+    if args.guardar:
+        with open(RUTA_BASELINE, 'w', encoding='utf-8') as f:
+            json.dump({'entorno': entorno_actual(), 'semilla': args.semilla, 'resultados': resultados},
+                      f, ensure_ascii=False, indent=2, sort_keys=True)
+        print(f"💾 Línea base guardada en {RUTA_BASELINE}")
+
+    print("\n--- BENCHMARK COMPLETADO ---\n")
+    sys.exit(1 if regresiones and not args.guardar else 0)
@@ -0,0 +1,304 @@
+# bloques.py
+"""
+Modo por bloques: lee el CSV de la encuesta en bloques de tamaño fijo y
+actualiza agregados combinables (conteos, tabla ciclo × disposición,
+modalidad y cursos por ciclo, coselección de cursos), sin cargar nunca el archivo completo.
+Escribe el mismo resultados_analisis.json que analisis.py.
+
+Uso: python bloques.py [ruta.csv] [--filas-por-bloque N]
+"""
+
+import argparse
+import logging
+import numpy as np
+import pandas as pd
+from datos import RUTA_CSV, COLUMNAS_UNICAS, COLUMNAS_CURSOS, COLUMNAS_MULTIPLES
+from esquema import AREAS, SEPARADOR_OPCIONES, normalizar_respuestas
+from indices import IndiceMultiple
+from agregaciones import resumen_coseleccion
+from metricas import obtener_log, registrar_evento, cronometro
+from resultados import RUTA_RESULTADOS, construir_resultados, guardar_resultados
+from sugerencias import RUTA_INDICE_SUGERENCIAS, IndiceSugerencias, guardar_indice
+
+LOG = obtener_log('bloques')
+
+FILAS_POR_BLOQUE = 50_000
+
+# Bits de la clave de primera aparición de un curso: columna | fila | posición en la respuesta
+_BITS_POSICION = 6
+_BITS_FILA = 50
+
+
+def _ordenar_como_value_counts(conteos):
+    """
+    Orden de `value_counts` sobre una columna categórica: de mayor a menor
+    conteo y los empates por orden alfabético de la categoría.
+    """
+    return sorted(conteos.items(), key=lambda x: (-x[1], x[0]))
+
+
+def _sumar(destino, conteos):
+    for clave, cantidad in conteos.items():
+        destino[clave] = destino.get(clave, 0) + cantidad
+
+
+class AgregadosEncuesta:
+    """
+    Agregados de la encuesta que se pueden actualizar bloque a bloque y
+    combinar entre sí. Los diccionarios conservan el orden de primera
+    aparición, que es el que usan los desempates del análisis completo.
+    """
+
+    def __init__(self):
+        self.filas = 0
+        self.unicas = {col: {} for col in COLUMNAS_UNICAS}
+        self.multiples = {col: {} for col in COLUMNAS_MULTIPLES}
+        self.respondientes = {col: 0 for col in COLUMNAS_MULTIPLES}
+        self.ciclo_disposicion = {}
+        self.ciclo_modalidad = {}
+        # (ciclo, curso) -> [conteo, clave de la primera aparición]
+        self.cursos_ciclo = {}
+        # Coselección: vocabulario de cursos, matriz curso × curso y estudiantes con algún curso
+        self.cursos = []
+        self.coocurrencias = np.zeros((0, 0), dtype=np.int64)
+        self.respondientes_cursos = 0
+        self.sugerencias = []
+
+    def actualizar(self, bloque):
+        """Suma un bloque ya limpio (normalizado según el esquema, sin filas vacías)"""
+        inicio = self.filas
+        self.filas += len(bloque)
+
+        for col in COLUMNAS_UNICAS:
+            if col not in bloque:
+                continue
+            valores = bloque[col].dropna()
+            # Registrar primero los valores nuevos en orden de aparición
+            conteos = valores.value_counts(sort=False)
+            _sumar(self.unicas[col], {v: int(conteos[v]) for v in pd.unique(valores)})
+
+        for col, destino in (('disposicion', self.ciclo_disposicion), ('modalidad', self.ciclo_modalidad)):
+            if 'ciclo' in bloque and col in bloque:
+                _sumar(destino, {k: int(v) for k, v in bloque.groupby(['ciclo', col], sort=False).size().items()})
+
+        codigos_ciclo, ciclos = pd.factorize(bloque['ciclo']) if 'ciclo' in bloque else (None, [])
+        indices_cursos = []
+        for numero_columna, col in enumerate(COLUMNAS_MULTIPLES):
+            if col not in bloque:
+                continue
+            indice = IndiceMultiple.desde_serie(bloque[col].reset_index(drop=True), SEPARADOR_OPCIONES)
+            if col in COLUMNAS_CURSOS:
+                indices_cursos.append(indice)
+            conteos = indice.conteos()
+            _sumar(self.multiples[col], {opcion: int(c) for opcion, c in zip(indice.vocabulario, conteos)})
+            self.respondientes[col] += int(indice.respondientes().sum())
+            if col in COLUMNAS_CURSOS and codigos_ciclo is not None:
+                self._actualizar_cursos_ciclo(indice, numero_columna, codigos_ciclo, ciclos, inicio)
+
+        if indices_cursos:
+            cursos = IndiceMultiple.combinar(indices_cursos)
+            self._sumar_coocurrencias(cursos.vocabulario, cursos.coocurrencias())
+            self.respondientes_cursos += int(cursos.respondientes().sum())
+
+        if 'sugerencias' in bloque:
+            self.sugerencias.extend(bloque['sugerencias'].dropna().tolist())
+        return self
+
+    def _actualizar_cursos_ciclo(self, indice, numero_columna, codigos_ciclo, ciclos, inicio):
+        """
+        Conteo de cada curso por ciclo y su primera aparición, codificada como
+        (columna, fila global, posición en la respuesta) para desempatar igual
+        que IndiceMultiple.combinar + top_por_grupo.
+        """
+        filas = indice.filas()
+        grupos = np.asarray(codigos_ciclo, dtype=np.int64)[filas]
+        validos = grupos >= 0
+        posiciones = np.minimum(np.arange(len(filas)) - indice.indptr[filas], (1 << _BITS_POSICION) - 1)
+        claves = ((numero_columna << (_BITS_FILA + _BITS_POSICION))
+                  | ((inicio + filas) << _BITS_POSICION) | posiciones)
+
+        n_opciones = len(indice.vocabulario)
+        planos = grupos[validos] * n_opciones + indice.indices[validos]
+        conteos = np.bincount(planos, minlength=len(ciclos) * n_opciones)
+        primeras = np.full(len(ciclos) * n_opciones, np.iinfo(np.int64).max, dtype=np.int64)
+        np.minimum.at(primeras, planos, claves[validos])
+
+        for plano in np.flatnonzero(conteos):
+            clave = (ciclos[plano // n_opciones], indice.vocabulario[plano % n_opciones])
+            actual = self.cursos_ciclo.setdefault(clave, [0, int(primeras[plano])])
+            actual[0] += int(conteos[plano])
+            actual[1] = min(actual[1], int(primeras[plano]))
+
+    def _sumar_coocurrencias(self, vocabulario, matriz):
+        """Suma una matriz de coocurrencias con su propio vocabulario (se alinea por nombre)"""
+        posicion = {curso: i for i, curso in enumerate(self.cursos)}
+        nuevos = [curso for curso in vocabulario if curso not in posicion]
+        if nuevos:
+            for curso in nuevos:
+                posicion[curso] = len(self.cursos)
+                self.cursos.append(curso)
+            ampliada = np.zeros((len(self.cursos), len(self.cursos)), dtype=np.int64)
+            ampliada[:len(self.coocurrencias), :len(self.coocurrencias)] = self.coocurrencias
+            self.coocurrencias = ampliada
+        destino = np.array([posicion[curso] for curso in vocabulario], dtype=np.int64)
+        self.coocurrencias[np.ix_(destino, destino)] += matriz
+
+    def combinar(self, otro):
+        """Suma los agregados de `otro`, que debe cubrir filas posteriores a las de este"""
+        desplazamiento = self.filas
+        self.filas += otro.filas
+        for col in COLUMNAS_UNICAS:
+            _sumar(self.unicas[col], otro.unicas[col])
+        for col in COLUMNAS_MULTIPLES:
+            _sumar(self.multiples[col], otro.multiples[col])
+            self.respondientes[col] += otro.respondientes[col]
+        _sumar(self.ciclo_disposicion, otro.ciclo_disposicion)
+        _sumar(self.ciclo_modalidad, otro.ciclo_modalidad)
+        for clave, (conteo, primera) in otro.cursos_ciclo.items():
+            # Las filas de `otro` se numeraron desde 0: se desplazan a su posición global
+            primera += desplazamiento << _BITS_POSICION
+            actual = self.cursos_ciclo.setdefault(clave, [0, primera])
+            actual[0] += conteo
+            actual[1] = min(actual[1], primera)
+        self._sumar_coocurrencias(otro.cursos, otro.coocurrencias)
+        self.respondientes_cursos += otro.respondientes_cursos
+        self.sugerencias.extend(otro.sugerencias)
+        return self
+
+    # --- Resultados con la misma forma que las etapas de analisis.py ---
+
+    def conteos(self, col):
+        """Equivalente a df[col].value_counts()"""
+        ordenados = _ordenar_como_value_counts(self.unicas[col])
+        return pd.Series([c for _, c in ordenados], index=[v for v, _ in ordenados], dtype='int64')
+
+    def top(self, col, n=None):
+        """Equivalente a IndiceMultiple.top(n) como diccionario"""
+        opciones = [(opcion, conteo) for opcion, conteo in self.multiples[col].items() if conteo > 0]
+        # sort es estable: los empates quedan por orden de primera aparición
+        opciones.sort(key=lambda x: -x[1])
+        return dict(opciones[:n])
+
+    def tabla_disposicion_por_ciclo(self):
+        """Equivalente a pd.crosstab(df['ciclo'], df['disposicion'])"""
+        filas = sorted({c for c, _ in self.ciclo_disposicion})
+        columnas = sorted({d for _, d in self.ciclo_disposicion})
+        valores = [[self.ciclo_disposicion.get((c, d), 0) for d in columnas] for c in filas]
+        return pd.DataFrame(valores, index=pd.Index(filas, name='ciclo'),
+                            columns=pd.Index(columnas, name='disposicion'), dtype='int64')
+
+    def modalidad_por_ciclo(self):
+        """Equivalente a la moda de modalidad por ciclo (groupby + value_counts().index[0])"""
+        modalidades = sorted(self.unicas['modalidad'])
+        resultado = {}
+        for ciclo in sorted(self.unicas['ciclo']):
+            conteos = {m: self.ciclo_modalidad.get((ciclo, m), 0) for m in modalidades}
+            if conteos:
+                resultado[ciclo] = _ordenar_como_value_counts(conteos)[0][0]
+        return pd.Series(resultado, name='modalidad', dtype=object).rename_axis('ciclo')
+
+    def cursos_por_ciclo(self):
+        """Equivalente a analisis.calcular_cursos_por_ciclo()"""
+        mejores = {}
+        for (ciclo, curso), (conteo, primera) in self.cursos_ciclo.items():
+            actual = mejores.get(ciclo)
+            if actual is None or (-conteo, primera) < (-actual[1], actual[2]):
+                mejores[ciclo] = (curso, conteo, primera)
+        # Los ciclos en orden de primera aparición, como pd.factorize
+        return {ciclo: {'curso': mejores[ciclo][0], 'conteo': mejores[ciclo][1]}
+                for ciclo in self.unicas['ciclo'] if ciclo in mejores}
+
+    def resumen(self):
+        """Equivalente a analisis.generar_resumen_estadistico() (sin escribir el CSV)"""
+        modalidad = self.conteos('modalidad')
+        # Un segmento pequeño puede no tener ninguna modalidad respondida
+        return {
+            'Total de respuestas': self.filas,
+            'Estudiantes con experiencia previa': self.unicas['experiencia_previa'].get('Sí', 0),
+            'Modalidad más solicitada': modalidad.index[0] if len(modalidad) else 'No disponible',
+            'Número de estudiantes en modalidad preferida': int(modalidad.iloc[0]) if len(modalidad) else 0
+        }
+
+    def resultados(self):
+        """Diccionario completo de resultados_analisis.json"""
+        return construir_resultados(
+            total_respuestas=self.filas,
+            resumen=self.resumen(),
+            modalidad=self.conteos('modalidad'),
+            disposicion=self.conteos('disposicion'),
+            horarios=self.top('horario'),
+            interes_por_area={area.etiqueta: self.respondientes[col] for col, area in AREAS.items()},
+            top_cursos={col: self.top(col, 10) for col in COLUMNAS_CURSOS},
+            modalidad_por_ciclo=self.modalidad_por_ciclo(),
+            tabla_disposicion_por_ciclo=self.tabla_disposicion_por_ciclo(),
+            cursos_por_ciclo=self.cursos_por_ciclo(),
+            experiencia_previa=self.conteos('experiencia_previa'),
+            sugerencias=self.sugerencias,
+            coseleccion_cursos=resumen_coseleccion(self.cursos, self.coocurrencias, self.respondientes_cursos),
+            respuestas_por_ciclo=self.unicas['ciclo']
+        )
+
+
+def leer_por_bloques(ruta=RUTA_CSV, filas_por_bloque=FILAS_POR_BLOQUE):
+    """
+    Genera bloques limpios del CSV. Todo se lee como texto para que un bloque
+    no cambie de tipo según las filas que le toquen.
+    """
+    for bloque in pd.read_csv(ruta, chunksize=filas_por_bloque, dtype=str):
+        bloque = normalizar_respuestas(bloque.dropna(how='all'))
+        if len(bloque):
+            yield bloque
+
+
+def agregar_csv(ruta=RUTA_CSV, filas_por_bloque=FILAS_POR_BLOQUE):
+    """Recorre el CSV por bloques y devuelve los agregados"""
+    agregados = AgregadosEncuesta()
+    for numero, bloque in enumerate(leer_por_bloques(ruta, filas_por_bloque)):
+        with cronometro(LOG, 'bloque_procesado', bloque=numero, filas=len(bloque)):
+            agregados.actualizar(bloque)
+    return agregados
+
+
+def agregar_por_segmento(ruta=RUTA_CSV, columnas=('ciclo', 'carrera'), filas_por_bloque=FILAS_POR_BLOQUE):
+    """
+    Recorre el CSV una sola vez y devuelve los agregados globales y los de cada
+    valor de las columnas de segmento: (agregados, {(columna, valor): agregados})
+    """
+    total = AgregadosEncuesta()
+    segmentos = {}
+    for numero, bloque in enumerate(leer_por_bloques(ruta, filas_por_bloque)):
+        with cronometro(LOG, 'bloque_procesado', bloque=numero, filas=len(bloque)):
+            total.actualizar(bloque)
+            for col in columnas:
+                if col not in bloque:
+                    continue
+                for valor, parte in bloque.groupby(col, sort=False):
+                    segmentos.setdefault((col, valor), AgregadosEncuesta()).actualizar(parte)
+    return total, segmentos
+
+
+def exportar_resultados_por_bloques(ruta=RUTA_CSV, ruta_json=RUTA_RESULTADOS, filas_por_bloque=FILAS_POR_BLOQUE,
+                                   ruta_indice=RUTA_INDICE_SUGERENCIAS):
+    """Genera resultados_analisis.json (y el índice de sugerencias) sin cargar el CSV completo en memoria"""
+    with cronometro(LOG, 'analisis_por_bloques', ruta=ruta, filas_por_bloque=filas_por_bloque):
+        agregados = agregar_csv(ruta, filas_por_bloque)
+        if agregados.filas == 0:
+            registrar_evento(LOG, 'csv_vacio', logging.WARNING, ruta=ruta)
+            return None
+        guardar_resultados(agregados.resultados(), ruta_json)
+        guardar_indice(IndiceSugerencias.construir(agregados.sugerencias), ruta_indice)
+    registrar_evento(LOG, 'resultados_exportados', ruta=ruta_json, respuestas=agregados.filas)
+    return agregados
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Análisis por bloques de la encuesta (memoria acotada)')
+    parser.add_argument('ruta', nargs='?', default=RUTA_CSV)
+    parser.add_argument('--filas-por-bloque', type=int, default=FILAS_POR_BLOQUE)
+    parser.add_argument('--salida', default=RUTA_RESULTADOS)
+    parser.add_argument('--indice-sugerencias', default=RUTA_INDICE_SUGERENCIAS)
+    args = parser.parse_args()
+
+    agregados = exportar_resultados_por_bloques(args.ruta, args.salida, args.filas_por_bloque, args.indice_sugerencias)
+    if agregados is not None:
+        print(f"✅ Resultados exportados a: {args.salida} ({agregados.filas} respuestas).")
@@ -0,0 +1,91 @@
+# cache.py
+#
+# Solo usa la biblioteca estándar (se importa desde app.py al arrancar).
+
+import threading
+from collections import OrderedDict
+
+
+class _Pendiente:
+    """Cálculo en curso que otros hilos pueden esperar"""
+
+    def __init__(self):
+        self.evento = threading.Event()
+        self.valor = None
+        self.error = None
+
+
+class CacheLRU:
+    """
+    Caché LRU acotada por tamaño total (en bytes por defecto) con coalescencia:
+    si varias peticiones piden a la vez una clave que no está, solo la primera
+    la calcula y las demás esperan ese mismo resultado.
+
+    Cada entrada cuesta su valor más su clave, así que ni las claves largas ni
+    los valores vacíos escapan al límite; un resultado None no se guarda.
+    """
+
+    def __init__(self, max_bytes, tamano=len):
+        self.max_bytes = max_bytes
+        self.tamano = tamano
+        self.bytes_usados = 0
+        self.aciertos = 0
+        self.fallos = 0
+        self._datos = OrderedDict()
+        self._en_curso = {}
+        self._candado = threading.Lock()
+
+    def obtener_o_calcular(self, clave, funcion):
+        """Devuelve el valor de la clave, calculándolo con `funcion()` si no está"""
+        with self._candado:
+            if clave in self._datos:
+                self._datos.move_to_end(clave)
+                self.aciertos += 1
+                return self._datos[clave][0]
+            pendiente = self._en_curso.get(clave)
+            propio = pendiente is None
+            if propio:
+                pendiente = self._en_curso[clave] = _Pendiente()
+                self.fallos += 1
+            else:
+                self.aciertos += 1
+
+        if not propio:
+            pendiente.evento.wait()
+            if pendiente.error is not None:
+                raise pendiente.error
+            return pendiente.valor
+
+        try:
+            pendiente.valor = funcion()
+        except BaseException as e:
+            pendiente.error = e
+            raise
+        finally:
+            with self._candado:
+                del self._en_curso[clave]
+                if pendiente.error is None:
+                    self._guardar(clave, pendiente.valor)
+            pendiente.evento.set()
+        return pendiente.valor
+
+    def _guardar(self, clave, valor):
+        if valor is None:
+            return
+        costo = len(repr(clave)) + self.tamano(valor)
+        if costo > self.max_bytes:
+            return
+        self._datos[clave] = (valor, costo)
+        self.bytes_usados += costo
+        while self.bytes_usados > self.max_bytes:
+            _, (_, costo_expulsado) = self._datos.popitem(last=False)
+            self.bytes_usados -= costo_expulsado
+
+    def limpiar(self):
+        """Vacía la caché (los cálculos en curso terminan normalmente)"""
+        with self._candado:
+            self._datos.clear()
+            self.bytes_usados = 0
+
+    def __len__(self):
+        return len(self._datos)
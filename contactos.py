@@ -0,0 +1,264 @@
+# contactos.py
+"""
+Contactos de los estudiantes que pidieron aviso cuando se abra un curso.
+
+Al exportar el análisis se construye un índice invertido: para cada curso,
+área (columna de cursos), ciclo, modalidad y horario, el conjunto de
+contactos que lo eligieron, guardado como bitmap sobre los correos ya
+normalizados (minúsculas, sin espacios y sin duplicados). Las consultas solo
+combinan bitmaps (OR dentro de una dimensión y AND entre dimensiones), sin
+volver a leer la encuesta.
+
+El índice contiene correos: se guarda fuera de static/ y no se versiona.
+Consultarlo solo usa la biblioteca estándar (app.py lo importa al arrancar);
+construirlo importa datos.py.
+
+Uso:
+    python contactos.py construir [respuestas_cisco.csv]
+    python contactos.py opciones
+    python contactos.py buscar --curso "Linux 1" --curso "Linux 2" --ciclo "5.º - 6.º" [--todos]
+"""
+
+import argparse
+import base64
+import json
+import os
+import sys
+import tempfile
+from snapshot import hash_archivo
+
+RUTA_INDICE_CONTACTOS = '.indice_contactos.json'
+VERSION_INDICE = 1
+
+# Columnas del esquema (el correo ya llega normalizado y validado, ver esquema.py)
+COLUMNA_CONTACTO = 'contacto'
+COLUMNA_CORREO = 'correo'
+
+# Dimensiones del índice; 'curso' y 'area' son los intereses, el resto filtros
+DIMENSIONES = ['curso', 'area', 'ciclo', 'modalidad', 'horario']
+INTERESES = ('curso', 'area')
+
+
+def acepta_contacto(respuesta):
+    """La respuesta incluye el "Sí" (algunas marcan "Sí" y "No" a la vez)"""
+    return 'Sí' in str(respuesta)
+
+
+def posiciones(bitmap):
+    """Posiciones de los bits en 1, de menor a mayor"""
+    bits = bin(bitmap)[:1:-1]  # Primero el bit menos significativo
+    posicion = bits.find('1')
+    while posicion >= 0:
+        yield posicion
+        posicion = bits.find('1', posicion + 1)
+
+
+class IndiceContactos:
+    """
+    Bitmaps (enteros de Python, un bit por contacto) por dimensión y valor.
+    Los contactos están ordenados por correo, así los resultados también.
+    """
+
+    def __init__(self, correos, bitmaps, hash_fuente=None):
+        self.correos = correos
+        self.bitmaps = bitmaps
+        self.hash_fuente = hash_fuente
+        self.todos = (1 << len(correos)) - 1
+
+    @classmethod
+    def construir(cls, encuesta, hash_fuente=None):
+        """Índice a partir de la encuesta limpia (ver datos.Encuesta)"""
+        import numpy as np
+        from datos import COLUMNAS_CURSOS
+
+        df = encuesta.respuestas
+        if COLUMNA_CONTACTO not in df.columns or COLUMNA_CORREO not in df.columns:
+            return cls([], {dimension: {} for dimension in DIMENSIONES}, hash_fuente)
+
+        correos_cat = df[COLUMNA_CORREO].astype('category').cat
+        normalizados = [str(c) for c in correos_cat.categories]
+        acepta_cat = df[COLUMNA_CONTACTO].astype('category').cat
+        acepta = np.array([acepta_contacto(r) for r in acepta_cat.categories] + [False])[acepta_cat.codes.to_numpy()]
+        codigos = correos_cat.codes.to_numpy()
+
+        correos = sorted(np.asarray(normalizados, dtype=object)[np.unique(codigos[acepta & (codigos >= 0)])])
+        posicion = {correo: i for i, correo in enumerate(correos)}
+        por_categoria = np.array([posicion.get(c, -1) for c in normalizados] + [-1], dtype=np.int64)
+        # Contacto de cada fila (-1 si no pidió aviso o no dejó un correo válido)
+        contacto = np.where(acepta, por_categoria[codigos], -1)
+
+        def a_entero(matriz):
+            """Una fila booleana por valor -> un bitmap por valor"""
+            bytes_ = np.packbits(matriz, axis=1, bitorder='little')
+            return [int.from_bytes(fila.tobytes(), 'little') for fila in bytes_]
+
+        bitmaps = {dimension: {} for dimension in DIMENSIONES}
+        for columna in ('ciclo', 'modalidad'):
+            if columna not in df.columns:
+                continue
+            serie = df[columna].astype('category').cat
+            codigos_columna = serie.codes.to_numpy()
+            validos = (contacto >= 0) & (codigos_columna >= 0)
+            matriz = np.zeros((len(serie.categories), len(correos)), dtype=bool)
+            matriz[codigos_columna[validos], contacto[validos]] = True
+            for valor, bitmap in zip(serie.categories, a_entero(matriz)):
+                if bitmap:
+                    bitmaps[columna][str(valor)] = bitmap
+
+        for columna in COLUMNAS_CURSOS + ['horario']:
+            if columna not in encuesta.multiples:
+                continue
+            indice = encuesta.multiples[columna]
+            ids = contacto[indice.filas()]
+            validos = ids >= 0
+            matriz = np.zeros((len(indice.vocabulario), len(correos)), dtype=bool)
+            matriz[np.asarray(indice.indices)[validos], ids[validos]] = True
+            dimension = 'horario' if columna == 'horario' else 'curso'
+            # Un mismo curso puede aparecer en varias áreas: se unen sus contactos
+            for opcion, bitmap in zip(indice.vocabulario, a_entero(matriz)):
+                if bitmap:
+                    bitmaps[dimension][opcion] = bitmaps[dimension].get(opcion, 0) | bitmap
+            if dimension == 'curso':
+                area, = a_entero(matriz.any(axis=0)[None, :])
+                if area:
+                    bitmaps['area'][columna] = area
+
+        return cls(correos, bitmaps, hash_fuente)
+
+    def a_dict(self):
+        longitud = (len(self.correos) + 7) // 8
+        return {
+            'version': VERSION_INDICE,
+            'hash_fuente': self.hash_fuente,
+            'correos': self.correos,
+            'bitmaps': {dimension: {valor: base64.b64encode(bitmap.to_bytes(longitud, 'little')).decode('ascii')
+                                    for valor, bitmap in valores.items()}
+                        for dimension, valores in self.bitmaps.items()}
+        }
+
+    @classmethod
+    def desde_dict(cls, datos):
+        bitmaps = {dimension: {valor: int.from_bytes(base64.b64decode(codificado), 'little')
+                               for valor, codificado in valores.items()}
+                   for dimension, valores in datos['bitmaps'].items()}
+        return cls(datos['correos'], bitmaps, datos.get('hash_fuente'))
+
+    def opciones(self):
+        """Contactos por valor de cada dimensión: {dimensión: {valor: contactos}}"""
+        return {dimension: {valor: bin(bitmap).count('1')
+                            for valor, bitmap in sorted(valores.items(), key=lambda x: x[0])}
+                for dimension, valores in self.bitmaps.items()}
+
+    def mascara(self, filtros, todos=False):
+        """
+        Bitmap de los contactos que cumplen los filtros {dimensión: [valores]}:
+        OR dentro de cada dimensión (AND para los intereses con todos=True) y
+        AND entre dimensiones. Un valor que no existe no coincide con nadie.
+        """
+        resultado = self.todos
+        for dimension, valores in filtros.items():
+            if dimension not in self.bitmaps:
+                raise ValueError(f"Dimensión no válida: '{dimension}' (use {', '.join(DIMENSIONES)}).")
+            if not valores:
+                continue
+            bitmaps = [self.bitmaps[dimension].get(valor, 0) for valor in valores]
+            if todos and dimension in INTERESES:
+                for bitmap in bitmaps:
+                    resultado &= bitmap
+            else:
+                union = 0
+                for bitmap in bitmaps:
+                    union |= bitmap
+                resultado &= union
+        return resultado
+
+    def buscar(self, filtros, todos=False, desde=0, limite=None):
+        """Correos (ordenados) de los contactos que cumplen los filtros, con el total"""
+        mascara = self.mascara(filtros, todos)
+        correos = []
+        for numero, posicion in enumerate(posiciones(mascara)):
+            if limite is not None and numero >= desde + limite:
+                break
+            if numero >= desde:
+                correos.append(self.correos[posicion])
+        return {
+            'filtros': filtros,
+            'todos': todos,
+            'total': bin(mascara).count('1'),
+            'desde': desde,
+            'correos': correos
+        }
+
+
+def guardar_indice(indice, ruta=RUTA_INDICE_CONTACTOS):
+    """Guarda el índice (JSON) de forma atómica y solo legible por el dueño"""
+    directorio = os.path.dirname(ruta) or '.'
+    os.makedirs(directorio, exist_ok=True)
+    fd, temporal = tempfile.mkstemp(dir=directorio, prefix='.tmp_', suffix='.json')
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        json.dump(indice.a_dict(), f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(temporal, ruta)
+    return ruta
+
+
+def leer_indice(ruta=RUTA_INDICE_CONTACTOS, hash_fuente=None):
+    """Índice guardado (None si no existe, es de otra versión o de otro CSV)"""
+    try:
+        with open(ruta, 'r', encoding='utf-8') as f:
+            datos = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+    if datos.get('version') != VERSION_INDICE:
+        return None
+    if hash_fuente is not None and datos.get('hash_fuente') != hash_fuente:
+        return None
+    return IndiceContactos.desde_dict(datos)
+
+
+def exportar_indice(ruta_csv=None, ruta=RUTA_INDICE_CONTACTOS, encuesta=None):
+    """Construye y guarda el índice del CSV (o de la encuesta ya cargada)"""
+    from datos import RUTA_CSV, cargar_encuesta
+
+    ruta_csv = ruta_csv or RUTA_CSV
+    if encuesta is None:
+        encuesta = cargar_encuesta(ruta_csv)
+    indice = IndiceContactos.construir(encuesta, hash_archivo(ruta_csv))
+    guardar_indice(indice, ruta)
+    return indice
+
+
+def obtener_indice(ruta_csv=None, ruta=RUTA_INDICE_CONTACTOS):
+    """Índice vigente para el CSV: el guardado o, si cambió el CSV, uno nuevo"""
+    from datos import RUTA_CSV
+
+    ruta_csv = ruta_csv or RUTA_CSV
+    indice = leer_indice(ruta, hash_archivo(ruta_csv))
+    return indice if indice is not None else exportar_indice(ruta_csv, ruta)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Contactos interesados en cada curso')
+    subcomandos = parser.add_subparsers(dest='comando', required=True)
+    construir = subcomandos.add_parser('construir', help='construye el índice de contactos')
+    construir.add_argument('ruta', nargs='?')
+    subcomandos.add_parser('opciones', help='contactos por curso, área, ciclo, modalidad y horario (JSON)')
+    buscar = subcomandos.add_parser('buscar', help='correos que cumplen los filtros (uno por línea)')
+    for dimension in DIMENSIONES:
+        buscar.add_argument(f'--{dimension}', action='append', default=[], metavar='VALOR')
+    buscar.add_argument('--todos', action='store_true', help='exige todos los cursos/áreas indicados')
+    buscar.add_argument('--json', action='store_true', help='salida en JSON con el total')
+    args = parser.parse_args()
+
+    if args.comando == 'construir':
+        indice = exportar_indice(args.ruta)
+        print(f"✅ Índice de contactos guardado en {RUTA_INDICE_CONTACTOS} ({len(indice.correos)} contactos).")
+    elif args.comando == 'opciones':
+        print(json.dumps(obtener_indice().opciones(), ensure_ascii=False, indent=2))
+    else:
+        filtros = {dimension: getattr(args, dimension) for dimension in DIMENSIONES if getattr(args, dimension)}
+        resultado = obtener_indice().buscar(filtros, args.todos)
+        if args.json:
+            print(json.dumps(resultado, ensure_ascii=False, indent=2))
+        else:
+            print('\n'.join(resultado['correos']))
+            print(f"📬 {resultado['total']} contactos.", file=sys.stderr)
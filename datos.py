@@ -0,0 +1,266 @@
+# datos.py
+
+import numpy as np
+import pandas as pd
+import os
+import sys
+import json
+import shutil
+import logging
+import tempfile
+from collections import namedtuple
+from snapshot import hash_archivo
+from indices import IndiceMultiple, construir_indices, tipo_entero
+from agregaciones import moda_por_grupo
+from metricas import obtener_log, registrar_evento
+from esquema import AREAS, SEPARADOR_OPCIONES, columnas_de_tipo, normalizar_respuestas, renombrar_columnas
+
+RUTA_CSV = 'respuestas_cisco.csv'
+
+# Caché columnar de la encuesta ya limpia (fuera de static/: contiene correos)
+RUTA_CACHE = '.cache_encuesta'
+# Subir VERSION_ESQUEMA cuando cambie la limpieza o el formato de la caché
+VERSION_ESQUEMA = 4
+# CSV distintos (periodos, tamaños del benchmark...) que conservan su caché; se
+# borran los usados hace más tiempo
+MAX_CACHES = int(os.environ.get('MAX_CACHES_ENCUESTA', '8'))
+
+LOG = obtener_log('datos')
+
+# Columnas de respuesta única y de selección múltiple (valores separados por comas).
+# Los nombres, encabezados y vocabularios de cada columna están en esquema.py.
+COLUMNAS_UNICAS = ['carrera', 'ciclo', 'experiencia_previa', 'modalidad', 'disposicion']
+# Todas las áreas de cursos del formulario, en su orden
+COLUMNAS_CURSOS = list(AREAS)
+COLUMNAS_MULTIPLES = columnas_de_tipo('multiple')
+
+# Encuesta en memoria: `respuestas` con las columnas de respuesta única como
+# categóricas y `multiples` con un IndiceMultiple (matriz dispersa respondiente ×
+# opción) por cada columna de selección múltiple, que ya no está en el dataframe.
+Encuesta = namedtuple('Encuesta', ['respuestas', 'multiples'])
+
+
+def preparar_respuestas(df):
+    """
+    Elimina las filas completamente vacías, renombra y normaliza las columnas
+    según el esquema (ver esquema.py) y convierte las demás columnas de texto a
+    categóricas. Las categorías quedan ordenadas alfabéticamente.
+    """
+    df = normalizar_respuestas(df.dropna(how='all'))
+    for col in df.columns:
+        if not pd.api.types.is_numeric_dtype(df[col]) and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype('category')
+    return df
+
+
+def compactar(df):
+    """Separa las columnas de selección múltiple del dataframe limpio como índices dispersos"""
+    multiples = construir_indices(df, COLUMNAS_MULTIPLES, SEPARADOR_OPCIONES)
+    return Encuesta(df.drop(columns=list(multiples)), multiples)
+
+
+def escribir_cache(encuesta, hash_fuente, ruta_cache=RUTA_CACHE):
+    """
+    Guarda la encuesta como un directorio de archivos .npy por columna (códigos
+    para las categóricas, indptr/indices para las de selección múltiple) más un
+    meta.json con el esquema. Se escribe en un directorio temporal y se publica
+    con un rename atómico.
+    """
+    df = encuesta.respuestas
+    os.makedirs(ruta_cache, exist_ok=True)
+    temporal = tempfile.mkdtemp(dir=ruta_cache, prefix='.tmp_')
+    columnas = []
+    try:
+        for col, indice in encuesta.multiples.items():
+            archivo = f'{len(columnas):03d}'
+            np.save(os.path.join(temporal, archivo + '_indptr.npy'), indice.indptr)
+            np.save(os.path.join(temporal, archivo + '_indices.npy'), indice.indices)
+            columnas.append({'nombre': col, 'archivo': archivo, 'tipo': 'multiple',
+                             'vocabulario': indice.vocabulario})
+        for col in df.columns:
+            serie = df[col]
+            archivo = f'{len(columnas):03d}.npy'
+            if isinstance(serie.dtype, pd.CategoricalDtype):
+                categorias = [str(c) for c in serie.cat.categories]
+                codigos = serie.cat.codes.to_numpy().astype(tipo_entero(len(categorias)))
+                np.save(os.path.join(temporal, archivo), codigos)
+                columnas.append({'nombre': col, 'archivo': archivo, 'tipo': 'categoria', 'categorias': categorias})
+            else:
+                np.save(os.path.join(temporal, archivo), serie.to_numpy())
+                columnas.append({'nombre': col, 'archivo': archivo, 'tipo': str(serie.dtype)})
+        np.save(os.path.join(temporal, 'indice.npy'), df.index.to_numpy())
+
+        meta = {
+            'version_esquema': VERSION_ESQUEMA,
+            'hash_fuente': hash_fuente,
+            'filas': len(df),
+            'columnas': columnas
+        }
+        with open(os.path.join(temporal, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+
+        destino = os.path.join(ruta_cache, hash_fuente)
+        try:
+            os.rename(temporal, destino)
+        except OSError:
+            # Otro proceso (p. ej. otro worker) ya publicó la misma caché
+            if not os.path.exists(destino):
+                raise
+            shutil.rmtree(temporal)
+    except BaseException:
+        shutil.rmtree(temporal, ignore_errors=True)
+        raise
+
+    podar_cache(ruta_cache, conservar=hash_fuente)
+    return destino
+
+
+def _ultimo_uso(directorio):
+    """mtime del meta.json (leer_cache lo actualiza en cada acierto); 0 si no existe"""
+    try:
+        return os.stat(os.path.join(directorio, 'meta.json')).st_mtime
+    except OSError:
+        return 0
+
+
+def podar_cache(ruta_cache=RUTA_CACHE, maximo=MAX_CACHES, conservar=None):
+    """Deja solo las `maximo` cachés usadas más recientemente (y siempre `conservar`)"""
+    entradas = [nombre for nombre in os.listdir(ruta_cache)
+                if nombre != conservar and not nombre.startswith('.tmp_')]
+    entradas.sort(key=lambda nombre: _ultimo_uso(os.path.join(ruta_cache, nombre)), reverse=True)
+    for nombre in entradas[max(maximo - (conservar is not None), 0):]:
+        shutil.rmtree(os.path.join(ruta_cache, nombre), ignore_errors=True)
+
+
+def leer_cache(hash_fuente, ruta_cache=RUTA_CACHE):
+    """
+    Carga la encuesta desde la caché si existe para ese hash y versión de
+    esquema; los arreglos se abren con memory-map. Devuelve None si no sirve.
+    """
+    directorio = os.path.join(ruta_cache, hash_fuente)
+    try:
+        with open(os.path.join(directorio, 'meta.json'), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+    if meta.get('version_esquema') != VERSION_ESQUEMA or meta.get('hash_fuente') != hash_fuente:
+        return None
+    try:
+        # Marca de uso para podar_cache
+        os.utime(os.path.join(directorio, 'meta.json'))
+    except OSError:
+        pass
+
+    datos = {}
+    multiples = {}
+    for col in meta['columnas']:
+        if col['tipo'] == 'multiple':
+            base = os.path.join(directorio, col['archivo'])
+            multiples[col['nombre']] = IndiceMultiple(col['vocabulario'],
+                                                      np.load(base + '_indptr.npy', mmap_mode='r'),
+                                                      np.load(base + '_indices.npy', mmap_mode='r'))
+            continue
+        valores = np.load(os.path.join(directorio, col['archivo']), mmap_mode='r')
+        if col['tipo'] == 'categoria':
+            datos[col['nombre']] = pd.Categorical.from_codes(valores, categories=col['categorias'])
+        else:
+            datos[col['nombre']] = np.asarray(valores)
+    indice = np.load(os.path.join(directorio, 'indice.npy'))
+    return Encuesta(pd.DataFrame(datos, index=pd.Index(indice)), multiples)
+
+
+def calcular_tablas_dashboard(df, modalidad_por_ciclo=None):
+    """
+    Tablas HTML y resumen que muestra el dashboard. Se guardan en el snapshot
+    para que app.py pueda servirlos sin importar pandas.
+    """
+    # Pre-calculamos las tablas que necesita el HTML
+    if modalidad_por_ciclo is None:
+        modalidad_por_ciclo = moda_por_grupo(df, 'ciclo', 'modalidad')
+    modalidad_por_ciclo = modalidad_por_ciclo.reset_index()
+    modalidad_por_ciclo.columns = ['Ciclo', 'Modalidad Preferida']
+
+    experiencia_counts = df['experiencia_previa'].value_counts().to_frame().reset_index()
+    experiencia_counts.columns = ['Respuesta', 'Número de Estudiantes']
+
+    # Calcular datos para el resumen
+    modalidad_preferida = df['modalidad'].value_counts()
+    experiencia_previa = df['experiencia_previa'].value_counts()
+
+    return {
+        'tabla_ciclos_html': modalidad_por_ciclo.to_html(classes='table table-striped table-hover', index=False, justify='center'),
+        'tabla_experiencia_html': experiencia_counts.to_html(classes='table table-striped table-hover', index=False, justify='center'),
+        # Diccionario resumen que espera el template
+        'resumen': {
+            'Total de respuestas': len(df),
+            'Estudiantes con experiencia previa': int(experiencia_previa.get('Sí', 0)),
+            'Modalidad más solicitada': str(modalidad_preferida.index[0]) if len(modalidad_preferida) > 0 else 'No disponible',
+            'Número de estudiantes en modalidad preferida': int(modalidad_preferida.iloc[0]) if len(modalidad_preferida) > 0 else 0
+        }
+    }
+
+
+def cargar_encuesta(ruta=RUTA_CSV, usar_cache=True):
+    """
+    Devuelve la encuesta limpia y compacta (ver Encuesta). Usa la caché columnar
+    si coincide el hash del CSV; si no, parsea el CSV y regenera la caché.
+    """
+    if not usar_cache:
+        return compactar(preparar_respuestas(pd.read_csv(ruta)))
+
+    hash_fuente = hash_archivo(ruta)
+    encuesta = leer_cache(hash_fuente)
+    if encuesta is not None:
+        return encuesta
+
+    encuesta = compactar(preparar_respuestas(pd.read_csv(ruta)))
+    try:
+        escribir_cache(encuesta, hash_fuente)
+    except OSError as e:
+        registrar_evento(LOG, 'cache_datos_no_escrita', logging.WARNING, error=str(e))
+    return encuesta
+
+
+def _bytes_serie(serie):
+    return int(serie.memory_usage(deep=True, index=False))
+
+
+def reporte_memoria(ruta=RUTA_CSV):
+    """
+    Bytes por columna del CSV leído tal cual (texto) frente a la encuesta
+    compacta. Devuelve una lista de (columna, bytes_antes, bytes_despues).
+    """
+    original = pd.read_csv(ruta)
+    original = original.rename(columns=renombrar_columnas(original.columns)).dropna(how='all')
+    encuesta = compactar(preparar_respuestas(original.copy()))
+    filas = []
+    for col in original.columns:
+        if col in encuesta.multiples:
+            despues = encuesta.multiples[col].nbytes()
+        else:
+            despues = _bytes_serie(encuesta.respuestas[col])
+        filas.append((col, _bytes_serie(original[col]), despues))
+    return filas
+
+
+# Paso de ingesta: `python datos.py [ruta.csv]` genera la caché columnar
+# y `python datos.py --reporte [ruta.csv]` muestra los bytes por columna
+if __name__ == '__main__':
+    argumentos = [a for a in sys.argv[1:] if a != '--reporte']
+    ruta = argumentos[0] if argumentos else RUTA_CSV
+
+    if '--reporte' in sys.argv[1:]:
+        filas = [(col.replace('\n', ' ').strip(), antes, despues) for col, antes, despues in reporte_memoria(ruta)]
+        ancho = max(len(col) for col, _, _ in filas)
+        print(f"{'Columna':<{ancho}}  {'Antes':>12}  {'Después':>12}  {'Ahorro':>7}")
+        for col, antes, despues in filas:
+            print(f"{col:<{ancho}}  {antes:>12,}  {despues:>12,}  {1 - despues / max(antes, 1):>7.1%}")
+        antes, despues = sum(f[1] for f in filas), sum(f[2] for f in filas)
+        print(f"{'Total':<{ancho}}  {antes:>12,}  {despues:>12,}  {1 - despues / max(antes, 1):>7.1%}")
+        sys.exit(0)
+
+    hash_fuente = hash_archivo(ruta)
+    encuesta = compactar(preparar_respuestas(pd.read_csv(ruta)))
+    destino = escribir_cache(encuesta, hash_fuente)
+    print(f"✅ Caché generada en {destino} ({len(encuesta.respuestas)} filas, "
+          f"{len(encuesta.respuestas.columns) + len(encuesta.multiples)} columnas).")
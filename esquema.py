@@ -0,0 +1,262 @@
+# esquema.py
+#
+# La declaración del esquema solo usa la biblioteca estándar (app.py la importa
+# para las áreas); pandas se importa al normalizar.
+"""
+Esquema declarativo de la encuesta: cada columna con su nombre interno, los
+encabezados con los que aparece en los CSV, su tipo y su vocabulario canónico.
+
+Los encabezados y las opciones se comparan por su clave (sin tildes, sin
+mayúsculas y con los espacios colapsados), así 'Redes y ciberseguridad ',
+'Hardware  y Sistemas Operativos' o 'Professional Skills\\n' se reconocen sin
+escribirlos al carácter. Las opciones de selección múltiple se separan con el
+vocabulario, de modo que una opción con comas ('Crear contenido digital,
+comunicarse y colaborar en línea') cuenta como una sola.
+
+Tipos:
+    unica     una respuesta; con `opciones`, se lleva a su forma canónica
+    multiple  varias opciones separadas por comas
+    likert    una respuesta de una escala (`opciones` de menor a mayor)
+    texto     texto libre (solo se limpian los espacios)
+    correo    correo en minúsculas; los inválidos quedan vacíos
+"""
+
+import logging
+import re
+import unicodedata
+from collections import namedtuple
+from metricas import obtener_log, registrar_evento
+
+LOG = obtener_log('esquema')
+
+# Separa las opciones ya normalizadas de una respuesta múltiple (no aparece en las respuestas)
+SEPARADOR_OPCIONES = '\x1f'
+
+PATRON_CORREO = re.compile(r'[^@\s]+@[^@\s]+\.[^@\s]+')
+
+# Área de cursos: clave en los resultados, etiqueta corta (interés por área y
+# gráficos) y título (encabezados del dashboard y del informe)
+Area = namedtuple('Area', ['clave', 'etiqueta', 'titulo'])
+
+# `alias`: otras formas de escribir una opción {alias: opción canónica}
+Columna = namedtuple('Columna', ['nombre', 'tipo', 'encabezados', 'opciones', 'alias', 'area'],
+                     defaults=(None, None, None))
+
+ESQUEMA = [
+    Columna('carrera', 'unica', ['Seleccione la carrera a la que pertenece']),
+    Columna('ciclo', 'unica', ['¿En qué ciclo se encuentra actualmente?'],
+            ['1.º - 2.º', '3.º - 4.º', '5.º - 6.º', '7.º o mas', 'Graduado', 'Estudiante de Posgrado'],
+            alias={'7.º o más': '7.º o mas'}),
+    Columna('experiencia_previa', 'unica', ['¿Ha tomado anteriormente algún curso en la plataforma Cisco NetAcad?'],
+            ['Sí', 'No']),
+    Columna('cursos_redes', 'multiple', ['Redes y ciberseguridad'],
+            ['Ethical Hacker', 'Fundamento de Ciberseguridad', 'Analista Junior en Ciberseguridad',
+             'Introducción al Internet de las cosas y Transformación Digital', 'CCNA: Introducción a las redes',
+             'Fundamentos de redes', 'Introducción a Cisco Packet Tracer', 'Introducción a la ciberseguridad',
+             'Conceptos básicos de redes', 'Defensa de la red', 'CCNA: Fundamentos de Conmutación',
+             'Enrutamiento y Redes Inalámbricas', 'Soporte y Seguridad de red', 'Seguridad de Terminales',
+             'CCNA: Redes Empresariales', 'Seguridad y Automatización',
+             'Exploración de redes con Cisco Packet Tracer', 'Exploración de IoT con Cisco Packet Tracer'],
+            area=Area('redes_ciberseguridad', 'Redes y Ciberseguridad', 'Redes y Ciberseguridad')),
+    Columna('cursos_ia', 'multiple', ['IA y Ciencia de Datos'],
+            ['Introducción to moderm AI', 'Introducción a la Ciencia de Datos', 'Fundamentos de IA con IBM SkillsBuild',
+             'AI Security Nuggets', '[Beta] Data Science Essentials with Python', 'Data Analytics Essentials',
+             'Cloud Managed Networking 101 with Cisco Meraki'],
+            area=Area('ia_ciencia_datos', 'IA y Ciencia de Datos', 'IA y Ciencia de Datos')),
+    Columna('cursos_programacion', 'multiple', ['Programación'],
+            ['C++ Essentials 1', 'C++ Essentials 2', 'C++ Advanced', 'Fundamentos de Python 1',
+             'Fundamentos de Python 2', 'CSS Essentials', 'HTML Essentials', 'JavaScript Essentials 1',
+             'JavaScript Essentials 2'],
+            area=Area('programacion', 'Programación', 'Programación')),
+    Columna('cursos_so', 'multiple', ['Hardware y Sistemas Operativos'],
+            ['Linux 1', 'Linux 2', 'Operating Systems Basics', 'Linux Unhatched', 'Linux Essentials',
+             'Conceptos Básicos de Hardware de Computadora', 'Fundamentos de Linux', 'Operating Systems Support'],
+            area=Area('hardware_so', 'Hardware y SO', 'Hardware y Sistemas Operativos')),
+    Columna('cursos_ti', 'multiple', ['Tecnologías de Información'],
+            ['IT Essentials 7', 'IT Customer Support Basics'],
+            area=Area('tecnologias_informacion', 'Tecnologías de Información', 'Tecnologías de Información')),
+    Columna('cursos_digital', 'multiple', ['Colección de aprendizaje de instrucción digital'],
+            ['Uso de Computadoras y Dispositivos Móviles', 'Crear contenido digital, comunicarse y colaborar en línea',
+             'Conciencia digital', 'Digital Safety and Security Awareness'],
+            area=Area('instruccion_digital', 'Instrucción Digital', 'Colección de Aprendizaje de Instrucción Digital')),
+    Columna('cursos_habilidades', 'multiple', ['Professional Skills'],
+            ['English for IT 1', 'English for IT 2', 'Launching a Business Venture', 'Managing a Business Venture',
+             'Discovering Entrepreneurship', 'Engaging Stakeholders for Success', 'Creating Compelling Reports',
+             'Career Preparation Workshop Version 5.0'],
+            area=Area('habilidades_profesionales', 'Professional Skills', 'Professional Skills')),
+    Columna('cursos_sostenibilidad', 'multiple', ['Sostenibilidad'],
+            ['Introduction to Greenhouse Gas Accounting for IT'],
+            area=Area('sostenibilidad', 'Sostenibilidad', 'Sostenibilidad')),
+    Columna('modalidad', 'unica', ['¿Qué modalidad prefiere para tomar estos cursos?'],
+            ['Virtual asincrónica (a tu ritmo)', 'Virtual sincrónica (clases en línea en tiempo real)', 'Presencial']),
+    Columna('disposicion', 'likert',
+            ['¿Qué tan dispuesto/a estaría a participar en un curso opcional de este tipo durante el semestre?'],
+            ['Poco dispuesto/a', 'Algo dispuesto/a', 'Muy dispuesto/a']),
+    Columna('horario', 'multiple',
+            ['¿Qué días y horarios prefiere para tomar este tipo de cursos presenciales o síncronos?'],
+            ['Lunes a viernes - Mañana', 'Lunes a viernes - Tarde', 'Lunes a viernes - Noche', 'Fines de semana']),
+    Columna('sugerencias', 'texto',
+            ['¿Qué sugerencias tiene para estos cursos o qué otros temas le gustaría que se incluyan?']),
+    Columna('contacto', 'unica', ['¿Deseas que le contactemos cuando se abra un curso que le interese?']),
+    Columna('correo', 'correo', ['Si marcaste "Sí", por favor deje su correo institucional:']),
+]
+
+COLUMNAS = {columna.nombre: columna for columna in ESQUEMA}
+
+# Áreas de cursos en el orden del formulario: {columna: Area}
+AREAS = {columna.nombre: columna.area for columna in ESQUEMA if columna.area is not None}
+
+
+def columnas_de_tipo(*tipos):
+    """Nombres de las columnas de esos tipos, en el orden del esquema"""
+    return [columna.nombre for columna in ESQUEMA if columna.tipo in tipos]
+
+
+def clave_texto(texto):
+    """Clave de comparación: sin tildes, en minúsculas y con los espacios colapsados"""
+    texto = re.sub('[\u0300-\u036f]', '', unicodedata.normalize('NFKD', str(texto)))
+    return re.sub(r'\s+', ' ', texto.casefold()).strip()
+
+
+def _claves(serie):
+    """clave_texto vectorizada sobre una serie de textos"""
+    return (serie.str.normalize('NFKD').str.replace('[\u0300-\u036f]', '', regex=True)
+            .str.casefold().str.replace(r'\s+', ' ', regex=True).str.strip())
+
+
+def _limpiar(serie):
+    """Espacios colapsados y sin bordes; el texto vacío queda como nulo"""
+    serie = serie.str.replace(r'\s+', ' ', regex=True).str.strip()
+    return serie.where(serie != '')
+
+
+def _canonicas(columna):
+    """{clave: opción canónica} con las opciones y sus alias"""
+    canonicas = {clave_texto(opcion): opcion for opcion in columna.opciones or []}
+    canonicas.update({clave_texto(alias): opcion for alias, opcion in (columna.alias or {}).items()})
+    return canonicas
+
+
+def _patron_opciones(columna):
+    """
+    Regex que separa una respuesta múltiple: primero las opciones que contienen
+    comas (con cualquier espaciado alrededor de la coma) y si no, hasta la coma.
+    """
+    con_comas = sorted((o for o in columna.opciones or [] if ',' in o), key=len, reverse=True)
+    alternativas = [r'\s*,\s*'.join(re.escape(parte.strip()) for parte in opcion.split(',')) for opcion in con_comas]
+    if not alternativas:
+        return re.compile(r'[^,]+')
+    return re.compile(r'\s*(?:' + '|'.join(alternativas) + r')|[^,]+', re.IGNORECASE)
+
+
+def renombrar_columnas(encabezados):
+    """
+    {encabezado del CSV: nombre del esquema} para los encabezados reconocidos.
+    Falla si dos encabezados corresponden a la misma columna.
+    """
+    por_clave = {clave_texto(encabezado): columna.nombre
+                 for columna in ESQUEMA for encabezado in [columna.nombre] + columna.encabezados}
+    renombrar = {}
+    for encabezado in encabezados:
+        nombre = por_clave.get(clave_texto(encabezado))
+        if nombre is None:
+            continue
+        if nombre in renombrar.values():
+            raise ValueError(f"Dos columnas del CSV corresponden a '{nombre}' (la segunda es {encabezado!r}).")
+        renombrar[encabezado] = nombre
+    return renombrar
+
+
+def separar_opciones(serie, columna):
+    """
+    Opciones de cada respuesta de una columna múltiple, ya canónicas: una
+    serie con una fila por opción (índice = fila de `serie`, en su orden).
+    Cada texto distinto de opción se limpia una sola vez.
+    """
+    import numpy as np
+    import pandas as pd
+
+    tokens = serie.astype('string').str.findall(_patron_opciones(columna)).explode()
+    codigos, distintos = pd.factorize(tokens)
+    limpios = _limpiar(pd.Series(distintos, dtype='string'))
+    canonicos = _claves(limpios).map(_canonicas(columna)).fillna(limpios)
+    opciones = pd.Series(np.append(canonicos.to_numpy(dtype=object, na_value=None), None)[codigos],
+                         index=tokens.index, dtype=object)
+    return opciones.dropna()
+
+
+def _unir_por_fila(opciones, indice):
+    """Une con SEPARADOR_OPCIONES las opciones de cada fila (nulo si no tiene ninguna)"""
+    unidas = opciones.groupby(level=0, sort=False).agg(SEPARADOR_OPCIONES.join)
+    return unidas.reindex(indice)
+
+
+def _normalizar_valores(valores, columna):
+    """
+    Normaliza los valores distintos de una columna. Devuelve los valores
+    normalizados (nulo donde se descartan) y la máscara de los que tienen algo
+    fuera del vocabulario (o un correo inválido).
+    """
+    if columna.tipo == 'multiple':
+        opciones = separar_opciones(valores, columna)
+        ajenas = ~opciones.isin(columna.opciones) if columna.opciones else opciones.isna()
+        fuera = ajenas.groupby(level=0, sort=False).any().reindex(valores.index, fill_value=False)
+        return _unir_por_fila(opciones, valores.index), fuera
+
+    if columna.tipo == 'correo':
+        # Un correo no tiene espacios: basta con quitar los bordes
+        limpios = valores.str.strip().str.lower()
+        limpios = limpios.where(limpios != '')
+        invalidos = limpios.notna() & ~limpios.str.fullmatch(PATRON_CORREO.pattern).fillna(False).astype(bool)
+        return limpios.where(~invalidos), invalidos
+
+    limpios = _limpiar(valores)
+    if columna.tipo == 'texto' or not columna.opciones:
+        return limpios, valores.isna()
+
+    canonicos = _claves(limpios).map(_canonicas(columna))
+    fuera = limpios.notna() & canonicos.isna()
+    # En una escala no se admiten otros valores; en el resto se conservan tal cual
+    return (canonicos if columna.tipo == 'likert' else canonicos.fillna(limpios)), fuera
+
+
+def normalizar_columna(serie, columna):
+    """
+    Columna normalizada como categórica (categorías en orden alfabético). Se
+    trabaja sobre los valores distintos y se vuelve a las filas con los
+    códigos, así el costo por fila es solo una indexación de numpy.
+    """
+    import numpy as np
+    import pandas as pd
+
+    categorica = serie.astype('category').cat
+    valores = pd.Series(categorica.categories.astype(str), dtype='string')
+    normalizados, fuera = _normalizar_valores(valores, columna)
+    codigos_nuevos, categorias = pd.factorize(normalizados.astype(object), sort=True)
+    codigos = categorica.codes.to_numpy()
+    resultado = pd.Series(pd.Categorical.from_codes(np.append(codigos_nuevos, -1)[codigos],
+                                                    categories=[str(c) for c in categorias]),
+                          index=serie.index, name=serie.name)
+
+    fuera = np.asarray(fuera, dtype=bool)
+    if fuera.any():
+        filas = int(np.bincount(codigos[codigos >= 0], minlength=len(valores))[fuera].sum())
+        evento = 'correos_invalidos' if columna.tipo == 'correo' else 'valores_fuera_de_vocabulario'
+        registrar_evento(LOG, evento, logging.WARNING, columna=columna.nombre, filas=filas,
+                         ejemplos=valores[fuera].head(3).tolist() if columna.tipo != 'correo' else None)
+    return resultado
+
+
+def normalizar_respuestas(df):
+    """
+    Renombra las columnas reconocidas según el esquema y normaliza cada una en
+    una pasada vectorizada; las columnas que no están en el esquema quedan igual.
+    """
+    df = df.rename(columns=renombrar_columnas(df.columns))
+    faltantes = [columna.nombre for columna in ESQUEMA if columna.nombre not in df.columns]
+    if faltantes:
+        registrar_evento(LOG, 'columnas_faltantes', logging.WARNING, columnas=faltantes)
+    desconocidas = [str(col) for col in df.columns if col not in COLUMNAS]
+    if desconocidas:
+        registrar_evento(LOG, 'columnas_desconocidas', logging.WARNING, columnas=desconocidas)
+    return df.assign(**{col: normalizar_columna(df[col], COLUMNAS[col]) for col in df.columns if col in COLUMNAS})
@@ -0,0 +1,110 @@
+# estaticos.py
+#
+# Solo usa la biblioteca estándar: app.py lee el manifiesto al arrancar.
+"""
+Paso de build de los archivos estáticos: copia cada CSS, JS y PNG de static/
+a static/dist/ con la huella de su contenido en el nombre
+(css/dashboard.3f2a9c1b0d.css) y, si comprime, una variante .gz ya
+comprimida. Como el nombre cambia con el contenido, app.py los sirve con
+caché de un año (immutable) en /estaticos/.
+
+El manifiesto (static/dist/manifiesto.json) dice qué archivo versionado
+corresponde a cada original; el análisis lo regenera al terminar.
+
+Uso: python estaticos.py
+"""
+
+import glob
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+
+DIRECTORIO_ESTATICOS = 'static'
+DIRECTORIO_DIST = 'static/dist'
+RUTA_MANIFIESTO_ESTATICOS = 'static/dist/manifiesto.json'
+VERSION_MANIFIESTO = 1
+
+PATRONES_ESTATICOS = ['css/*.css', 'js/*.js', 'images/*.png']
+LONGITUD_HUELLA = 10
+NIVEL_GZIP = 9
+
+
+def _escribir(ruta, contenido):
+    """Escribe el archivo de forma atómica"""
+    directorio = os.path.dirname(ruta) or '.'
+    os.makedirs(directorio, exist_ok=True)
+    fd, temporal = tempfile.mkstemp(dir=directorio, prefix='.tmp_')
+    with os.fdopen(fd, 'wb') as f:
+        f.write(contenido)
+    os.chmod(temporal, 0o644)
+    os.replace(temporal, ruta)
+
+
+def nombre_versionado(nombre, contenido):
+    """'js/dashboard.js' -> 'js/dashboard.<huella>.js'"""
+    base, extension = os.path.splitext(nombre)
+    return f'{base}.{hashlib.sha256(contenido).hexdigest()[:LONGITUD_HUELLA]}{extension}'
+
+
+def construir_estaticos(origen=DIRECTORIO_ESTATICOS, destino=DIRECTORIO_DIST):
+    """
+    Genera los archivos versionados (y sus .gz) que falten, borra los que no
+    están ni en el manifiesto nuevo ni en el anterior y escribe el manifiesto:
+    {'archivos': {original: {'ruta': versionado, 'gzip': bool, 'bytes': n, 'bytes_gzip': n}}}.
+    """
+    ruta_manifiesto = os.path.join(destino, 'manifiesto.json')
+    anteriores = leer_manifiesto(ruta_manifiesto)
+    archivos = {}
+    for patron in PATRONES_ESTATICOS:
+        for ruta in sorted(glob.glob(os.path.join(origen, patron))):
+            nombre = os.path.relpath(ruta, origen).replace(os.sep, '/')
+            with open(ruta, 'rb') as f:
+                contenido = f.read()
+            versionado = nombre_versionado(nombre, contenido)
+            ruta_versionada = os.path.join(destino, versionado)
+            if not os.path.exists(ruta_versionada):
+                _escribir(ruta_versionada, contenido)
+
+            # Los PNG ya vienen comprimidos: el .gz solo se guarda si ahorra algo
+            comprimido = gzip.compress(contenido, compresslevel=NIVEL_GZIP, mtime=0)
+            con_gzip = len(comprimido) < len(contenido)
+            if con_gzip and not os.path.exists(ruta_versionada + '.gz'):
+                _escribir(ruta_versionada + '.gz', comprimido)
+            archivos[nombre] = {'ruta': versionado, 'gzip': con_gzip, 'bytes': len(contenido),
+                                'bytes_gzip': len(comprimido) if con_gzip else len(contenido)}
+
+    # Limpiar versiones viejas. La generación anterior se conserva: los workers
+    # siguen sirviendo páginas que apuntan a ella hasta que recargan el snapshot
+    vigentes = {'manifiesto.json'}
+    for info in list(archivos.values()) + list(anteriores.values()):
+        vigentes.add(info['ruta'])
+        if info['gzip']:
+            vigentes.add(info['ruta'] + '.gz')
+    for ruta in glob.glob(os.path.join(destino, '**', '*'), recursive=True):
+        if os.path.isfile(ruta) and os.path.relpath(ruta, destino).replace(os.sep, '/') not in vigentes:
+            os.remove(ruta)
+
+    manifiesto = {'version': VERSION_MANIFIESTO, 'archivos': archivos}
+    _escribir(ruta_manifiesto,
+              json.dumps(manifiesto, ensure_ascii=False, indent=2, sort_keys=True).encode('utf-8'))
+    return manifiesto
+
+
+def leer_manifiesto(ruta=RUTA_MANIFIESTO_ESTATICOS):
+    """{original: información del archivo versionado} ({} si no se ejecutó el build)"""
+    try:
+        with open(ruta, 'r', encoding='utf-8') as f:
+            manifiesto = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+    return manifiesto.get('archivos', {}) if manifiesto.get('version') == VERSION_MANIFIESTO else {}
+
+
+if __name__ == '__main__':
+    archivos = construir_estaticos()['archivos']
+    antes = sum(info['bytes'] for info in archivos.values())
+    despues = sum(info['bytes_gzip'] for info in archivos.values())
+    print(f"✅ {len(archivos)} archivos versionados en {DIRECTORIO_DIST} "
+          f"({antes:,} bytes, {despues:,} con gzip).")
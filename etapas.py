@@ -0,0 +1,84 @@
+# etapas.py
+
+import time
+
+
+class Etapa:
+    """Una etapa del análisis: una función con nombre y las etapas de las que depende"""
+
+    def __init__(self, nombre, funcion, dependencias=()):
+        self.nombre = nombre
+        self.funcion = funcion
+        self.dependencias = tuple(dependencias)
+
+
+class GrafoEtapas:
+    """
+    Grafo de dependencias entre etapas con resultados memorizados.
+
+    Cada etapa recibe como argumentos con nombre los resultados de sus
+    dependencias y se ejecuta como máximo una vez por corrida, aunque
+    varias etapas la necesiten. El tiempo registrado para cada etapa es
+    el propio, sin incluir el de sus dependencias. Si se indica un
+    `observador`, se le llama con (nombre, segundos) al terminar cada etapa.
+    """
+
+    def __init__(self, observador=None):
+        self.observador = observador
+        self.etapas = {}
+        self.resultados = {}
+        self.tiempos = {}
+        self._en_curso = set()
+
+    def agregar(self, nombre, funcion, dependencias=()):
+        """Registra una etapa; las dependencias pueden declararse antes o después"""
+        if nombre in self.etapas:
+            raise ValueError(f"La etapa '{nombre}' ya está registrada.")
+        self.etapas[nombre] = Etapa(nombre, funcion, dependencias)
+
+    def obtener(self, nombre):
+        """Devuelve el resultado de una etapa, calculándola (y sus dependencias) si hace falta"""
+        if nombre in self.resultados:
+            return self.resultados[nombre]
+        if nombre not in self.etapas:
+            raise KeyError(f"La etapa '{nombre}' no existe.")
+        if nombre in self._en_curso:
+            raise ValueError(f"Dependencia circular detectada en la etapa '{nombre}'.")
+
+        etapa = self.etapas[nombre]
+        self._en_curso.add(nombre)
+        try:
+            argumentos = {dep: self.obtener(dep) for dep in etapa.dependencias}
+            inicio = time.perf_counter()
+            resultado = etapa.funcion(**argumentos)
+            self.tiempos[nombre] = time.perf_counter() - inicio
+        finally:
+            self._en_curso.discard(nombre)
+        if self.observador is not None:
+            self.observador(nombre, self.tiempos[nombre])
+
+        self.resultados[nombre] = resultado
+        return resultado
+
+    def ejecutar(self, nombres=None):
+        """Ejecuta las etapas indicadas (o todas) en orden de dependencias"""
+        for nombre in (nombres if nombres is not None else list(self.etapas)):
+            self.obtener(nombre)
+        return self.resultados
+
+    def reiniciar(self):
+        """Olvida los resultados memorizados para empezar una corrida nueva"""
+        self.resultados.clear()
+        self.tiempos.clear()
+
+    def reporte_tiempos(self):
+        """Texto con el tiempo de cada etapa ejecutada, de la más lenta a la más rápida"""
+        if not self.tiempos:
+            return "   (no se ejecutó ninguna etapa)"
+        ancho = max(len(nombre) for nombre in self.tiempos)
+        lineas = [
+            f"   - {nombre:<{ancho}}  {segundos * 1000:9.1f} ms"
+            for nombre, segundos in sorted(self.tiempos.items(), key=lambda x: x[1], reverse=True)
+        ]
+        lineas.append(f"   {'Total':<{ancho + 2}}  {sum(self.tiempos.values()) * 1000:9.1f} ms")
+        return "\n".join(lineas)
@@ -0,0 +1,73 @@
+# eventos.py
+#
+# Solo usa la biblioteca estándar (threading), así que con gunicorn -k gevent
+# cada cliente en espera es una greenlet y no un hilo.
+"""
+Difusión de eventos a muchos clientes (Server-Sent Events).
+
+Cada versión de los datos tiene un id; el Difusor guarda los últimos cambios
+publicados (de qué versión a qué versión) para que un cliente que se
+reconecta reciba solo lo que se perdió. Si su versión ya no está en el
+historial, le corresponde el estado completo.
+"""
+
+import json
+import threading
+from collections import deque, namedtuple
+
+HISTORIAL_EVENTOS = 32
+
+# Cambios publicados al pasar de la versión `anterior` a `id`
+Evento = namedtuple('Evento', ['anterior', 'id', 'datos'])
+
+
+class Difusor:
+    """Publica eventos y despierta a los clientes que esperan una versión nueva"""
+
+    def __init__(self, version=None, historial=HISTORIAL_EVENTOS):
+        self._condicion = threading.Condition()
+        self._eventos = deque(maxlen=historial)
+        self.version = version
+        self.clientes = 0
+
+    def publicar(self, anterior, version, datos):
+        with self._condicion:
+            self._eventos.append(Evento(anterior, version, datos))
+            self.version = version
+            self._condicion.notify_all()
+
+    def pendientes(self, desde):
+        """
+        Eventos posteriores a la versión `desde`: [] si está al día y None si
+        no se puede reconstruir con el historial (hace falta el estado completo).
+        """
+        if desde == self.version:
+            return []
+        eventos = list(self._eventos)
+        for i, evento in enumerate(eventos):
+            if evento.anterior == desde:
+                return eventos[i:]
+        return None
+
+    def esperar(self, desde, tiempo_maximo):
+        """Como `pendientes`, pero espera hasta `tiempo_maximo` segundos a que haya algo nuevo"""
+        with self._condicion:
+            self._condicion.wait_for(lambda: self.version != desde, tiempo_maximo)
+            return self.pendientes(desde)
+
+    def conectar(self):
+        with self._condicion:
+            self.clientes += 1
+
+    def desconectar(self):
+        with self._condicion:
+            self.clientes -= 1
+
+
+def formatear_evento(nombre, datos, id_evento=None):
+    """Evento en el formato de text/event-stream"""
+    lineas = [f'event: {nombre}']
+    if id_evento is not None:
+        lineas.append(f'id: {id_evento}')
+    lineas.append('data: ' + json.dumps(datos, ensure_ascii=False, separators=(',', ':')))
+    return '\n'.join(lineas) + '\n\n'
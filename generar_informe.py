@@ -3,11 +3,32 @@ Script para generar un informe en formato Markdown o HTML a partir
 de los datos JSON del análisis de la encuesta Cisco NetAcad
 """
 
+import argparse
 import json
 import os
+import re
 import sys
-import pandas as pd
+import unicodedata
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from functools import lru_cache
+from jinja2 import ChainableUndefined, Environment, FileSystemLoader
+from esquema import AREAS
+from sugerencias import IndiceSugerencias
+
+# Igual que datos.RUTA_CSV; se repite para que el informe (y cada proceso del
+# pool) no importe pandas: el modo por lotes solo lo carga al leer el CSV
+RUTA_CSV = 'respuestas_cisco.csv'
+DIRECTORIO_PLANTILLAS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templates')
+RUTA_INFORME = 'static/informe_cisco_netacad.md'
+DIRECTORIO_INFORMES = 'static/informes'
+FORMATOS_INFORME = ('md', 'html')
+
+# Columnas con un informe por valor en el modo por lotes, y cómo se nombra el segmento
+COLUMNAS_SEGMENTO = {'ciclo': 'Ciclo', 'carrera': 'Carrera'}
+
+# Secciones de cursos del informe (claves de "cursos_populares")
+AREAS_CURSOS = {area.clave: area.titulo for area in AREAS.values()}
 
 def cargar_datos():
     """Carga los datos del archivo JSON de resultados"""
@@ -27,177 +48,111 @@ def cargar_datos():
         print(f"❌ Error al cargar los datos: {str(e)}")
         sys.exit(1)
 
+def formatear_intervalo(intervalo):
+    """{'proporcion', 'inferior', 'superior'} -> '45.2% (34.8–55.9)'; '—' si el JSON no trae intervalos"""
+    if not isinstance(intervalo, dict):
+        return '—'
+    return (f"{intervalo['proporcion'] * 100:.1f}% "
+            f"({intervalo['inferior'] * 100:.1f}–{intervalo['superior'] * 100:.1f})")
+
+@lru_cache(maxsize=None)
+def plantilla(formato):
+    """Plantilla compilada del informe ('md' o 'html'); se compila una vez por proceso"""
+    # ChainableUndefined: un JSON anterior sin "intervalos" se muestra con '—' en lugar de fallar
+    entorno = Environment(loader=FileSystemLoader(DIRECTORIO_PLANTILLAS), trim_blocks=True, lstrip_blocks=True,
+                          keep_trailing_newline=True, autoescape=(formato == 'html'), undefined=ChainableUndefined)
+    entorno.filters['intervalo'] = formatear_intervalo
+    return entorno.get_template(f'informe.{formato}.j2')
+
+def sugerencias_relevantes(datos, n=10):
+    """Las n primeras sugerencias con contenido, sin casi duplicados (ver sugerencias.py)"""
+    return IndiceSugerencias.construir(datos['sugerencias']).relevantes()[:n]
+
+def escribir_informe(datos, ruta, formato='md', segmento=None):
+    """Renderiza el informe y lo escribe por partes, a medida que la plantilla lo genera"""
+    contexto = {
+        'datos': datos,
+        'segmento': segmento,
+        'ahora': datetime.now().strftime("%d-%m-%Y %H:%M"),
+        # Un JSON de una versión anterior puede no tener todas las áreas
+        'areas_cursos': {clave: titulo for clave, titulo in AREAS_CURSOS.items() if clave in datos['cursos_populares']},
+        'sugerencias': sugerencias_relevantes(datos)
+    }
+    with open(ruta, 'w', encoding='utf-8') as f:
+        plantilla(formato).stream(contexto).dump(f)
+    return ruta
+
 def generar_informe_markdown(datos):
     """Genera un informe en formato Markdown"""
-    ahora = datetime.now().strftime("%d-%m-%Y %H:%M")
-    
-    md = f"""# Informe de Análisis - Encuesta Cisco NetAcad
-
-*Generado automáticamente el {ahora}*
-
-## Resumen Ejecutivo
-
-Este informe presenta los resultados del análisis de la encuesta sobre intereses en cursos de Cisco NetAcad
-realizada a estudiantes de la carrera de Computación.
-
-- **Total de respuestas**: {datos['meta']['total_respuestas']}
-- **Fecha del análisis**: {datos['meta']['fecha_analisis']}
-
-## Preferencias Generales
-
-### Modalidad Preferida
-
-La modalidad más solicitada es **{datos['resumen']['Modalidad más solicitada']}** con
-{datos['resumen']['Número de estudiantes en modalidad preferida']} estudiantes.
-
-| Modalidad | Cantidad | 
-|-----------|----------|
-"""
-    
-    # Agregar datos de modalidad
-    for modalidad, cantidad in datos['preferencias']['modalidad'].items():
-        md += f"| {modalidad} | {cantidad} |\n"
-    
-    md += """
-### Disposición a Participar
-
-| Disposición | Cantidad |
-|-------------|----------|
-"""
-
-    # Agregar datos de disposición
-    for disposicion, cantidad in datos['preferencias']['disposicion'].items():
-        md += f"| {disposicion} | {cantidad} |\n"
-    
-    md += """
-### Horarios Preferidos
-
-| Horario | Cantidad |
-|---------|----------|
-"""
-
-    # Agregar datos de horarios
-    for horario, cantidad in list(datos['preferencias']['horarios'].items())[:5]:
-        md += f"| {horario} | {cantidad} |\n"
-    
-    md += """
-## Interés por Área Temática
-
-El análisis muestra las siguientes preferencias por área temática:
-
-| Área | Estudiantes Interesados |
-|------|-------------------------|
-"""
-
-    # Agregar datos de interés por área
-    for area, cantidad in datos['interes_por_area'].items():
-        md += f"| {area} | {cantidad} |\n"
-    
-    md += """
-## Cursos Más Populares
-
-### Redes y Ciberseguridad
-
-| Curso | Estudiantes Interesados |
-|-------|-------------------------|
-"""
-
-    # Agregar datos de cursos de redes
-    for curso, cantidad in list(datos['cursos_populares']['redes_ciberseguridad'].items())[:5]:
-        md += f"| {curso} | {cantidad} |\n"
-    
-    md += """
-### IA y Ciencia de Datos
-
-| Curso | Estudiantes Interesados |
-|-------|-------------------------|
-"""
-
-    # Agregar datos de cursos de IA
-    for curso, cantidad in list(datos['cursos_populares']['ia_ciencia_datos'].items())[:5]:
-        md += f"| {curso} | {cantidad} |\n"
-    
-    md += """
-### Programación
-
-| Curso | Estudiantes Interesados |
-|-------|-------------------------|
-"""
-
-    # Agregar datos de cursos de programación
-    for curso, cantidad in list(datos['cursos_populares']['programacion'].items())[:5]:
-        md += f"| {curso} | {cantidad} |\n"
-    
-    md += """
-### Hardware y Sistemas Operativos
-
-| Curso | Estudiantes Interesados |
-|-------|-------------------------|
-"""
-
-    # Agregar datos de cursos de hardware
-    for curso, cantidad in list(datos['cursos_populares']['hardware_so'].items())[:5]:
-        md += f"| {curso} | {cantidad} |\n"
-    
-    md += """
-## Análisis por Ciclo Académico
-
-### Modalidad Preferida por Ciclo
-
-| Ciclo | Modalidad Preferida |
-|-------|---------------------|
-"""
-
-    # Agregar datos de modalidad por ciclo
-    for ciclo, modalidad in datos['analisis_por_ciclo']['modalidad_preferida'].items():
-        md += f"| {ciclo} | {modalidad} |\n"
-    
-    md += """
-## Experiencia Previa en Cisco NetAcad
-
-| Experiencia | Cantidad |
-|-------------|----------|
-"""
-
-    # Agregar datos de experiencia previa
-    for exp, cantidad in datos['experiencia_previa'].items():
-        md += f"| {exp} | {cantidad} |\n"
-    
-    md += """
-## Sugerencias y Comentarios
-
-Algunos de los comentarios y sugerencias más relevantes de los estudiantes:
-
-"""
-
-    # Agregar sugerencias (máximo 10)
-    for i, sugerencia in enumerate(datos['sugerencias'][:10]):
-        if sugerencia and sugerencia.strip() and sugerencia.lower() not in ["ninguna", "ninguno", "no", ""]:
-            md += f"- {sugerencia}\n"
-    
-    md += f"""
-## Conclusiones
-
-Basados en el análisis de los datos, se recomienda:
-
-1. Priorizar la modalidad de cursos más solicitada: **{datos['resumen']['Modalidad más solicitada']}**
-2. Concentrarse en los cursos de mayor interés en cada área temática
-3. Considerar los horarios preferidos por los estudiantes para maximizar la participación
-4. Tomar en cuenta las sugerencias de los estudiantes para mejorar la experiencia de aprendizaje
-
----
-
-*Informe generado automáticamente a partir de los datos de la encuesta el {ahora}*
-"""
-
-    # Guardar el archivo Markdown
-    output_path = 'static/informe_cisco_netacad.md'
-    with open(output_path, 'w', encoding='utf-8') as f:
-        f.write(md)
-    
+    output_path = escribir_informe(datos, RUTA_INFORME, 'md')
     print(f"✅ Informe Markdown generado exitosamente: {output_path}")
     return output_path
 
+# --- INFORMES POR SEGMENTO ---
+
+def nombre_archivo(valor):
+    """Nombre de archivo ASCII para un valor (p. ej. '5.º - 6.º' -> '5-6')"""
+    texto = unicodedata.normalize('NFD', str(valor)).encode('ascii', 'ignore').decode('ascii')
+    return re.sub(r'[^a-z0-9]+', '-', texto.lower()).strip('-') or 'sin-nombre'
+
+def trabajos_por_segmento(ruta_csv=RUTA_CSV, directorio=DIRECTORIO_INFORMES):
+    """
+    Lee el CSV una sola vez y arma un trabajo (datos, ruta base, segmento) para
+    el informe global y para cada ciclo y carrera.
+    """
+    from bloques import agregar_por_segmento
+
+    total, segmentos = agregar_por_segmento(ruta_csv, list(COLUMNAS_SEGMENTO))
+    if total.filas == 0:
+        return []
+
+    def trabajo(agregados, nombre, segmento):
+        resultados = agregados.resultados()
+        # El informe solo usa las 10 primeras sugerencias relevantes: no hace falta enviar el resto al pool
+        resultados['sugerencias'] = sugerencias_relevantes(resultados)
+        return resultados, os.path.join(directorio, nombre), segmento
+
+    trabajos = [trabajo(total, 'global', None)]
+    usados = {'global'}
+    for col in COLUMNAS_SEGMENTO:
+        for (columna, valor), agregados in sorted(segmentos.items(), key=lambda x: str(x[0][1])):
+            if columna != col:
+                continue
+            nombre = base = f'{col}-{nombre_archivo(valor)}'
+            sufijo = 2
+            while nombre in usados:
+                nombre, sufijo = f'{base}-{sufijo}', sufijo + 1
+            usados.add(nombre)
+            trabajos.append(trabajo(agregados, nombre, f'{COLUMNAS_SEGMENTO[col]} {valor}'))
+    return trabajos
+
+def renderizar_segmento(trabajo):
+    """Escribe el informe de un segmento en todos los formatos; devuelve las rutas"""
+    datos, base, segmento = trabajo
+    return [escribir_informe(datos, f'{base}.{formato}', formato, segmento) for formato in FORMATOS_INFORME]
+
+def generar_informes_por_segmento(ruta_csv=RUTA_CSV, directorio=DIRECTORIO_INFORMES, procesos=None):
+    """
+    Informe global y uno por ciclo y por carrera, en Markdown y HTML. Los datos
+    se cargan una vez y el renderizado se reparte en un pool de procesos
+    (`procesos`: por defecto uno por núcleo; 0 o 1 = en serie).
+    """
+    os.makedirs(directorio, exist_ok=True)
+    trabajos = trabajos_por_segmento(ruta_csv, directorio)
+    if not trabajos:
+        print(f"❌ Error: El archivo {ruta_csv} no tiene respuestas.")
+        return []
+
+    procesos = min((os.cpu_count() or 1) if procesos is None else procesos, len(trabajos))
+    if procesos <= 1:
+        rutas = [renderizar_segmento(t) for t in trabajos]
+    else:
+        with ProcessPoolExecutor(max_workers=procesos) as pool:
+            rutas = list(pool.map(renderizar_segmento, trabajos, chunksize=max(1, len(trabajos) // (procesos * 4))))
+
+    print(f"✅ {len(trabajos)} informes generados en {directorio} ({', '.join(FORMATOS_INFORME)})")
+    return [ruta for grupo in rutas for ruta in grupo]
+
 def main():
     """Función principal"""
     print("\n--- GENERANDO INFORME DE RESULTADOS ---\n")
@@ -214,4 +169,18 @@ def main():
     print("\n--- PROCESO COMPLETADO ---\n")
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description='Genera el informe de resultados de la encuesta')
+    parser.add_argument('--lote', action='store_true',
+                        help='además del global, un informe por ciclo y por carrera (Markdown y HTML)')
+    parser.add_argument('--csv', default=RUTA_CSV, help='CSV de la encuesta (modo por lotes)')
+    parser.add_argument('--salida', default=DIRECTORIO_INFORMES, help='directorio de los informes por lotes')
+    parser.add_argument('--procesos', type=int, default=None,
+                        help='procesos para renderizar los informes (por defecto uno por núcleo; 0 = en serie)')
+    args = parser.parse_args()
+
+    if args.lote:
+        print("\n--- GENERANDO INFORMES POR SEGMENTO ---\n")
+        generar_informes_por_segmento(args.csv, args.salida, args.procesos)
+        print("\n--- PROCESO COMPLETADO ---\n")
+    else:
+        main()
@@ -0,0 +1,378 @@
+# graficos.py
+
+import matplotlib
+matplotlib.use('Agg')
+import matplotlib.pyplot as plt
+import seaborn as sns
+import pandas as pd
+import os
+import json
+import io
+import hashlib
+import logging
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from metricas import obtener_log, registrar_evento, cronometro
+from esquema import AREAS
+
+# Colores personalizados (paleta de Cisco)
+CISCO_COLORS = ['#049fd9', '#33ab84', '#8bc34a', '#ffc107', '#ff9800', '#ff5722', '#e91e63', '#9c27b0']
+
+DIRECTORIO_GRAFICOS = 'static/images'
+DPI = 100
+
+LOG = obtener_log('graficos')
+
+# Manifiesto con la clave de contenido de cada gráfico generado.
+# Subir VERSION_GRAFICOS cuando cambie el código de dibujo para invalidar la caché.
+RUTA_MANIFIESTO = 'static/manifiesto_graficos.json'
+VERSION_GRAFICOS = 2
+
+# Gráficos por columna que también se pueden generar a pedido (con filtros) desde app.py
+CATALOGO_GRAFICOS = {
+    # Un gráfico por cada área de cursos del esquema
+    **{columna: {'tipo': 'respuestas_multiples', 'columna': columna,
+                 'titulo': f'Top Cursos de {area.etiqueta}', 'archivo': f'{columna}.png'}
+       for columna, area in AREAS.items()},
+    'horarios': {'tipo': 'respuestas_multiples', 'columna': 'horario',
+                 'titulo': 'Horarios de Preferencia', 'archivo': 'horarios.png'},
+    'modalidad': {'tipo': 'respuesta_unica', 'columna': 'modalidad', 'tipo_grafico': 'bar',
+                  'titulo': 'Modalidad Preferida por los Estudiantes', 'archivo': 'modalidad.png'},
+    'disposicion': {'tipo': 'respuesta_unica', 'columna': 'disposicion', 'tipo_grafico': 'pie',
+                    'titulo': 'Disposición a Participar en Cursos', 'archivo': 'disposicion.png'},
+    'experiencia': {'tipo': 'respuesta_unica', 'columna': 'experiencia_previa', 'tipo_grafico': 'pie',
+                    'titulo': 'Experiencia Previa en Cisco NetAcad', 'archivo': 'experiencia.png'},
+}
+
+# pyplot mantiene estado global: los gráficos en memoria se dibujan de a uno por proceso
+CANDADO_DIBUJO = threading.Lock()
+
+
+def configurar_estilo():
+    """Aplica el estilo común de los gráficos (también en cada proceso de trabajo)"""
+    plt.style.use('ggplot')
+    plt.rcParams['figure.figsize'] = (12, 7)
+    plt.rcParams['font.sans-serif'] = ['Arial', 'sans-serif']
+    sns.set_palette(CISCO_COLORS)
+
+
+configurar_estilo()
+
+
+def guardar_figura(ruta, dpi=DPI):
+    """
+    Guarda la figura actual de forma atómica: se escribe en un archivo temporal
+    del mismo directorio y luego se reemplaza el destino, para que nunca se sirva
+    un PNG a medio escribir.
+    """
+    directorio = os.path.dirname(ruta) or '.'
+    os.makedirs(directorio, exist_ok=True)
+    fd, temporal = tempfile.mkstemp(dir=directorio, prefix='.tmp_', suffix=os.path.splitext(ruta)[1])
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            plt.savefig(f, format=os.path.splitext(ruta)[1][1:] or 'png', dpi=dpi, bbox_inches='tight')
+        # mkstemp crea el archivo con 0600; los gráficos se sirven como estáticos
+        os.chmod(temporal, 0o644)
+        os.replace(temporal, ruta)
+    except BaseException:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+        raise
+    finally:
+        plt.close()
+
+
+# --- FUNCIONES DE DIBUJO ---
+# Cada una recibe un trabajo con datos planos (listas, números y strings),
+# de modo que puede enviarse a otro proceso sin depender del dataframe.
+
+def dibujar_respuestas_multiples(trabajo):
+    """Gráfico de barras horizontal con el top de una columna de selección múltiple"""
+    etiquetas, valores = trabajo['etiquetas'], trabajo['valores']
+
+    plt.figure(figsize=(12, max(7, len(valores)*0.4)))  # Ajustar altura dinámicamente
+    ax = sns.barplot(x=valores, y=etiquetas, palette=trabajo['paleta'], hue=etiquetas, dodge=False, legend=False)
+
+    # Añadir valores numéricos a las barras
+    for i, v in enumerate(valores):
+        ax.text(v + 0.5, i, str(v), va='center')
+
+    ax.set_title(trabajo['titulo'], fontsize=16, fontweight='bold')
+    ax.set_xlabel('Número de Estudiantes', fontsize=12)
+    ax.set_ylabel('Cursos', fontsize=12)
+
+    # Mejorar el formato del gráfico
+    ax.grid(axis='x', alpha=0.3)
+    plt.tight_layout()
+
+
+def dibujar_respuesta_unica(trabajo):
+    """Gráfico de pastel o de barras para una columna de respuesta única"""
+    etiquetas, valores = trabajo['etiquetas'], trabajo['valores']
+    colores = trabajo['paleta'][:len(valores)]
+
+    plt.figure(figsize=(12, 8))
+
+    if trabajo['tipo_grafico'] == 'pie':
+        # Calcular porcentajes para las etiquetas
+        total = sum(valores)
+        labels = [f"{item} ({size/total*100:.1f}%)" for item, size in zip(etiquetas, valores)]
+
+        # Crear gráfico de pastel con destacado de la porción más grande
+        mayor = valores.index(max(valores))
+        explode = [0.1 if i == mayor else 0 for i in range(len(valores))]
+
+        plt.pie(valores, labels=labels, explode=explode, autopct='%1.1f%%',
+                startangle=140, colors=colores,
+                shadow=True, wedgeprops={'edgecolor': 'white', 'linewidth': 1})
+        plt.title(trabajo['titulo'], fontsize=16, fontweight='bold', pad=20)
+        plt.axis('equal')  # Para que el círculo sea un círculo
+
+    else:  # Gráfico de barras
+        # Fix seaborn warning by using hue parameter correctly
+        ax = sns.barplot(x=etiquetas, y=valores, hue=etiquetas, palette=colores, legend=False)
+
+        # Añadir valores sobre las barras
+        for i, v in enumerate(valores):
+            ax.text(i, v + 0.1, str(v), ha='center')
+
+        ax.set_title(trabajo['titulo'], fontsize=16, fontweight='bold')
+        ax.set_ylabel('Número de Estudiantes', fontsize=12)
+        ax.set_xlabel('')
+
+        # Rotar etiquetas si son largas
+        if max([len(str(x)) for x in etiquetas]) > 10:
+            plt.xticks(rotation=30, ha="right")
+
+        ax.grid(axis='y', alpha=0.3)
+
+    plt.tight_layout()
+
+
+def dibujar_interes_por_area(trabajo):
+    """Gráfico de barras con el número de estudiantes interesados por área"""
+    etiquetas, valores = trabajo['etiquetas'], trabajo['valores']
+
+    plt.figure(figsize=(10, 6))
+    ax = sns.barplot(x=etiquetas, y=valores,
+                     hue=etiquetas, palette=trabajo['paleta'][:len(valores)], legend=False)
+
+    # Añadir etiquetas
+    for i, v in enumerate(valores):
+        ax.text(i, v + 1, str(v), ha='center')
+
+    ax.set_title(trabajo['titulo'], fontsize=16, fontweight='bold')
+    ax.set_ylabel('Número de Estudiantes Interesados', fontsize=12)
+    ax.set_xlabel('')
+    # Con todas las áreas del esquema los nombres no caben en horizontal
+    plt.xticks(rotation=30, ha='right')
+    plt.tight_layout()
+
+
+def dibujar_disposicion_por_ciclo(trabajo):
+    """Barras apiladas con el porcentaje de cada disposición por ciclo"""
+    pivot_norm = pd.DataFrame(trabajo['valores'], index=trabajo['filas'], columns=trabajo['columnas'])
+    pivot_norm.index.name = 'ciclo'
+    pivot_norm.columns.name = 'disposicion'
+
+    plt.figure(figsize=(12, 8))
+    ax = pivot_norm.plot(kind='bar', stacked=True, colormap=trabajo['paleta'])
+
+    ax.set_title(trabajo['titulo'], fontsize=16, fontweight='bold')
+    ax.set_ylabel('Porcentaje (%)', fontsize=12)
+    ax.set_xlabel('Ciclo', fontsize=12)
+    ax.legend(title='Disposición')
+
+    plt.tight_layout()
+
+
+def dibujar_cursos_por_ciclo(trabajo):
+    """Barras horizontales con el curso más popular de cada ciclo"""
+    ciclos_graf, cursos_graf, conteos_graf = trabajo['etiquetas'], trabajo['cursos'], trabajo['valores']
+
+    plt.figure(figsize=(14, 8))
+
+    # Usar barras horizontales para nombres de cursos largos
+    plt.barh(ciclos_graf, conteos_graf, color=trabajo['paleta'][:len(ciclos_graf)])
+
+    # Agregar etiquetas con el nombre del curso en cada barra
+    for i, (curso, conteo) in enumerate(zip(cursos_graf, conteos_graf)):
+        # Acortar nombre del curso si es muy largo
+        curso_texto = curso if len(curso) < 30 else curso[:27] + "..."
+        plt.text(
+            conteo + 0.3,  # Posición x (ligeramente a la derecha de la barra)
+            i,             # Posición y (índice de la barra)
+            curso_texto,   # Texto a mostrar
+            va='center',   # Alineación vertical centrada
+            fontsize=9,    # Tamaño de fuente
+            fontweight='bold'
+        )
+
+    plt.title(trabajo['titulo'], fontsize=16, fontweight='bold')
+    plt.xlabel('Número de Estudiantes', fontsize=12)
+    plt.ylabel('Ciclo Académico', fontsize=12)
+    plt.grid(axis='x', alpha=0.3)
+    plt.tight_layout()
+
+
+def dibujar_coseleccion(trabajo):
+    """Mapa de calor del lift entre pares de cursos, anotado con el número de estudiantes"""
+    etiquetas = [e if len(e) < 35 else e[:32] + "..." for e in trabajo['etiquetas']]
+    lift = pd.DataFrame(trabajo['valores'], index=etiquetas, columns=etiquetas)
+    conteos = pd.DataFrame(trabajo['conteos'], index=etiquetas, columns=etiquetas)
+    # La diagonal (cada curso consigo mismo) no es un par
+    diagonal = pd.DataFrame(False, index=etiquetas, columns=etiquetas)
+    for i in range(len(etiquetas)):
+        diagonal.iat[i, i] = True
+
+    plt.figure(figsize=(max(10, len(etiquetas) * 0.7), max(8, len(etiquetas) * 0.6)))
+    ax = sns.heatmap(lift, mask=diagonal, annot=conteos, fmt='d', cmap='RdBu_r', center=1,
+                     annot_kws={'fontsize': 7}, linewidths=0.5, cbar_kws={'label': 'Lift'})
+
+    ax.set_title(trabajo['titulo'], fontsize=16, fontweight='bold')
+    ax.set_xlabel('')
+    ax.set_ylabel('')
+    plt.xticks(rotation=45, ha='right', fontsize=8)
+    plt.yticks(fontsize=8)
+    plt.tight_layout()
+
+
+DIBUJANTES = {
+    'respuestas_multiples': dibujar_respuestas_multiples,
+    'respuesta_unica': dibujar_respuesta_unica,
+    'interes_por_area': dibujar_interes_por_area,
+    'disposicion_por_ciclo': dibujar_disposicion_por_ciclo,
+    'cursos_por_ciclo': dibujar_cursos_por_ciclo,
+    'coseleccion': dibujar_coseleccion,
+}
+
+
+def renderizar(trabajo):
+    """Dibuja y guarda un trabajo de gráfico; devuelve la ruta generada"""
+    with cronometro(LOG, 'grafico_generado', ruta=trabajo['ruta']):
+        DIBUJANTES[trabajo['tipo']](trabajo)
+        guardar_figura(trabajo['ruta'], trabajo.get('dpi', DPI))
+    return trabajo['ruta']
+
+
+def trabajo_desde_conteos(nombre, conteos, max_items=10):
+    """
+    Trabajo de un gráfico del catálogo a partir de conteos ya ordenados
+    {valor: cantidad}; las columnas múltiples se recortan al top `max_items`.
+    """
+    definicion = CATALOGO_GRAFICOS[nombre]
+    items = list(conteos.items())
+    if definicion['tipo'] == 'respuestas_multiples':
+        items = items[:max_items]
+    trabajo = {
+        'tipo': definicion['tipo'],
+        'ruta': f"{DIRECTORIO_GRAFICOS}/{definicion['archivo']}",
+        'titulo': definicion['titulo'],
+        'etiquetas': [str(k) for k, _ in items],
+        'valores': [int(v) for _, v in items],
+        'paleta': 'viridis' if definicion['tipo'] == 'respuestas_multiples' else CISCO_COLORS,
+        'dpi': DPI
+    }
+    if 'tipo_grafico' in definicion:
+        trabajo['tipo_grafico'] = definicion['tipo_grafico']
+    return trabajo
+
+
+def renderizar_en_memoria(trabajo, formato='png'):
+    """Dibuja un trabajo y devuelve el archivo (PNG o SVG) como bytes, sin tocar el disco"""
+    with CANDADO_DIBUJO:
+        try:
+            DIBUJANTES[trabajo['tipo']](trabajo)
+            buffer = io.BytesIO()
+            plt.savefig(buffer, format=formato, dpi=trabajo.get('dpi', DPI), bbox_inches='tight')
+        finally:
+            plt.close()
+    return buffer.getvalue()
+
+
+def clave_trabajo(trabajo):
+    """
+    Hash del contenido de un trabajo: datos agregados, título, paleta, dpi y
+    tipo de gráfico (la ruta de salida no forma parte de la clave).
+    """
+    contenido = {k: v for k, v in trabajo.items() if k != 'ruta'}
+    contenido['_version'] = [VERSION_GRAFICOS, matplotlib.__version__, sns.__version__]
+    serializado = json.dumps(contenido, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(serializado.encode('utf-8')).hexdigest()
+
+
+class CacheGraficos:
+    """
+    Caché direccionada por contenido de los PNG generados.
+
+    Un gráfico se considera vigente si el manifiesto guarda para su ruta la
+    misma clave que el trabajo actual y el archivo sigue existiendo.
+    """
+
+    def __init__(self, ruta_manifiesto=RUTA_MANIFIESTO):
+        self.ruta_manifiesto = ruta_manifiesto
+        self.entradas = {}
+        self.modificado = False
+        try:
+            with open(ruta_manifiesto, 'r', encoding='utf-8') as f:
+                self.entradas = json.load(f).get('graficos', {})
+        except (FileNotFoundError, ValueError):
+            self.entradas = {}
+
+    def vigente(self, trabajo):
+        """Indica si el PNG del trabajo ya está generado con los mismos datos"""
+        return self.entradas.get(trabajo['ruta']) == clave_trabajo(trabajo) and os.path.exists(trabajo['ruta'])
+
+    def registrar(self, trabajo):
+        """Anota la clave de un trabajo ya renderizado"""
+        self.entradas[trabajo['ruta']] = clave_trabajo(trabajo)
+        self.modificado = True
+
+    def guardar(self):
+        """Escribe el manifiesto de forma atómica si hubo cambios"""
+        if not self.modificado:
+            return
+        directorio = os.path.dirname(self.ruta_manifiesto) or '.'
+        os.makedirs(directorio, exist_ok=True)
+        fd, temporal = tempfile.mkstemp(dir=directorio, prefix='.tmp_', suffix='.json')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump({'version': VERSION_GRAFICOS, 'graficos': self.entradas}, f, ensure_ascii=False, indent=4, sort_keys=True)
+        os.chmod(temporal, 0o644)
+        os.replace(temporal, self.ruta_manifiesto)
+        self.modificado = False
+
+
+def _inicializar_proceso():
+    """Prepara cada proceso del pool con el backend Agg y el estilo común"""
+    matplotlib.use('Agg')
+    configurar_estilo()
+
+
+def renderizar_en_paralelo(trabajos, procesos=None):
+    """Reparte los trabajos de gráficos en un pool de procesos; devuelve las rutas generadas"""
+    if not trabajos:
+        return []
+    procesos = min(procesos or os.cpu_count() or 1, len(trabajos))
+    if procesos <= 1:
+        return [renderizar(trabajo) for trabajo in trabajos]
+    with ProcessPoolExecutor(max_workers=procesos, initializer=_inicializar_proceso) as pool:
+        return list(pool.map(renderizar, trabajos))
+
+
+def procesos_desde_entorno(valor=None):
+    """
+    Interpreta la opción de renderizado paralelo (variable ANALISIS_PARALELO):
+    vacío o '0' = en serie, 'auto' = un proceso por núcleo, N = N procesos.
+    """
+    valor = os.environ.get('ANALISIS_PARALELO', '') if valor is None else str(valor)
+    valor = valor.strip().lower()
+    if valor in ('', '0', 'no', 'false'):
+        return 0
+    if valor == 'auto':
+        return os.cpu_count() or 1
+    try:
+        return max(int(valor), 0)
+    except ValueError:
+        registrar_evento(LOG, 'analisis_paralelo_no_valido', logging.WARNING, valor=valor)
+        return 0
@@ -0,0 +1,317 @@
+# indices.py
+
+import sys
+import numpy as np
+import pandas as pd
+
+
+def tipo_entero(maximo):
+    """Entero con signo más pequeño que puede guardar valores hasta `maximo`"""
+    for tipo in (np.int8, np.int16, np.int32):
+        if maximo <= np.iinfo(tipo).max:
+            return tipo
+    return np.int64
+
+
+class IndiceMultiple:
+    """
+    Índice de una columna de selección múltiple (valores separados por comas).
+
+    Guarda una matriz dispersa respondiente × opción en formato CSR
+    (`indptr`, `indices`) junto con el vocabulario de opciones. Las opciones
+    se numeran por orden de primera aparición y `orden` conserva la posición
+    de cada selección en el texto original, de modo que los empates en los
+    conteos se resuelven igual que con `Counter.most_common`.
+
+    Los arreglos usan el entero más pequeño que alcanza (ver `tipo_entero`) y
+    `orden` solo se guarda si difiere del orden de las entradas.
+    """
+
+    def __init__(self, vocabulario, indptr, indices, orden=None):
+        self.vocabulario = list(vocabulario)
+        self.indptr = indptr
+        self.indices = indices
+        self._orden = orden
+        self.n_filas = len(indptr) - 1
+
+    @property
+    def orden(self):
+        """Posición de cada selección en el recorrido original de las respuestas"""
+        if self._orden is None:
+            return np.arange(len(self.indices), dtype=np.int64)
+        return self._orden
+
+    def nbytes(self):
+        """Bytes ocupados por los arreglos y el vocabulario"""
+        arreglos = self.indptr.nbytes + self.indices.nbytes + (0 if self._orden is None else self._orden.nbytes)
+        return arreglos + sum(sys.getsizeof(v) for v in self.vocabulario)
+
+    @classmethod
+    def desde_serie(cls, serie, separador=','):
+        """
+        Construye el índice tokenizando la serie una sola vez (vectorizado). Si
+        la serie es categórica se tokenizan solo sus categorías y las filas se
+        expanden con los códigos.
+        """
+        n_filas = len(serie)
+        if isinstance(serie.dtype, pd.CategoricalDtype):
+            filas, codigos, vocabulario = _tokens_categorica(serie, separador)
+        else:
+            tokens = serie.astype('string').str.split(separador, regex=False).explode().str.strip()
+            tokens = tokens[tokens.notna() & (tokens != '')]
+
+            # Posición de cada token dentro del dataframe original
+            filas = np.asarray(serie.index.get_indexer(tokens.index), dtype=np.int64)
+            codigos, vocabulario = pd.factorize(tokens, sort=False)
+            codigos = np.asarray(codigos, dtype=np.int64)
+
+        # Matriz booleana: una opción repetida en la misma respuesta cuenta una vez
+        primeros = _primeras_ocurrencias(filas * len(vocabulario) + codigos)
+        filas, codigos = filas[primeros], codigos[primeros]
+        indptr = np.zeros(n_filas + 1, dtype=tipo_entero(len(codigos)))
+        np.cumsum(np.bincount(filas, minlength=n_filas), out=indptr[1:])
+
+        return cls([str(v) for v in vocabulario], indptr, codigos.astype(tipo_entero(len(vocabulario))))
+
+    @classmethod
+    def combinar(cls, indices_columnas):
+        """Une varios índices de las mismas filas en uno solo con vocabulario común"""
+        vocabulario = []
+        posicion = {}
+        filas, codigos, orden = [], [], []
+        n_filas = indices_columnas[0].n_filas
+        desplazamiento = 0
+
+        # Las selecciones se ordenan columna por columna, como al recorrerlas en serie
+        for indice in indices_columnas:
+            remapeo = np.empty(len(indice.vocabulario), dtype=np.int64)
+            for i, opcion in enumerate(indice.vocabulario):
+                if opcion not in posicion:
+                    posicion[opcion] = len(vocabulario)
+                    vocabulario.append(opcion)
+                remapeo[i] = posicion[opcion]
+            secuencia = np.argsort(indice.orden, kind='stable')
+            filas.append(indice.filas()[secuencia])
+            codigos.append(remapeo[indice.indices[secuencia]])
+            orden.append(desplazamiento + np.arange(len(secuencia), dtype=np.int64))
+            desplazamiento += len(secuencia)
+
+        filas = np.concatenate(filas)
+        codigos = np.concatenate(codigos)
+        orden = np.concatenate(orden)
+        primeros = _primeras_ocurrencias(filas * len(vocabulario) + codigos)
+        filas, codigos, orden = filas[primeros], codigos[primeros], orden[primeros]
+
+        # Reordenar por fila para el formato CSR
+        por_fila = np.argsort(filas, kind='stable')
+        codigos, orden = codigos[por_fila], orden[por_fila]
+        indptr = np.zeros(n_filas + 1, dtype=tipo_entero(len(codigos)))
+        np.cumsum(np.bincount(filas, minlength=n_filas), out=indptr[1:])
+
+        return cls(vocabulario, indptr, codigos.astype(tipo_entero(len(vocabulario))), orden)
+
+    def filas(self):
+        """Número de fila de cada entrada no nula de la matriz"""
+        return np.repeat(np.arange(self.n_filas, dtype=np.int64), np.diff(self.indptr))
+
+    def conteos(self, mascara=None):
+        """Número de respondientes que seleccionaron cada opción"""
+        if mascara is None:
+            return np.bincount(self.indices, minlength=len(self.vocabulario))
+        seleccion = np.asarray(mascara, dtype=bool)[self.filas()]
+        return np.bincount(self.indices[seleccion], minlength=len(self.vocabulario))
+
+    def conteos_por_grupo(self, codigos_grupo, n_grupos):
+        """
+        Matriz grupo × opción con los conteos de cada opción por grupo.
+        Las filas con código de grupo negativo (nulos) se ignoran.
+        """
+        grupos = np.asarray(codigos_grupo, dtype=np.int64)[self.filas()]
+        validos = grupos >= 0
+        planos = grupos[validos] * len(self.vocabulario) + self.indices[validos]
+        conteos = np.bincount(planos, minlength=n_grupos * len(self.vocabulario))
+        return conteos.reshape(n_grupos, len(self.vocabulario))
+
+    def top_por_grupo(self, codigos_grupo, n_grupos):
+        """
+        Opción más frecuente de cada grupo y su conteo. Los empates se resuelven
+        por la primera aparición dentro del grupo; -1 si el grupo no tiene datos.
+        """
+        n_opciones = len(self.vocabulario)
+        if n_opciones == 0:
+            return np.full(n_grupos, -1, dtype=np.int64), np.zeros(n_grupos, dtype=np.int64)
+
+        conteos = self.conteos_por_grupo(codigos_grupo, n_grupos)
+        grupos = np.asarray(codigos_grupo, dtype=np.int64)[self.filas()]
+        validos = grupos >= 0
+        planos = grupos[validos] * n_opciones + self.indices[validos]
+
+        sin_ver = np.iinfo(np.int64).max
+        primera = np.full(n_grupos * n_opciones, sin_ver, dtype=np.int64)
+        np.minimum.at(primera, planos, self.orden[validos])
+        primera = primera.reshape(n_grupos, n_opciones)
+
+        maximos = conteos.max(axis=1)
+        clave = np.where(conteos == maximos[:, None], primera, sin_ver)
+        mejor = clave.argmin(axis=1)
+        mejor[maximos == 0] = -1
+        return mejor, maximos
+
+    def top(self, n=None, mascara=None):
+        """Las n opciones más frecuentes como pd.Series ordenada (empates por orden de aparición)"""
+        conteos = self.conteos(mascara)
+        orden = np.argsort(-conteos, kind='stable')
+        orden = orden[conteos[orden] > 0][:n]
+        return pd.Series(conteos[orden], index=[self.vocabulario[i] for i in orden], dtype='int64')
+
+    def respondientes(self):
+        """Máscara de filas con al menos una opción seleccionada"""
+        return np.diff(self.indptr) > 0
+
+    def coocurrencias(self, filas_por_bloque=65536):
+        """
+        Matriz opción × opción con el número de filas que seleccionaron ambas
+        (la diagonal son los conteos de cada opción): el producto Xᵀ·X de la
+        matriz de incidencia. Se calcula por bloques de filas, cada uno como
+        un producto denso en float32 (exacto hasta 2^24 por bloque), así la
+        memoria no depende del número de respondientes.
+        """
+        n_opciones = len(self.vocabulario)
+        resultado = np.zeros((n_opciones, n_opciones), dtype=np.int64)
+        for inicio in range(0, self.n_filas, filas_por_bloque):
+            fin = min(inicio + filas_por_bloque, self.n_filas)
+            desde, hasta = int(self.indptr[inicio]), int(self.indptr[fin])
+            if desde == hasta:
+                continue
+            bloque = np.zeros((fin - inicio, n_opciones), dtype=np.float32)
+            filas = np.repeat(np.arange(fin - inicio), np.diff(self.indptr[inicio:fin + 1]))
+            bloque[filas, self.indices[desde:hasta]] = 1
+            resultado += (bloque.T @ bloque).astype(np.int64)
+        return resultado
+
+
+def _primeras_ocurrencias(claves):
+    """Posiciones (en orden) de la primera aparición de cada clave"""
+    if len(claves) == 0:
+        return np.empty(0, dtype=np.int64)
+    _, primeros = np.unique(claves, return_index=True)
+    primeros.sort()
+    return primeros
+
+
+def _tokens_categorica(serie, separador):
+    """
+    (filas, códigos, vocabulario) de los tokens de una serie categórica, en el
+    mismo orden que si se tokenizara fila por fila: el vocabulario queda en
+    orden de primera aparición en las filas.
+    """
+    tokens = pd.Series(serie.cat.categories.astype(str)).str.split(separador, regex=False).explode().str.strip()
+    tokens = tokens[tokens.notna() & (tokens != '')]
+    codigos_token, vocabulario_categorias = pd.factorize(tokens, sort=False)
+    # Tokens de cada categoría en formato CSR
+    por_categoria = np.zeros(len(serie.cat.categories) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(tokens.index.to_numpy(), minlength=len(serie.cat.categories)), out=por_categoria[1:])
+
+    codigos_fila = serie.cat.codes.to_numpy().astype(np.int64)
+    respondidas = np.flatnonzero(codigos_fila >= 0)
+    inicios = por_categoria[codigos_fila[respondidas]]
+    longitudes = por_categoria[codigos_fila[respondidas] + 1] - inicios
+    filas = np.repeat(respondidas, longitudes)
+    # Posición de cada token de la fila dentro de los tokens de su categoría
+    desplazamiento = np.arange(len(filas)) - np.repeat(np.cumsum(longitudes) - longitudes, longitudes)
+    codigos, primeros = pd.factorize(np.asarray(codigos_token, dtype=np.int64)[np.repeat(inicios, longitudes)
+                                                                                + desplazamiento], sort=False)
+    return filas, np.asarray(codigos, dtype=np.int64), vocabulario_categorias[primeros]
+
+
+def construir_indices(dataframe, columnas, separador=','):
+    """Construye un IndiceMultiple por cada columna existente en el dataframe"""
+    return {col: IndiceMultiple.desde_serie(dataframe[col], separador) for col in columnas if col in dataframe.columns}
+
+
+def _contar_bits(palabras):
+    """Número de bits en 1 de cada palabra uint64"""
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(palabras)
+    # NumPy < 2.0: tabla de 256 entradas sobre la vista en bytes
+    tabla = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+    return tabla[palabras.view(np.uint8)].reshape(palabras.shape + (8,)).sum(axis=-1)
+
+
+def _empaquetar(matriz_bool):
+    """Empaqueta una matriz booleana opción × fila en palabras uint64 (un bit por fila)"""
+    bytes_ = np.packbits(matriz_bool, axis=1, bitorder='little')
+    relleno = (-bytes_.shape[1]) % 8
+    if relleno:
+        bytes_ = np.pad(bytes_, ((0, 0), (0, relleno)))
+    return np.ascontiguousarray(bytes_).view(np.uint64)
+
+
+class IndiceBitmap:
+    """
+    Bitmaps empaquetados por valor para filtrar y contar sin tocar el DataFrame.
+
+    Para cada columna se guarda una matriz valor × palabra (uint64) donde el bit i
+    indica si el respondiente i tiene ese valor. Los filtros se combinan con OR
+    dentro de una columna y AND entre columnas, y los conteos de la columna
+    objetivo salen de un AND más un popcount por valor.
+    """
+
+    def __init__(self, n_filas):
+        self.n_filas = n_filas
+        self.n_palabras = (n_filas + 63) // 64
+        self.vocabularios = {}
+        self.posiciones = {}
+        self.bitmaps = {}
+
+    def agregar_unica(self, columna, serie):
+        """Agrega una columna de respuesta única"""
+        codigos, vocabulario = pd.factorize(serie, sort=False)
+        matriz = codigos[None, :] == np.arange(len(vocabulario))[:, None]
+        self._agregar(columna, [str(v) for v in vocabulario], matriz)
+
+    def agregar_multiple(self, columna, indice):
+        """Agrega una columna de selección múltiple a partir de su IndiceMultiple"""
+        matriz = np.zeros((len(indice.vocabulario), self.n_filas), dtype=bool)
+        matriz[indice.indices, indice.filas()] = True
+        self._agregar(columna, indice.vocabulario, matriz)
+
+    def _agregar(self, columna, vocabulario, matriz):
+        self.vocabularios[columna] = vocabulario
+        self.posiciones[columna] = {valor: i for i, valor in enumerate(vocabulario)}
+        self.bitmaps[columna] = _empaquetar(matriz)
+
+    def mascara(self, filtros):
+        """
+        Bitmap de las filas que cumplen los filtros {columna: [valores]}.
+        Un valor que no existe no coincide con ninguna fila.
+        """
+        resultado = np.full(self.n_palabras, np.iinfo(np.uint64).max, dtype=np.uint64)
+        sobrante = self.n_palabras * 64 - self.n_filas
+        if sobrante:
+            resultado[-1] >>= np.uint64(sobrante)
+        for columna, valores in filtros.items():
+            posiciones = [self.posiciones[columna][v] for v in valores if v in self.posiciones[columna]]
+            if not posiciones:
+                return np.zeros(self.n_palabras, dtype=np.uint64)
+            resultado &= np.bitwise_or.reduce(self.bitmaps[columna][posiciones], axis=0)
+        return resultado
+
+    def contar(self, columna, mascara=None):
+        """Conteo de cada valor de la columna entre las filas de la máscara"""
+        bitmaps = self.bitmaps[columna]
+        if mascara is not None:
+            bitmaps = bitmaps & mascara
+        return _contar_bits(bitmaps).sum(axis=1, dtype=np.int64)
+
+    def total(self, mascara):
+        """Número de filas seleccionadas por la máscara"""
+        return int(_contar_bits(mascara).sum())
+
+    def agregar_consulta(self, columna, filtros):
+        """Conteos de la columna objetivo (ordenados de mayor a menor) para los filtros dados"""
+        mascara = self.mascara(filtros)
+        conteos = self.contar(columna, mascara)
+        orden = np.argsort(-conteos, kind='stable')
+        vocabulario = self.vocabularios[columna]
+        return self.total(mascara), {vocabulario[i]: int(conteos[i]) for i in orden if conteos[i] > 0}
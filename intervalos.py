@@ -0,0 +1,126 @@
+# intervalos.py
+"""
+Intervalos de confianza (95 %) para cada proporción de resultados_analisis.json:
+modalidad, disposición, horarios, experiencia previa, interés por área, cursos
+populares y, por ciclo, disposición y curso más popular.
+
+Bootstrap: remuestrear respondientes con reemplazo sobre la matriz de
+incidencia respondiente × opción deja el conteo de cada opción como una
+Binomial(n, p̂), así que las remuestras se sacan directamente de esa
+distribución: todas las proporciones del archivo, miles de remuestras, en una
+sola llamada (matriz remuestra × proporción). El costo no depende del número
+de respondientes y, como solo usa conteos, el modo por bloques obtiene
+exactamente los mismos intervalos.
+
+Wilson es el camino rápido (ANALISIS_INTERVALOS=wilson) y se usa también
+cuando p̂ es 0 o 1, donde el bootstrap no tiene variación y daría un intervalo
+de ancho cero.
+"""
+
+import os
+from statistics import NormalDist
+import numpy as np
+
+NIVEL_CONFIANZA = 0.95
+REMUESTRAS = 2000
+# Semilla fija: el JSON no cambia entre corridas con los mismos datos
+SEMILLA = 2024
+METODOS = ('bootstrap', 'wilson')
+DECIMALES = 4
+
+
+def metodo_desde_entorno(valor=None):
+    """Método de ANALISIS_INTERVALOS (o de `valor`); por defecto 'bootstrap'"""
+    metodo = (valor if valor is not None else os.environ.get('ANALISIS_INTERVALOS', '')).strip().lower()
+    return metodo if metodo in METODOS else 'bootstrap'
+
+
+def wilson(exitos, n, nivel=NIVEL_CONFIANZA):
+    """Intervalo de Wilson de cada proporción exitos / n: (inferiores, superiores)"""
+    exitos = np.asarray(exitos, dtype=np.float64)
+    n = np.maximum(np.asarray(n, dtype=np.float64), 1)
+    z = NormalDist().inv_cdf(0.5 + nivel / 2)
+    p = exitos / n
+    centro = (p + z ** 2 / (2 * n)) / (1 + z ** 2 / n)
+    margen = z / (1 + z ** 2 / n) * np.sqrt(p * (1 - p) / n + z ** 2 / (4 * n ** 2))
+    return np.clip(centro - margen, 0, 1), np.clip(centro + margen, 0, 1)
+
+
+def bootstrap(exitos, n, nivel=NIVEL_CONFIANZA, remuestras=REMUESTRAS, semilla=SEMILLA):
+    """Intervalo percentil del bootstrap de cada proporción exitos / n: (inferiores, superiores)"""
+    exitos = np.asarray(exitos, dtype=np.int64)
+    n = np.maximum(np.asarray(n, dtype=np.int64), 1)
+    rng = np.random.default_rng(semilla)
+    # remuestras × proporciones: cada columna es el conteo de una opción en cada remuestra
+    conteos = rng.binomial(n, exitos / n, size=(remuestras, len(n)))
+    alfa = 1 - nivel
+    inferiores, superiores = np.quantile(conteos, [alfa / 2, 1 - alfa / 2], axis=0) / n
+    return inferiores, superiores
+
+
+def calcular_intervalos(exitos, n, metodo='bootstrap', nivel=NIVEL_CONFIANZA, remuestras=REMUESTRAS):
+    """Proporciones e intervalos de todos los pares (exitos, n) a la vez: (proporciones, inferiores, superiores)"""
+    n = np.asarray(n, dtype=np.int64)
+    # Un denominador que falta (0) no puede dejar una proporción mayor que 1
+    exitos = np.minimum(np.asarray(exitos, dtype=np.int64), n)
+    proporciones = exitos / np.maximum(n, 1)
+    inferiores, superiores = wilson(exitos, n, nivel)
+    if metodo == 'bootstrap' and len(n):
+        remuestreados = bootstrap(exitos, n, nivel, remuestras)
+        variables = (exitos > 0) & (exitos < n)
+        inferiores = np.where(variables, remuestreados[0], inferiores)
+        superiores = np.where(variables, remuestreados[1], superiores)
+    return proporciones, inferiores, superiores
+
+
+def intervalos_resultados(resultados, respuestas_por_ciclo, metodo=None):
+    """
+    Sección "intervalos" del JSON, con la misma forma que los conteos:
+    {..., 'preferencias': {'modalidad': {opción: {'proporcion', 'inferior', 'superior'}}}, ...}.
+    Las respuestas únicas se miden sobre quienes respondieron la pregunta, las
+    múltiples sobre el total de respuestas y las de cada ciclo sobre su ciclo
+    (`respuestas_por_ciclo`: {ciclo: respuestas}).
+    """
+    metodo = metodo_desde_entorno(metodo)
+    total = resultados['meta']['total_respuestas']
+    por_ciclo = resultados['analisis_por_ciclo']
+
+    # (ruta dentro de la sección, {clave: conteo}, {clave: denominador})
+    tablas = []
+
+    def agregar(ruta, conteos, denominador):
+        tablas.append((ruta, conteos, denominador if isinstance(denominador, dict)
+                       else dict.fromkeys(conteos, denominador)))
+
+    for nombre in ('modalidad', 'disposicion'):
+        conteos = resultados['preferencias'][nombre]
+        agregar(('preferencias', nombre), conteos, sum(conteos.values()))
+    agregar(('preferencias', 'horarios'), resultados['preferencias']['horarios'], total)
+    agregar(('interes_por_area',), resultados['interes_por_area'], total)
+    for clave, cursos in resultados['cursos_populares'].items():
+        agregar(('cursos_populares', clave), cursos, total)
+    for ciclo, conteos in por_ciclo['disposicion'].items():
+        agregar(('analisis_por_ciclo', 'disposicion', ciclo), conteos, sum(conteos.values()))
+    agregar(('analisis_por_ciclo', 'curso_mas_popular'),
+            {ciclo: v['conteo'] for ciclo, v in por_ciclo['curso_mas_popular'].items()},
+            {ciclo: respuestas_por_ciclo.get(ciclo, 0) for ciclo in por_ciclo['curso_mas_popular']})
+    agregar(('experiencia_previa',), resultados['experiencia_previa'],
+            sum(resultados['experiencia_previa'].values()))
+
+    exitos = [conteo for _, conteos, _ in tablas for conteo in conteos.values()]
+    n = [denominador[clave] for _, conteos, denominador in tablas for clave in conteos]
+    proporciones, inferiores, superiores = (np.round(v, DECIMALES).tolist()
+                                            for v in calcular_intervalos(exitos, n, metodo))
+
+    seccion = {'metodo': metodo, 'nivel': NIVEL_CONFIANZA,
+               'remuestras': REMUESTRAS if metodo == 'bootstrap' else 0}
+    posicion = 0
+    for ruta, conteos, _ in tablas:
+        destino = seccion
+        for parte in ruta:
+            destino = destino.setdefault(parte, {})
+        for clave in conteos:
+            destino[clave] = {'proporcion': proporciones[posicion], 'inferior': inferiores[posicion],
+                              'superior': superiores[posicion]}
+            posicion += 1
+    return seccion
@@ -0,0 +1,257 @@
+# metricas.py
+#
+# Solo usa la biblioteca estándar (se importa desde app.py al arrancar).
+#
+# - Registro estructurado: una línea JSON por evento en stderr (nivel con LOG_NIVEL).
+# - Métricas en formato de texto de Prometheus para /metrics. Cada worker de
+#   gunicorn tiene sus propios contadores.
+# - Perfilado opcional con PERFILAR=cprofile, PERFILAR=tracemalloc o ambos
+#   separados por comas; los resultados se guardan en PERFILAR_DIRECTORIO.
+
+import bisect
+import contextlib
+import cProfile
+import datetime
+import itertools
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+import tracemalloc
+
+DIRECTORIO_PERFILES = os.environ.get('PERFILAR_DIRECTORIO', 'perfiles')
+
+# Límites (en segundos) de los histogramas de latencia
+LIMITES_LATENCIA = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+# --- REGISTRO ESTRUCTURADO ---
+
+class FormatoJSON(logging.Formatter):
+    """Formatea cada registro como un objeto JSON con el evento y sus campos"""
+
+    def format(self, record):
+        datos = {
+            'ts': datetime.datetime.fromtimestamp(record.created).isoformat(timespec='milliseconds'),
+            'nivel': record.levelname.lower(),
+            'origen': record.name,
+            'evento': record.getMessage()
+        }
+        datos.update(getattr(record, 'campos', {}))
+        if record.exc_info:
+            datos['error'] = self.formatException(record.exc_info)
+        return json.dumps(datos, ensure_ascii=False, default=str)
+
+
+def obtener_log(nombre):
+    """Logger 'encuesta.<nombre>'; la primera llamada configura la salida JSON"""
+    raiz = logging.getLogger('encuesta')
+    if not raiz.handlers:
+        manejador = logging.StreamHandler(sys.stderr)
+        manejador.setFormatter(FormatoJSON())
+        raiz.addHandler(manejador)
+        raiz.setLevel(os.environ.get('LOG_NIVEL', 'INFO').upper())
+        raiz.propagate = False
+    return raiz.getChild(nombre)
+
+
+def registrar_evento(log, evento, nivel=logging.INFO, **campos):
+    """Registra un evento con campos estructurados"""
+    log.log(nivel, evento, extra={'campos': campos})
+
+
+@contextlib.contextmanager
+def cronometro(log, evento, **campos):
+    """Registra la duración del bloque (campo 'ms') al terminar"""
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        registrar_evento(log, evento, ms=round((time.perf_counter() - inicio) * 1000, 2), **campos)
+
+
+# --- MÉTRICAS (formato de texto de Prometheus) ---
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _etiquetas(nombres, valores, extra=()):
+    pares = list(zip(nombres, valores)) + list(extra)
+    if not pares:
+        return ''
+    return '{' + ','.join(f'{n}="{_escapar(v)}"' for n, v in pares) + '}'
+
+
+def _numero(valor):
+    if valor == float('inf'):
+        return '+Inf'
+    return repr(float(valor)) if isinstance(valor, float) else str(valor)
+
+
+class _Metrica:
+    tipo = None
+
+    def __init__(self, nombre, ayuda, etiquetas=()):
+        if not re.fullmatch(r'[a-zA-Z_:][a-zA-Z0-9_:]*', nombre):
+            raise ValueError(f"Nombre de métrica no válido: '{nombre}'.")
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self._valores = {}
+        self._candado = threading.Lock()
+
+    def _clave(self, etiquetas):
+        if set(etiquetas) != set(self.etiquetas):
+            raise ValueError(f"La métrica '{self.nombre}' usa las etiquetas {self.etiquetas}.")
+        return tuple(str(etiquetas[n]) for n in self.etiquetas)
+
+    def exponer(self):
+        lineas = [f'# HELP {self.nombre} {self.ayuda}', f'# TYPE {self.nombre} {self.tipo}']
+        with self._candado:
+            lineas += self._lineas()
+        return lineas
+
+
+class Histograma(_Metrica):
+    """Distribución de valores en cubetas acumuladas, más la suma y el conteo"""
+    tipo = 'histogram'
+
+    def __init__(self, nombre, ayuda, etiquetas=(), limites=LIMITES_LATENCIA):
+        super().__init__(nombre, ayuda, etiquetas)
+        self.limites = tuple(sorted(limites))
+
+    def observar(self, valor, **etiquetas):
+        clave = self._clave(etiquetas)
+        with self._candado:
+            cubetas, _, _ = estado = self._valores.setdefault(clave, [[0] * (len(self.limites) + 1), 0.0, 0])
+            cubetas[bisect.bisect_left(self.limites, valor)] += 1
+            estado[1] += valor
+            estado[2] += 1
+
+    @contextlib.contextmanager
+    def cronometrar(self, **etiquetas):
+        """Observa la duración del bloque en segundos"""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observar(time.perf_counter() - inicio, **etiquetas)
+
+    def _lineas(self):
+        lineas = []
+        for clave, (cubetas, suma, conteo) in self._valores.items():
+            acumulado = 0
+            for limite, cantidad in zip(self.limites + (float('inf'),), cubetas):
+                acumulado += cantidad
+                le = _etiquetas(self.etiquetas, clave, [('le', _numero(limite))])
+                lineas.append(f'{self.nombre}_bucket{le} {acumulado}')
+            lineas.append(f'{self.nombre}_sum{_etiquetas(self.etiquetas, clave)} {_numero(suma)}')
+            lineas.append(f'{self.nombre}_count{_etiquetas(self.etiquetas, clave)} {conteo}')
+        return lineas
+
+
+class Medidor(_Metrica):
+    """
+    Valor que se lee al exponer las métricas (p. ej. el tamaño de una caché).
+    Con tipo='counter' sirve para exponer contadores que ya lleva otro objeto.
+    """
+
+    def __init__(self, nombre, ayuda, funcion, tipo='gauge'):
+        super().__init__(nombre, ayuda)
+        self.funcion = funcion
+        self.tipo = tipo
+
+    def _lineas(self):
+        return [f'{self.nombre} {_numero(self.funcion())}']
+
+
+class ColeccionMetricas:
+    """Conjunto de métricas de un proceso"""
+
+    def __init__(self):
+        self.metricas = {}
+
+    def _registrar(self, metrica):
+        if metrica.nombre in self.metricas:
+            raise ValueError(f"La métrica '{metrica.nombre}' ya está registrada.")
+        self.metricas[metrica.nombre] = metrica
+        return metrica
+
+    def histograma(self, nombre, ayuda, etiquetas=(), limites=LIMITES_LATENCIA):
+        return self._registrar(Histograma(nombre, ayuda, etiquetas, limites))
+
+    def medidor(self, nombre, ayuda, funcion, tipo='gauge'):
+        return self._registrar(Medidor(nombre, ayuda, funcion, tipo))
+
+    def exponer(self):
+        """Texto para /metrics (text/plain; version=0.0.4)"""
+        lineas = []
+        for metrica in self.metricas.values():
+            lineas += metrica.exponer()
+        return '\n'.join(lineas) + '\n'
+
+
+# --- PERFILADO ---
+
+_candado_perfil = threading.Lock()
+_secuencia_perfiles = itertools.count(1)
+
+
+def modos_perfilado(valor=None):
+    """Modos pedidos en PERFILAR ('cprofile', 'tracemalloc' o ambos)"""
+    valor = os.environ.get('PERFILAR', '') if valor is None else valor
+    modos = {m.strip().lower() for m in valor.split(',') if m.strip()}
+    desconocidos = modos - {'cprofile', 'tracemalloc'}
+    if desconocidos:
+        raise ValueError(f"Modo de perfilado no válido: {', '.join(sorted(desconocidos))}.")
+    return modos
+
+
+@contextlib.contextmanager
+def perfilar(nombre, modos=None, log=None):
+    """
+    Perfila el bloque si hay modos activos. cProfile se guarda como .prof
+    (legible con pstats o snakeviz) y tracemalloc como un .txt con el pico y
+    las líneas que más memoria reservaron. Solo se perfila un bloque a la vez
+    por proceso; los demás se ejecutan sin perfilar.
+    """
+    modos = modos_perfilado() if modos is None else modos
+    if not modos or not _candado_perfil.acquire(blocking=False):
+        yield
+        return
+
+    try:
+        perfil = cProfile.Profile() if 'cprofile' in modos else None
+        rastrear = 'tracemalloc' in modos and not tracemalloc.is_tracing()
+        if rastrear:
+            tracemalloc.start()
+        if perfil is not None:
+            perfil.enable()
+        try:
+            yield
+        finally:
+            if perfil is not None:
+                perfil.disable()
+            base = os.path.join(DIRECTORIO_PERFILES,
+                                f"{re.sub(r'[^A-Za-z0-9_.-]+', '_', nombre)}-{time.strftime('%Y%m%d-%H%M%S')}"
+                                f"-{os.getpid()}-{next(_secuencia_perfiles)}")
+            os.makedirs(DIRECTORIO_PERFILES, exist_ok=True)
+            archivos = []
+            if perfil is not None:
+                perfil.dump_stats(base + '.prof')
+                archivos.append(base + '.prof')
+            if rastrear:
+                _, pico = tracemalloc.get_traced_memory()
+                estadisticas = tracemalloc.take_snapshot().statistics('lineno')[:25]
+                tracemalloc.stop()
+                with open(base + '.txt', 'w', encoding='utf-8') as f:
+                    f.write(f"Pico de memoria: {pico / 1024 / 1024:.1f} MB\n\n")
+                    f.write('\n'.join(str(e) for e in estadisticas) + '\n')
+                archivos.append(base + '.txt')
+            registrar_evento(log or obtener_log('perfil'), 'perfil_guardado', nombre=nombre, archivos=archivos)
+    finally:
+        _candado_perfil.release()
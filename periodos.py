@@ -0,0 +1,263 @@
+# periodos.py
+"""
+Encuestas de varios periodos: una partición por oleada en
+periodos/<periodo>/ con su respuestas.csv y un agregados.json.
+
+Los agregados de cada partición se calculan una sola vez por bloques
+(bloques.py) y se guardan junto con el hash del CSV, así que una partición
+que no cambió no se vuelve a leer. Las tendencias y las comparaciones entre
+periodos solo combinan esos agregados, sin reprocesar el historial.
+
+Leer particiones, tendencias y comparaciones solo usa la biblioteca estándar
+(app.py lo importa al arrancar); calcular los agregados importa bloques.py.
+
+Uso:
+    python periodos.py importar 2025-1 [respuestas_cisco.csv]
+    python periodos.py actualizar             # recalcula las particiones cuyo CSV cambió
+    python periodos.py tendencias [2024-2 2025-1 ...]
+    python periodos.py comparar 2024-2 2025-1
+"""
+
+import argparse
+import json
+import os
+import re
+import shutil
+import tempfile
+from snapshot import hash_archivo
+
+DIRECTORIO_PERIODOS = 'periodos'
+ARCHIVO_RESPUESTAS = 'respuestas.csv'
+ARCHIVO_AGREGADOS = 'agregados.json'
+VERSION_AGREGADOS = 4
+
+# Los periodos empiezan por el año (p. ej. 2025-1), así el orden alfabético es el cronológico
+PATRON_PERIODO = re.compile(r'\d{4}[A-Za-z0-9._-]*')
+
+# Conteos de cada partición que se comparan entre periodos
+METRICAS_PERIODO = ['interes_por_area', 'modalidad', 'disposicion', 'horarios', 'experiencia_previa']
+
+TOP_CURSOS = 10
+
+
+def validar_periodo(periodo):
+    if not PATRON_PERIODO.fullmatch(periodo or ''):
+        raise ValueError(f"Periodo no válido: '{periodo}' (debe empezar por el año, p. ej. 2025-1).")
+    return periodo
+
+
+def ruta_periodo(periodo, archivo, directorio=DIRECTORIO_PERIODOS):
+    return os.path.join(directorio, validar_periodo(periodo), archivo)
+
+
+def listar_periodos(directorio=DIRECTORIO_PERIODOS):
+    """Periodos con CSV, en orden cronológico"""
+    try:
+        nombres = os.listdir(directorio)
+    except FileNotFoundError:
+        return []
+    return sorted(n for n in nombres
+                  if PATRON_PERIODO.fullmatch(n) and os.path.isfile(os.path.join(directorio, n, ARCHIVO_RESPUESTAS)))
+
+
+def _escribir_json(datos, ruta):
+    """Escribe el JSON de forma atómica"""
+    directorio = os.path.dirname(ruta) or '.'
+    fd, temporal = tempfile.mkstemp(dir=directorio, prefix='.tmp_', suffix='.json')
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        json.dump(datos, f, ensure_ascii=False, indent=4)
+    os.chmod(temporal, 0o644)
+    os.replace(temporal, ruta)
+    return ruta
+
+
+# --- AGREGADOS POR PARTICIÓN ---
+
+def leer_agregados(periodo, directorio=DIRECTORIO_PERIODOS):
+    """Agregados guardados del periodo (None si no hay o son de otra versión)"""
+    try:
+        with open(ruta_periodo(periodo, ARCHIVO_AGREGADOS, directorio), 'r', encoding='utf-8') as f:
+            datos = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+    return datos if datos.get('version') == VERSION_AGREGADOS else None
+
+
+def conteos_periodo(agregados, resultados):
+    """Conteos completos (sin recortar al top) que se suman y comparan entre periodos"""
+    from datos import COLUMNAS_CURSOS
+    from resultados import CLAVES_CURSOS
+
+    return {
+        'total_respuestas': agregados.filas,
+        'interes_por_area': resultados['interes_por_area'],
+        'modalidad': resultados['preferencias']['modalidad'],
+        'disposicion': resultados['preferencias']['disposicion'],
+        'horarios': agregados.top('horario'),
+        'experiencia_previa': resultados['experiencia_previa'],
+        'cursos': {CLAVES_CURSOS[col]: agregados.top(col) for col in COLUMNAS_CURSOS}
+    }
+
+
+def actualizar_periodo(periodo, directorio=DIRECTORIO_PERIODOS, forzar=False):
+    """
+    Calcula y guarda los agregados del periodo si su CSV cambió (o con
+    forzar=True). Devuelve (datos, recalculado).
+    """
+    from bloques import agregar_csv
+    from resultados import NumpyEncoder
+
+    ruta_csv = ruta_periodo(periodo, ARCHIVO_RESPUESTAS, directorio)
+    hash_fuente = hash_archivo(ruta_csv)
+    datos = leer_agregados(periodo, directorio)
+    if not forzar and datos is not None and datos.get('hash_fuente') == hash_fuente:
+        return datos, False
+
+    agregados = agregar_csv(ruta_csv)
+    if agregados.filas == 0:
+        raise ValueError(f"El CSV del periodo '{periodo}' no tiene respuestas.")
+    # Ida y vuelta por JSON para guardar solo tipos básicos
+    resultados = json.loads(json.dumps(agregados.resultados(), cls=NumpyEncoder))
+    datos = {
+        'version': VERSION_AGREGADOS,
+        'periodo': periodo,
+        'hash_fuente': hash_fuente,
+        'conteos': conteos_periodo(agregados, resultados),
+        'resultados': resultados
+    }
+    _escribir_json(datos, ruta_periodo(periodo, ARCHIVO_AGREGADOS, directorio))
+    return datos, True
+
+
+def importar_periodo(periodo, ruta_csv, directorio=DIRECTORIO_PERIODOS):
+    """Copia un CSV como partición del periodo y calcula sus agregados"""
+    destino = ruta_periodo(periodo, ARCHIVO_RESPUESTAS, directorio)
+    os.makedirs(os.path.dirname(destino), exist_ok=True)
+    fd, temporal = tempfile.mkstemp(dir=os.path.dirname(destino), prefix='.tmp_', suffix='.csv')
+    os.close(fd)
+    shutil.copyfile(ruta_csv, temporal)
+    os.replace(temporal, destino)
+    return actualizar_periodo(periodo, directorio, forzar=True)[0]
+
+
+# --- TENDENCIAS Y COMPARACIONES (solo combinan agregados guardados) ---
+
+def _agregados_de(periodos, directorio):
+    datos = []
+    for periodo in periodos:
+        agregados = leer_agregados(periodo, directorio)
+        if agregados is None:
+            raise ValueError(f"El periodo '{periodo}' no tiene agregados; ejecute: python periodos.py actualizar")
+        datos.append(agregados)
+    return datos
+
+
+def sumar_conteos(lista):
+    """Combina los conteos de varios periodos (de mayor a menor; empates por primera aparición)"""
+    def sumar(diccionarios):
+        total = {}
+        for conteos in diccionarios:
+            for clave, cantidad in conteos.items():
+                total[clave] = total.get(clave, 0) + cantidad
+        return dict(sorted(total.items(), key=lambda x: -x[1]))
+
+    combinados = {'total_respuestas': sum(c['total_respuestas'] for c in lista)}
+    for metrica in METRICAS_PERIODO:
+        combinados[metrica] = sumar(c[metrica] for c in lista)
+    claves_cursos = list(dict.fromkeys(clave for c in lista for clave in c['cursos']))
+    combinados['cursos'] = {clave: sumar(c['cursos'].get(clave, {}) for c in lista) for clave in claves_cursos}
+    return combinados
+
+
+def _serie(valores, totales):
+    return {
+        'conteos': valores,
+        'porcentajes': [round(100 * v / t, 1) if t else None for v, t in zip(valores, totales)]
+    }
+
+
+def tendencias(periodos=None, top=TOP_CURSOS, directorio=DIRECTORIO_PERIODOS):
+    """
+    Evolución de cada conteo a lo largo de los periodos (todos por defecto):
+    {clave: {'conteos': [...], 'porcentajes': [...]}} con un valor por periodo,
+    en porcentaje sobre el total de respuestas del periodo. Para los cursos se
+    siguen los `top` más elegidos de cada periodo. 'acumulado' suma todos los
+    periodos elegidos.
+    """
+    periodos = listar_periodos(directorio) if periodos is None else [validar_periodo(p) for p in periodos]
+    conteos = [datos['conteos'] for datos in _agregados_de(periodos, directorio)]
+    totales = [c['total_respuestas'] for c in conteos]
+    acumulado = sumar_conteos(conteos) if conteos else None
+
+    resultado = {'periodos': periodos, 'total_respuestas': totales}
+    for metrica in METRICAS_PERIODO:
+        claves = acumulado[metrica] if acumulado else {}
+        resultado[metrica] = {clave: _serie([c[metrica].get(clave, 0) for c in conteos], totales)
+                              for clave in claves}
+
+    resultado['cursos'] = {}
+    for area, cursos_acumulados in (acumulado['cursos'] if acumulado else {}).items():
+        seguidos = set()
+        for c in conteos:
+            seguidos.update(list(c['cursos'].get(area, {}))[:top])
+        resultado['cursos'][area] = {curso: _serie([c['cursos'].get(area, {}).get(curso, 0) for c in conteos], totales)
+                                     for curso in cursos_acumulados if curso in seguidos}
+
+    if acumulado:
+        acumulado['cursos'] = {area: dict(list(cursos.items())[:top]) for area, cursos in acumulado['cursos'].items()}
+    resultado['acumulado'] = acumulado
+    return resultado
+
+
+def comparar(periodo_a, periodo_b, top=TOP_CURSOS, directorio=DIRECTORIO_PERIODOS):
+    """
+    Diferencias entre dos periodos: para cada clave, los conteos y porcentajes
+    de ambos y la diferencia (b - a) en respuestas y en puntos porcentuales.
+    """
+    serie = tendencias([periodo_a, periodo_b], top, directorio)
+
+    def diferencias(series):
+        return {clave: {'a': s['conteos'][0], 'b': s['conteos'][1],
+                        'porcentaje_a': s['porcentajes'][0], 'porcentaje_b': s['porcentajes'][1],
+                        'diferencia': s['conteos'][1] - s['conteos'][0],
+                        'diferencia_puntos': round(s['porcentajes'][1] - s['porcentajes'][0], 1)}
+                for clave, s in series.items()}
+
+    resultado = {
+        'a': periodo_a,
+        'b': periodo_b,
+        'total_respuestas': {'a': serie['total_respuestas'][0], 'b': serie['total_respuestas'][1]}
+    }
+    for metrica in METRICAS_PERIODO:
+        resultado[metrica] = diferencias(serie[metrica])
+    resultado['cursos'] = {area: diferencias(cursos) for area, cursos in serie['cursos'].items()}
+    return resultado
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Encuestas por periodo y comparaciones entre periodos')
+    subcomandos = parser.add_subparsers(dest='comando', required=True)
+    importar = subcomandos.add_parser('importar', help='agrega (o reemplaza) el CSV de un periodo')
+    importar.add_argument('periodo')
+    importar.add_argument('ruta', nargs='?', default='respuestas_cisco.csv')
+    actualizar = subcomandos.add_parser('actualizar', help='recalcula los agregados de los CSV que cambiaron')
+    actualizar.add_argument('--forzar', action='store_true')
+    tendencia = subcomandos.add_parser('tendencias', help='evolución entre periodos (JSON)')
+    tendencia.add_argument('periodos', nargs='*')
+    comparacion = subcomandos.add_parser('comparar', help='diferencias entre dos periodos (JSON)')
+    comparacion.add_argument('a')
+    comparacion.add_argument('b')
+    args = parser.parse_args()
+
+    if args.comando == 'importar':
+        datos = importar_periodo(args.periodo, args.ruta)
+        print(f"✅ Periodo {args.periodo} importado ({datos['conteos']['total_respuestas']} respuestas).")
+    elif args.comando == 'actualizar':
+        for periodo in listar_periodos():
+            datos, recalculado = actualizar_periodo(periodo, forzar=args.forzar)
+            estado = 'recalculado' if recalculado else 'sin cambios'
+            print(f"{'🔄' if recalculado else '✅'} {periodo}: {estado} ({datos['conteos']['total_respuestas']} respuestas)")
+    elif args.comando == 'tendencias':
+        print(json.dumps(tendencias(args.periodos or None), ensure_ascii=False, indent=2))
+    else:
+        print(json.dumps(comparar(args.a, args.b), ensure_ascii=False, indent=2))
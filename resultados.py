@@ -0,0 +1,95 @@
+# resultados.py
+#
+# Estructura de static/resultados_analisis.json. La usan tanto analisis.py (con
+# el dataframe completo) como bloques.py (con agregados por bloques), así los
+# dos modos escriben exactamente el mismo archivo.
+
+import json
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+from json import JSONEncoder
+from esquema import AREAS
+from intervalos import intervalos_resultados
+
+RUTA_RESULTADOS = 'static/resultados_analisis.json'
+
+# Clave de cada columna de cursos dentro de "cursos_populares"
+CLAVES_CURSOS = {columna: area.clave for columna, area in AREAS.items()}
+
+# Add a custom JSON encoder class to handle NumPy types
+class NumpyEncoder(JSONEncoder):
+    """ Custom encoder for numpy data types """
+    def default(self, obj):
+        if isinstance(obj, (np.integer, np.int64, np.int32)):
+            return int(obj)
+        elif isinstance(obj, (np.floating, np.float64, np.float32)):
+            return float(obj)
+        elif isinstance(obj, np.ndarray):
+            return obj.tolist()
+        elif isinstance(obj, np.bool_):
+            return bool(obj)
+        return super(NumpyEncoder, self).default(obj)
+
+
+def disposicion_por_ciclo_json(pivot):
+    """Tabla ciclo × disposición como diccionario {ciclo: {disposición: conteo}}"""
+    result = {}
+
+    for ciclo in pivot.index:
+        # Convert all values to regular Python types
+        result[str(ciclo)] = {str(k): int(v) for k, v in pivot.loc[ciclo].to_dict().items()}
+
+    return result
+
+
+def construir_resultados(total_respuestas, resumen, modalidad, disposicion, horarios, interes_por_area,
+                         top_cursos, modalidad_por_ciclo, tabla_disposicion_por_ciclo, cursos_por_ciclo,
+                         experiencia_previa, sugerencias, coseleccion_cursos, respuestas_por_ciclo):
+    """
+    Arma el diccionario de resultados. Los conteos (`modalidad`, `disposicion`,
+    `experiencia_previa`) van en el orden de `value_counts`; `top_cursos` tiene
+    una entrada por columna de cursos y `coseleccion_cursos` es el resumen de
+    agregaciones.resumen_coseleccion. `respuestas_por_ciclo` ({ciclo: respuestas})
+    es el denominador del curso más popular de cada ciclo en "intervalos".
+    """
+    resultados = {
+        "meta": {
+            "fecha_analisis": pd.Timestamp.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "version": "1.0",
+            "total_respuestas": int(total_respuestas)  # Convert to regular Python int
+        },
+        "resumen": {k: (int(v) if isinstance(v, (np.integer, np.int64)) else v)
+                    for k, v in resumen.items()},
+        "preferencias": {
+            "modalidad": {str(k): int(v) for k, v in modalidad.items()},
+            "disposicion": {str(k): int(v) for k, v in disposicion.items()},
+            "horarios": horarios
+        },
+        "interes_por_area": interes_por_area,
+        "cursos_populares": {clave: top_cursos[col] for col, clave in CLAVES_CURSOS.items()},
+        "coseleccion_cursos": coseleccion_cursos,
+        "analisis_por_ciclo": {
+            "modalidad_preferida": {str(k): str(v) for k, v in modalidad_por_ciclo.items()},
+            "disposicion": disposicion_por_ciclo_json(tabla_disposicion_por_ciclo),
+            "curso_mas_popular": {str(k): {"curso": v["curso"], "conteo": int(v["conteo"])} for k, v in cursos_por_ciclo.items()}
+        },
+        "experiencia_previa": {str(k): int(v) for k, v in experiencia_previa.items()},
+        "sugerencias": sugerencias
+    }
+    # Intervalos de confianza de cada proporción (ver intervalos.py)
+    resultados["intervalos"] = intervalos_resultados(resultados, {str(k): int(v) for k, v in respuestas_por_ciclo.items()})
+    return resultados
+
+
+def guardar_resultados(resultados, ruta=RUTA_RESULTADOS):
+    """Guarda el JSON usando el encoder personalizado, de forma atómica (app.py lo vigila)"""
+    directorio = os.path.dirname(ruta) or '.'
+    os.makedirs(directorio, exist_ok=True)
+    fd, temporal = tempfile.mkstemp(dir=directorio, prefix='.tmp_', suffix='.json')
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        json.dump(resultados, f, ensure_ascii=False, indent=4, cls=NumpyEncoder)
+    os.chmod(temporal, 0o644)
+    os.replace(temporal, ruta)
+    return ruta
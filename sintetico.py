@@ -0,0 +1,193 @@
+# sintetico.py
+"""
+Generador de encuestas sintéticas con las mismas columnas y vocabularios que
+respuestas_cisco.csv, para medir el análisis y el servidor con más filas.
+
+Las distribuciones se estiman de la encuesta real: el ciclo se sortea según su
+frecuencia y el resto de columnas según su frecuencia dentro de cada ciclo
+(suavizada hacia la frecuencia global). Con la misma semilla se obtiene
+siempre el mismo archivo.
+"""
+
+import argparse
+import numpy as np
+import pandas as pd
+from datos import RUTA_CSV
+from esquema import COLUMNAS, renombrar_columnas, separar_opciones
+
+# Tamaños con nombre para la línea de comandos y el benchmark
+TAMANOS = {'1k': 1_000, '100k': 100_000, '1m': 1_000_000}
+
+SEMILLA = 42
+
+# Peso de la distribución global al estimar la distribución de cada ciclo
+SUAVIZADO = 5.0
+
+# Una columna con más opciones distintas que esto se trata como texto libre
+MAX_OPCIONES = 30
+
+# Si una columna de selección múltiple tiene pocas combinaciones distintas se
+# sortea la combinación completa, para conservar qué opciones van juntas
+MAX_COMBINACIONES = 10
+
+
+def filas_desde_tamano(tamano):
+    """Acepta '1k', '100k', '1m' o un número de filas"""
+    tamano = str(tamano).lower()
+    if tamano in TAMANOS:
+        return TAMANOS[tamano]
+    return int(tamano.replace('_', ''))
+
+
+def _probabilidades(conteos, total, global_):
+    """Frecuencia de un ciclo suavizada hacia la global"""
+    return (conteos + SUAVIZADO * global_) / (total + SUAVIZADO)
+
+
+def perfilar_encuesta(df):
+    """
+    Describe cada columna de la encuesta real: tipo ('unica', 'multiple',
+    'texto' o 'correo') y las frecuencias por ciclo que usa el generador.
+    """
+    nombres = renombrar_columnas(df.columns)
+    columna_ciclo = next(original for original, nombre in nombres.items() if nombre == 'ciclo')
+    ciclos = df[columna_ciclo]
+    vocabulario_ciclos = ciclos.value_counts()
+    perfil = {'ciclos': list(vocabulario_ciclos.index),
+              'prob_ciclos': (vocabulario_ciclos / vocabulario_ciclos.sum()).to_numpy(),
+              'columnas': []}
+
+    for col in df.columns:
+        serie = df[col]
+        valores = serie.dropna().astype(str)
+        definicion = COLUMNAS.get(nombres.get(col))
+        if definicion is not None and definicion.tipo == 'multiple':
+            # Las opciones se separan con el vocabulario del esquema (algunas tienen comas)
+            opciones = separar_opciones(valores, definicion)
+        else:
+            opciones = valores.str.split(',').explode().str.strip()
+            opciones = opciones[opciones != '']
+
+        if col == columna_ciclo:
+            perfil['columnas'].append({'nombre': col, 'tipo': 'ciclo'})
+        elif valores.str.contains('@').any():
+            # El correo depende de la pregunta anterior ("Si marcaste 'Sí', ...")
+            anterior = perfil['columnas'][-1]
+            dominio = valores.str.split('@').str[1].str.strip().value_counts().index[0]
+            prob_correo = serie.notna().groupby(df[anterior['nombre']].astype(str), sort=False).mean()
+            perfil['columnas'].append({'nombre': col, 'tipo': 'correo', 'dominio': dominio,
+                                       'anterior': anterior['nombre'],
+                                       'prob_correo': prob_correo.to_dict()})
+        elif opciones.nunique() > MAX_OPCIONES:
+            # Texto libre: se reutilizan las respuestas reales (incluidas las vacías)
+            perfil['columnas'].append({'nombre': col, 'tipo': 'texto', 'valores': serie.tolist()})
+        elif valores.str.contains(',').any() and valores.nunique() > MAX_COMBINACIONES:
+            # Selección múltiple: probabilidad de dejarla vacía y de marcar cada opción
+            vocabulario = list(pd.unique(opciones))
+            marcadas = (pd.crosstab(opciones.index, opciones)
+                        .reindex(index=valores.index, columns=vocabulario, fill_value=0) > 0)
+            respondida = serie.notna()
+            global_vacio = 1 - respondida.mean()
+            global_opciones = marcadas.mean().to_numpy()
+            prob_vacio, prob_opciones = [], []
+            for ciclo in perfil['ciclos']:
+                en_ciclo = ciclos == ciclo
+                prob_vacio.append(_probabilidades((~respondida[en_ciclo]).sum(), en_ciclo.sum(), global_vacio))
+                marcadas_ciclo = marcadas[en_ciclo[marcadas.index]]
+                prob_opciones.append(_probabilidades(marcadas_ciclo.sum().to_numpy(), len(marcadas_ciclo),
+                                                     global_opciones))
+            perfil['columnas'].append({'nombre': col, 'tipo': 'multiple', 'vocabulario': vocabulario,
+                                       'prob_vacio': np.array(prob_vacio),
+                                       'prob_opciones': np.array(prob_opciones),
+                                       'prob_global': global_opciones / global_opciones.sum()})
+        else:
+            # Respuesta única (la respuesta vacía cuenta como una opción más)
+            vocabulario = list(serie.value_counts(dropna=False).index)
+            global_ = serie.value_counts(dropna=False, normalize=True).reindex(vocabulario).to_numpy()
+            prob = []
+            for ciclo in perfil['ciclos']:
+                conteos = serie[ciclos == ciclo].value_counts(dropna=False).reindex(vocabulario, fill_value=0)
+                p = _probabilidades(conteos.to_numpy(), conteos.sum(), global_)
+                prob.append(p / p.sum())
+            perfil['columnas'].append({'nombre': col, 'tipo': 'unica', 'vocabulario': vocabulario,
+                                       'prob': np.array(prob)})
+    return perfil
+
+
+def _sortear_por_ciclo(rng, codigos_ciclo, prob):
+    """Sortea un índice por fila según la distribución (fila de `prob`) de su ciclo"""
+    acumulada = np.cumsum(prob, axis=1)
+    acumulada[:, -1] = 1.0
+    u = rng.random(len(codigos_ciclo))
+    return (u[:, None] >= acumulada[codigos_ciclo]).sum(axis=1)
+
+
+def _generar_multiple(rng, codigos_ciclo, perfil_columna):
+    """
+    Sortea las opciones marcadas de cada fila y las une con ', ' en el orden del
+    formulario. Las combinaciones se codifican como bits para construir cada
+    texto una sola vez.
+    """
+    n = len(codigos_ciclo)
+    vocabulario = perfil_columna['vocabulario']
+    marcadas = rng.random((n, len(vocabulario))) < perfil_columna['prob_opciones'][codigos_ciclo]
+    # Una respuesta no vacía tiene al menos una opción marcada
+    sin_opciones = ~marcadas.any(axis=1)
+    elegidas = rng.choice(len(vocabulario), size=int(sin_opciones.sum()), p=perfil_columna['prob_global'])
+    marcadas[np.flatnonzero(sin_opciones), elegidas] = True
+
+    bits = marcadas.astype(np.uint64) << np.arange(len(vocabulario), dtype=np.uint64)
+    patrones, inverso = np.unique(bits.sum(axis=1), return_inverse=True)
+    textos = np.array([', '.join(o for i, o in enumerate(vocabulario) if int(p) >> i & 1) for p in patrones],
+                      dtype=object)
+    valores = textos[inverso]
+    valores[rng.random(n) < perfil_columna['prob_vacio'][codigos_ciclo]] = None
+    return valores
+
+
+def generar_encuesta(filas, semilla=SEMILLA, ruta_fuente=RUTA_CSV):
+    """Devuelve un DataFrame con `filas` respuestas sintéticas y las columnas originales"""
+    perfil = perfilar_encuesta(pd.read_csv(ruta_fuente))
+    rng = np.random.default_rng(semilla)
+    codigos_ciclo = rng.choice(len(perfil['ciclos']), size=filas, p=perfil['prob_ciclos'])
+
+    columnas = {}
+    for perfil_columna in perfil['columnas']:
+        nombre, tipo = perfil_columna['nombre'], perfil_columna['tipo']
+        if tipo == 'ciclo':
+            columnas[nombre] = np.array(perfil['ciclos'], dtype=object)[codigos_ciclo]
+        elif tipo == 'unica':
+            elegidos = _sortear_por_ciclo(rng, codigos_ciclo, perfil_columna['prob'])
+            columnas[nombre] = np.array(perfil_columna['vocabulario'], dtype=object)[elegidos]
+        elif tipo == 'multiple':
+            columnas[nombre] = _generar_multiple(rng, codigos_ciclo, perfil_columna)
+        elif tipo == 'texto':
+            valores = np.array(perfil_columna['valores'], dtype=object)
+            columnas[nombre] = valores[rng.integers(len(valores), size=filas)]
+        else:
+            correos = np.array([f"estudiante{i:07d}@{perfil_columna['dominio']}" for i in range(filas)],
+                               dtype=object)
+            anterior = pd.Series(columnas[perfil_columna['anterior']]).astype(str)
+            prob_correo = anterior.map(perfil_columna['prob_correo']).fillna(0).to_numpy()
+            correos[rng.random(filas) >= prob_correo] = None
+            columnas[nombre] = correos
+    return pd.DataFrame(columnas)
+
+
+def guardar_encuesta(df, ruta):
+    """Guarda la encuesta con el mismo formato que la exportación original (UTF-8 con BOM)"""
+    df.to_csv(ruta, index=False, encoding='utf-8-sig')
+    return ruta
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Genera una encuesta sintética')
+    parser.add_argument('tamano', help="número de filas o uno de: " + ', '.join(TAMANOS))
+    parser.add_argument('--semilla', type=int, default=SEMILLA)
+    parser.add_argument('--salida', default=None, help='archivo CSV de salida (por defecto respuestas_<tamano>.csv)')
+    args = parser.parse_args()
+
+    filas = filas_desde_tamano(args.tamano)
+    salida = args.salida or f'respuestas_{args.tamano.lower()}.csv'
+    guardar_encuesta(generar_encuesta(filas, args.semilla), salida)
+    print(f"✅ Encuesta sintética generada: {salida} ({filas} filas, semilla {args.semilla}).")
@@ -0,0 +1,66 @@
+# snapshot.py
+#
+# Solo usa la biblioteca estándar: app.py lo importa al arrancar cada worker
+# sin cargar pandas ni numpy.
+
+import os
+import json
+import hashlib
+import tempfile
+import threading
+
+# Tablas y resumen del dashboard precalculados por analisis.py
+RUTA_SNAPSHOT = 'static/snapshot_dashboard.json'
+VERSION_SNAPSHOT = 1
+
+
+def hash_archivo(ruta):
+    """SHA-256 del contenido de un archivo"""
+    h = hashlib.sha256()
+    with open(ruta, 'rb') as f:
+        for bloque in iter(lambda: f.read(1 << 20), b''):
+            h.update(bloque)
+    return h.hexdigest()
+
+
+def escribir_snapshot(contenido, hash_fuente, ruta=RUTA_SNAPSHOT):
+    """Guarda el snapshot (JSON) de forma atómica junto con el hash del CSV de origen"""
+    datos = dict(contenido, version=VERSION_SNAPSHOT, hash_fuente=hash_fuente)
+    directorio = os.path.dirname(ruta) or '.'
+    os.makedirs(directorio, exist_ok=True)
+    fd, temporal = tempfile.mkstemp(dir=directorio, prefix='.tmp_', suffix='.json')
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        json.dump(datos, f, ensure_ascii=False, indent=4)
+    os.chmod(temporal, 0o644)
+    os.replace(temporal, ruta)
+    return ruta
+
+
+def leer_snapshot(hash_fuente, ruta=RUTA_SNAPSHOT):
+    """Devuelve el snapshot si existe y corresponde a ese CSV; si no, None"""
+    try:
+        with open(ruta, 'r', encoding='utf-8') as f:
+            datos = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+    if datos.get('version') != VERSION_SNAPSHOT or datos.get('hash_fuente') != hash_fuente:
+        return None
+    return datos
+
+
+class Perezoso:
+    """Valor que se calcula una sola vez, la primera vez que se pide (seguro entre hilos)"""
+
+    def __init__(self, funcion):
+        self._funcion = funcion
+        self._candado = threading.Lock()
+        self._calculado = False
+        self._valor = None
+
+    def valor(self):
+        if not self._calculado:
+            with self._candado:
+                if not self._calculado:
+                    self._valor = self._funcion()
+                    self._calculado = True
+        return self._valor
@@ -2,44 +2,218 @@
  * Dashboard.js - Funciones para manejo de datos JSON y visualización adicional
  */
 
-// Función para cargar los datos JSON y mostrarlos en formato legible
-function cargarDatosJSON() {
-    fetch('/api/results')
+// Secciones del visor: cada pestaña pide a /api/results/<clave> solo los campos que muestra
+const SECCIONES = [
+    { titulo: 'Información General', clave: 'meta', icono: 'info-circle' },
+    { titulo: 'Resumen Estadístico', clave: 'resumen', icono: 'chart-pie' },
+    { titulo: 'Preferencias', clave: 'preferencias', icono: 'sliders-h', campos: 'modalidad,disposicion' },
+    { titulo: 'Interés por Área', clave: 'interes_por_area', icono: 'project-diagram' },
+    { titulo: 'Cursos Populares', clave: 'cursos_populares', icono: 'star' },
+    { titulo: 'Análisis por Ciclo', clave: 'analisis_por_ciclo', icono: 'users', campos: 'modalidad_preferida' },
+    { titulo: 'Sugerencias', clave: 'sugerencias', icono: 'comments' }
+];
+
+// Sugerencias por página
+const SUGERENCIAS_POR_PAGINA = 20;
+
+// Nombres de las áreas de cursos_populares (los pone el servidor, ver esquema.py)
+const NOMBRES_AREAS = JSON.parse(document.body.dataset.areas || '{}');
+
+// Datos de las pestañas ya cargadas, para aplicarles los cambios en vivo
+const DATOS_SECCIONES = {};
+
+// Pide una sección (o una página de una sección) de los resultados
+function pedirSeccion(clave, parametros) {
+    const consulta = new URLSearchParams(parametros || {}).toString();
+    return fetch(`/api/results/${clave}${consulta ? '?' + consulta : ''}`)
         .then(response => {
             if (!response.ok) {
                 throw new Error('Error al cargar los datos JSON');
             }
             return response.json();
+        });
+}
+
+// Carga una pestaña la primera vez que se muestra
+function cargarSeccion(seccion, tabPane) {
+    if (tabPane.dataset.cargada) return;
+    tabPane.dataset.cargada = 'si';
+    tabPane.innerHTML = '<div class="text-center p-3"><div class="spinner-border text-primary" role="status"></div></div>';
+
+    if (seccion.clave === 'sugerencias') {
+        tabPane.innerHTML = '<ul class="list-group mb-3"></ul>';
+        cargarSugerencias(tabPane, null);
+        return;
+    }
+
+    pedirSeccion(seccion.clave, seccion.campos ? { fields: seccion.campos } : null)
+        .then(datos => {
+            DATOS_SECCIONES[seccion.clave] = datos;
+            tabPane.innerHTML = formatearSeccion(seccion.clave, datos);
         })
-        .then(data => {
-            // Mostrar datos en formato legible
-            mostrarDatosFormateados(data);
+        .catch(error => {
+            console.error('Error:', error);
+            delete tabPane.dataset.cargada;
+            tabPane.innerHTML = `<div class="alert alert-danger">Error al cargar los datos: ${error.message}</div>`;
+        });
+}
+
+// Agrega la siguiente página de sugerencias y, si quedan más, un botón para seguir
+function cargarSugerencias(tabPane, cursor) {
+    const parametros = { limit: SUGERENCIAS_POR_PAGINA };
+    if (cursor) parametros.cursor = cursor;
+    const boton = tabPane.querySelector('button');
+    if (boton) boton.remove();
+
+    pedirSeccion('sugerencias', parametros)
+        .then(pagina => {
+            const lista = tabPane.querySelector('ul');
+            pagina.items.forEach(sugerencia => {
+                const item = document.createElement('li');
+                item.className = 'list-group-item';
+                item.textContent = sugerencia;
+                lista.appendChild(item);
+            });
+            if (pagina.siguiente) {
+                const mas = document.createElement('button');
+                mas.className = 'btn btn-outline-primary btn-sm';
+                mas.textContent = `Ver más (${lista.children.length} de ${pagina.total})`;
+                mas.addEventListener('click', () => cargarSugerencias(tabPane, pagina.siguiente));
+                tabPane.appendChild(mas);
+            }
         })
         .catch(error => {
             console.error('Error:', error);
-            document.getElementById('json-viewer').innerHTML = 
-                `<div class="alert alert-danger">Error al cargar los datos: ${error.message}</div>`;
+            tabPane.insertAdjacentHTML('beforeend',
+                `<div class="alert alert-danger">Error al cargar las sugerencias: ${error.message}</div>`);
         });
 }
 
-// Función para mostrar los datos en formato legible
-function mostrarDatosFormateados(data) {
+// Función para formatear los datos de una sección en formato legible
+function formatearSeccion(clave, datos) {
+    let contenido = '';
+
+    if (clave === 'meta') {
+        contenido = `
+            <div class="card">
+                <div class="card-body">
+                    <h5 class="card-title">Metadatos del Análisis</h5>
+                    <ul class="list-group list-group-flush">
+                        <li class="list-group-item">Fecha: ${datos.fecha_analisis}</li>
+                        <li class="list-group-item">Versión: ${datos.version}</li>
+                        <li class="list-group-item">Total de respuestas: ${datos.total_respuestas}</li>
+                    </ul>
+                </div>
+            </div>
+        `;
+    } else if (clave === 'resumen') {
+        contenido = `
+            <div class="card">
+                <div class="card-body">
+                    <h5 class="card-title">Resumen</h5>
+                    <ul class="list-group list-group-flush">
+                        ${Object.entries(datos).map(([k, v]) => 
+                            `<li class="list-group-item">${k}: ${v}</li>`).join('')}
+                    </ul>
+                </div>
+            </div>
+        `;
+    } else if (clave === 'preferencias') {
+        contenido = `
+            <div class="card mb-3">
+                <div class="card-body">
+                    <h5 class="card-title">Modalidad</h5>
+                    <ul class="list-group list-group-flush">
+                        ${Object.entries(datos.modalidad).map(([k, v]) => 
+                            `<li class="list-group-item d-flex justify-content-between align-items-center">
+                                ${k}
+                                <span class="badge bg-primary rounded-pill">${v}</span>
+                            </li>`).join('')}
+                    </ul>
+                </div>
+            </div>
+            <div class="card mb-3">
+                <div class="card-body">
+                    <h5 class="card-title">Disposición</h5>
+                    <ul class="list-group list-group-flush">
+                        ${Object.entries(datos.disposicion).map(([k, v]) => 
+                            `<li class="list-group-item d-flex justify-content-between align-items-center">
+                                ${k}
+                                <span class="badge bg-success rounded-pill">${v}</span>
+                            </li>`).join('')}
+                    </ul>
+                </div>
+            </div>
+        `;
+    } else if (clave === 'interes_por_area') {
+        contenido = `
+            <div class="card">
+                <div class="card-body">
+                    <h5 class="card-title">Interés por Área</h5>
+                    <ul class="list-group list-group-flush">
+                        ${Object.entries(datos).map(([k, v]) => 
+                            `<li class="list-group-item d-flex justify-content-between align-items-center">
+                                ${k}
+                                <span class="badge bg-info rounded-pill">${v}</span>
+                            </li>`).join('')}
+                    </ul>
+                </div>
+            </div>
+        `;
+    } else if (clave === 'cursos_populares') {
+        contenido = `
+            <div class="accordion" id="accordionCursos">
+                ${Object.entries(datos).map(([area, cursos], i) => `
+                <div class="accordion-item">
+                    <h2 class="accordion-header">
+                        <button class="accordion-button ${i === 0 ? '' : 'collapsed'}" type="button" data-bs-toggle="collapse" 
+                                data-bs-target="#collapse-${area}">
+                            ${NOMBRES_AREAS[area] || area}
+                        </button>
+                    </h2>
+                    <div id="collapse-${area}" class="accordion-collapse collapse ${i === 0 ? 'show' : ''}" 
+                         data-bs-parent="#accordionCursos">
+                        <div class="accordion-body">
+                            <ul class="list-group">
+                                ${Object.entries(cursos).map(([k, v]) => 
+                                    `<li class="list-group-item d-flex justify-content-between align-items-center">
+                                        ${k}
+                                        <span class="badge bg-primary rounded-pill">${v}</span>
+                                    </li>`).join('')}
+                            </ul>
+                        </div>
+                    </div>
+                </div>`).join('')}
+            </div>
+        `;
+    } else if (clave === 'analisis_por_ciclo') {
+        contenido = `
+            <div class="card">
+                <div class="card-body">
+                    <h5 class="card-title">Modalidad Preferida por Ciclo</h5>
+                    <ul class="list-group list-group-flush">
+                        ${Object.entries(datos.modalidad_preferida).map(([k, v]) => 
+                            `<li class="list-group-item d-flex justify-content-between align-items-center">
+                                Ciclo ${k}
+                                <span class="badge bg-warning text-dark">${v}</span>
+                            </li>`).join('')}
+                    </ul>
+                </div>
+            </div>
+        `;
+    }
+
+    return contenido;
+}
+
+// Función para crear las pestañas; el contenido de cada una se carga al abrirla
+function mostrarDatosFormateados() {
     const container = document.getElementById('json-viewer');
     if (!container) return;
     
     // Limpiar contenedor
     container.innerHTML = '';
     
-    // Crear elementos para las secciones principales
-    const secciones = [
-        { titulo: 'Información General', clave: 'meta', icono: 'info-circle' },
-        { titulo: 'Resumen Estadístico', clave: 'resumen', icono: 'chart-pie' },
-        { titulo: 'Preferencias', clave: 'preferencias', icono: 'sliders-h' },
-        { titulo: 'Interés por Área', clave: 'interes_por_area', icono: 'project-diagram' },
-        { titulo: 'Cursos Populares', clave: 'cursos_populares', icono: 'star' },
-        { titulo: 'Análisis por Ciclo', clave: 'analisis_por_ciclo', icono: 'users' }
-    ];
-    
     // Crear tabs para navegar entre secciones
     const tabsNav = document.createElement('ul');
     tabsNav.className = 'nav nav-tabs mb-3';
@@ -47,8 +221,8 @@ function mostrarDatosFormateados(data) {
     const tabContent = document.createElement('div');
     tabContent.className = 'tab-content';
     
-    // Crear cada tab y su contenido
-    secciones.forEach((seccion, index) => {
+    // Crear cada tab y su contenedor vacío
+    SECCIONES.forEach((seccion, index) => {
         // Crear tab
         const tabItem = document.createElement('li');
         tabItem.className = 'nav-item';
@@ -66,123 +240,13 @@ function mostrarDatosFormateados(data) {
         const tabPane = document.createElement('div');
         tabPane.className = `tab-pane fade ${index === 0 ? 'show active' : ''}`;
         tabPane.id = `tab-${seccion.clave}`;
-        
-        // Formatear los datos según la sección
-        let contenido = '';
-        
-        if (seccion.clave === 'meta') {
-            contenido = `
-                <div class="card">
-                    <div class="card-body">
-                        <h5 class="card-title">Metadatos del Análisis</h5>
-                        <ul class="list-group list-group-flush">
-                            <li class="list-group-item">Fecha: ${data.meta.fecha_analisis}</li>
-                            <li class="list-group-item">Versión: ${data.meta.version}</li>
-                            <li class="list-group-item">Total de respuestas: ${data.meta.total_respuestas}</li>
-                        </ul>
-                    </div>
-                </div>
-            `;
-        } else if (seccion.clave === 'resumen') {
-            contenido = `
-                <div class="card">
-                    <div class="card-body">
-                        <h5 class="card-title">Resumen</h5>
-                        <ul class="list-group list-group-flush">
-                            ${Object.entries(data.resumen).map(([k, v]) => 
-                                `<li class="list-group-item">${k}: ${v}</li>`).join('')}
-                        </ul>
-                    </div>
-                </div>
-            `;
-        } else if (seccion.clave === 'preferencias') {
-            contenido = `
-                <div class="card mb-3">
-                    <div class="card-body">
-                        <h5 class="card-title">Modalidad</h5>
-                        <ul class="list-group list-group-flush">
-                            ${Object.entries(data.preferencias.modalidad).map(([k, v]) => 
-                                `<li class="list-group-item d-flex justify-content-between align-items-center">
-                                    ${k}
-                                    <span class="badge bg-primary rounded-pill">${v}</span>
-                                </li>`).join('')}
-                        </ul>
-                    </div>
-                </div>
-                <div class="card mb-3">
-                    <div class="card-body">
-                        <h5 class="card-title">Disposición</h5>
-                        <ul class="list-group list-group-flush">
-                            ${Object.entries(data.preferencias.disposicion).map(([k, v]) => 
-                                `<li class="list-group-item d-flex justify-content-between align-items-center">
-                                    ${k}
-                                    <span class="badge bg-success rounded-pill">${v}</span>
-                                </li>`).join('')}
-                        </ul>
-                    </div>
-                </div>
-            `;
-        } else if (seccion.clave === 'interes_por_area') {
-            contenido = `
-                <div class="card">
-                    <div class="card-body">
-                        <h5 class="card-title">Interés por Área</h5>
-                        <ul class="list-group list-group-flush">
-                            ${Object.entries(data.interes_por_area).map(([k, v]) => 
-                                `<li class="list-group-item d-flex justify-content-between align-items-center">
-                                    ${k}
-                                    <span class="badge bg-info rounded-pill">${v}</span>
-                                </li>`).join('')}
-                        </ul>
-                    </div>
-                </div>
-            `;
-        } else if (seccion.clave === 'cursos_populares') {
-            contenido = `
-                <div class="accordion" id="accordionCursos">
-                    <div class="accordion-item">
-                        <h2 class="accordion-header">
-                            <button class="accordion-button" type="button" data-bs-toggle="collapse" 
-                                    data-bs-target="#collapseRedes">
-                                Redes y Ciberseguridad
-                            </button>
-                        </h2>
-                        <div id="collapseRedes" class="accordion-collapse collapse show" 
-                             data-bs-parent="#accordionCursos">
-                            <div class="accordion-body">
-                                <ul class="list-group">
-                                    ${Object.entries(data.cursos_populares.redes_ciberseguridad).map(([k, v]) => 
-                                        `<li class="list-group-item d-flex justify-content-between align-items-center">
-                                            ${k}
-                                            <span class="badge bg-primary rounded-pill">${v}</span>
-                                        </li>`).join('')}
-                                </ul>
-                            </div>
-                        </div>
-                    </div>
-                    
-                    <!-- Más secciones de acordeón para otras áreas -->
-                </div>
-            `;
-        } else if (seccion.clave === 'analisis_por_ciclo') {
-            contenido = `
-                <div class="card">
-                    <div class="card-body">
-                        <h5 class="card-title">Modalidad Preferida por Ciclo</h5>
-                        <ul class="list-group list-group-flush">
-                            ${Object.entries(data.analisis_por_ciclo.modalidad_preferida).map(([k, v]) => 
-                                `<li class="list-group-item d-flex justify-content-between align-items-center">
-                                    Ciclo ${k}
-                                    <span class="badge bg-warning text-dark">${v}</span>
-                                </li>`).join('')}
-                        </ul>
-                    </div>
-                </div>
-            `;
-        }
-        
-        tabPane.innerHTML = contenido;
         tabContent.appendChild(tabPane);
+
+        // Solo se pide la sección cuando se abre la pestaña (la primera, de inmediato)
+        tabLink.addEventListener('show.bs.tab', () => cargarSeccion(seccion, tabPane));
+        if (index === 0) {
+            cargarSeccion(seccion, tabPane);
+        }
     });
     
     // Agregar tabs y contenido al container
@@ -190,10 +254,88 @@ function mostrarDatosFormateados(data) {
     container.appendChild(tabContent);
 }
 
+// --- ACTUALIZACIONES EN VIVO (/api/stream) ---
+
+// Aplica un cambio de segundo nivel: las claves con null desaparecen
+function fusionar(actual, cambios) {
+    const esObjeto = valor => valor !== null && typeof valor === 'object' && !Array.isArray(valor);
+    if (!esObjeto(actual) || !esObjeto(cambios)) return cambios;
+    const resultado = Object.assign({}, actual);
+    Object.entries(cambios).forEach(([clave, valor]) => {
+        if (valor === null) {
+            delete resultado[clave];
+        } else {
+            resultado[clave] = valor;
+        }
+    });
+    return resultado;
+}
+
+// Actualiza en el lugar las tarjetas, las tablas y las pestañas ya cargadas.
+// `completo` indica un evento 'estado' (todo el contenido) en lugar de 'cambios'.
+function aplicarCambios(cambios, version, completo) {
+    Object.entries(cambios.resumen || {}).forEach(([clave, valor]) => {
+        document.querySelectorAll(`[data-resumen="${CSS.escape(clave)}"]`).forEach(el => {
+            el.textContent = valor;
+        });
+    });
+
+    Object.entries(cambios.tablas || {}).forEach(([clave, html]) => {
+        document.querySelectorAll(`[data-tabla="${CSS.escape(clave)}"]`).forEach(el => {
+            el.innerHTML = html || '';
+        });
+    });
+
+    Object.entries(cambios.secciones || {}).forEach(([clave, datos]) => {
+        const tabPane = document.getElementById(`tab-${clave}`);
+        if (!tabPane || !tabPane.dataset.cargada) return;
+        if (clave === 'sugerencias') {
+            // Las sugerencias se paginan: se vuelve a cargar la primera página
+            delete tabPane.dataset.cargada;
+            cargarSeccion(SECCIONES.find(s => s.clave === clave), tabPane);
+            return;
+        }
+        if (!(clave in DATOS_SECCIONES)) return;
+        DATOS_SECCIONES[clave] = completo ? datos : fusionar(DATOS_SECCIONES[clave], datos);
+        tabPane.innerHTML = formatearSeccion(clave, DATOS_SECCIONES[clave]);
+    });
+
+    // Gráficos versionados: la URL nueva ya trae la huella del contenido
+    const estaticos = cambios.estaticos || {};
+    document.querySelectorAll('img[data-estatico]').forEach(img => {
+        const url = estaticos[img.dataset.estatico];
+        if (url) img.src = url;
+    });
+
+    // Los gráficos sin versionar se regeneran con los datos: se piden de nuevo sin la copia en caché
+    if (cambios.secciones) {
+        document.querySelectorAll('img[src*="/static/images/"]').forEach(img => {
+            img.src = `${img.src.split('?')[0]}?v=${encodeURIComponent(version)}`;
+        });
+    }
+
+    document.body.dataset.versionDatos = version;
+    if (cambios.pagina && cambios.pagina.actualizacion) {
+        document.querySelectorAll('[data-actualizacion]').forEach(el => {
+            el.textContent = cambios.pagina.actualizacion;
+        });
+    }
+}
+
+// Se suscribe a los cambios; EventSource se reconecta solo y envía Last-Event-ID
+function conectarActualizaciones() {
+    if (!window.EventSource) return;
+    const version = document.body.dataset.versionDatos || '';
+    const fuente = new EventSource(`/api/stream?desde=${encodeURIComponent(version)}`);
+    fuente.addEventListener('cambios', evento => aplicarCambios(JSON.parse(evento.data), evento.lastEventId, false));
+    fuente.addEventListener('estado', evento => aplicarCambios(JSON.parse(evento.data), evento.lastEventId, true));
+}
+
 // Inicializar cuando el documento esté listo
 document.addEventListener('DOMContentLoaded', function() {
-    // Si existe el contenedor para visualizar JSON, cargar los datos
+    // Si existe el contenedor para visualizar JSON, crear las pestañas
     if (document.getElementById('json-viewer')) {
-        cargarDatosJSON();
+        mostrarDatosFormateados();
     }
+    conectarActualizaciones();
 });
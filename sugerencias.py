@@ -0,0 +1,280 @@
+# sugerencias.py
+#
+# Solo usa la biblioteca estándar: app.py lo importa al arrancar.
+"""
+Búsqueda en las sugerencias de los estudiantes.
+
+El índice se construye al exportar los resultados (analisis.py y bloques.py)
+y se guarda en static/indice_sugerencias.json:
+
+- Términos normalizados: minúsculas, sin tildes y sin palabras vacías.
+  Las respuestas sin ningún término ("Ninguna", "no", "nada") no se indexan
+  y los textos repetidos se indexan una vez.
+- Índice invertido término -> [(documento, frecuencia)] con ranking BM25.
+- Grupos de casi duplicados con MinHash sobre tejas de caracteres (con LSH
+  por bandas): cada grupo se muestra una vez, con su cantidad de duplicados.
+"""
+
+import hashlib
+import json
+import math
+import os
+import re
+import tempfile
+import unicodedata
+from collections import Counter
+
+RUTA_INDICE_SUGERENCIAS = 'static/indice_sugerencias.json'
+VERSION_INDICE = 1
+
+PALABRAS_VACIAS = frozenset("""
+a al algo algun alguna algunas alguno algunos ante como con contra cual cuando de del desde donde durante e el
+ella ellas ellos en entre era es esa ese eso esta estan este esto estos etc fue ha hay la las le les lo los mas me
+mi mis muy ni nos o para pero poco por porque que se sea sean ser si sin sino sobre solo son su sus tambien tan
+tanto te tener tenga tengan tiene todo todos tu un una unas uno unos y ya yo
+""".split())
+
+# Palabras que por sí solas indican que no hay sugerencia
+RESPUESTAS_VACIAS = frozenset({'ninguna', 'ninguno', 'ningun', 'nada', 'no', 'na', 'ok', 'gracias', 'momento',
+                               'ahora', 'bien', 'todo'})
+
+# BM25
+K1 = 1.2
+B = 0.75
+
+# MinHash: tejas de 4 caracteres, 32 permutaciones en 8 bandas de 4 filas
+TAMANO_TEJA = 4
+PERMUTACIONES = 32
+BANDAS = 8
+UMBRAL_DUPLICADO = 0.7
+_PRIMO = (1 << 61) - 1
+_COEFICIENTES = [(int.from_bytes(hashlib.blake2b(f'a{i}'.encode(), digest_size=8).digest(), 'little') % (_PRIMO - 1) + 1,
+                  int.from_bytes(hashlib.blake2b(f'b{i}'.encode(), digest_size=8).digest(), 'little') % _PRIMO)
+                 for i in range(PERMUTACIONES)]
+
+
+# --- NORMALIZACIÓN ---
+
+def plegar(texto):
+    """Minúsculas y sin tildes ('Programación' -> 'programacion')"""
+    descompuesto = unicodedata.normalize('NFD', str(texto).lower())
+    return ''.join(c for c in descompuesto if unicodedata.category(c) != 'Mn')
+
+
+def tokenizar(texto):
+    return re.findall(r'[a-z0-9]+', plegar(texto))
+
+
+def terminos(texto):
+    """Términos indexables del texto (sin palabras vacías ni respuestas vacías)"""
+    return [t for t in tokenizar(texto)
+            if len(t) > 1 and t not in PALABRAS_VACIAS and t not in RESPUESTAS_VACIAS]
+
+
+def variantes(termino):
+    """El término y sus formas en singular/plural, para que 'curso' encuentre 'cursos'"""
+    formas = {termino, termino + 's', termino + 'es'}
+    if termino.endswith('es') and len(termino) > 4:
+        formas.add(termino[:-2])
+    if termino.endswith('s') and len(termino) > 3:
+        formas.add(termino[:-1])
+    return formas
+
+
+# --- CASI DUPLICADOS ---
+
+def firma_minhash(texto):
+    """Firma MinHash del conjunto de tejas de caracteres del texto normalizado"""
+    normalizado = ' '.join(tokenizar(texto))
+    tejas = {normalizado[i:i + TAMANO_TEJA] for i in range(max(len(normalizado) - TAMANO_TEJA + 1, 1))}
+    valores = [int.from_bytes(hashlib.blake2b(t.encode(), digest_size=8).digest(), 'little') for t in tejas]
+    return [min((a * v + b) % _PRIMO for v in valores) for a, b in _COEFICIENTES]
+
+
+def agrupar_duplicados(textos):
+    """
+    Grupo de cada texto: el índice del primer texto de su grupo de casi
+    duplicados (similitud de Jaccard estimada >= UMBRAL_DUPLICADO).
+    """
+    firmas = [firma_minhash(texto) for texto in textos]
+    padre = list(range(len(textos)))
+
+    def raiz(i):
+        while padre[i] != i:
+            padre[i] = padre[padre[i]]
+            i = padre[i]
+        return i
+
+    # LSH: solo se comparan los textos que coinciden en alguna banda
+    filas = PERMUTACIONES // BANDAS
+    candidatos = set()
+    for banda in range(BANDAS):
+        cubetas = {}
+        for i, firma in enumerate(firmas):
+            cubetas.setdefault(tuple(firma[banda * filas:(banda + 1) * filas]), []).append(i)
+        for miembros in cubetas.values():
+            candidatos.update((miembros[0], otro) for otro in miembros[1:])
+    for i, j in candidatos:
+        similitud = sum(x == y for x, y in zip(firmas[i], firmas[j])) / PERMUTACIONES
+        if similitud >= UMBRAL_DUPLICADO:
+            ri, rj = raiz(i), raiz(j)
+            padre[max(ri, rj)] = min(ri, rj)
+    return [raiz(i) for i in range(len(textos))]
+
+
+# --- ÍNDICE ---
+
+class IndiceSugerencias:
+    """
+    Índice invertido de las sugerencias. Los textos repetidos (iguales tras
+    normalizar) se indexan una sola vez con su número de repeticiones, así el
+    índice crece con los textos distintos y no con las respuestas.
+    """
+
+    def __init__(self, documentos, repeticiones, grupos, postings, longitudes):
+        self.documentos = documentos
+        self.repeticiones = repeticiones
+        self.grupos = grupos
+        self.postings = postings
+        self.longitudes = longitudes
+        self.longitud_media = sum(longitudes) / len(longitudes) if longitudes else 0.0
+        self.tamanos_grupo = Counter()
+        for grupo, veces in zip(grupos, repeticiones):
+            self.tamanos_grupo[grupo] += veces
+
+    @classmethod
+    def construir(cls, sugerencias):
+        # Textos distintos con contenido, en orden de primera aparición. Cada
+        # texto literal se normaliza una sola vez (-1 = sin contenido).
+        por_texto = {}
+        posiciones = {}
+        documentos, repeticiones = [], []
+        for sugerencia in sugerencias:
+            texto = str(sugerencia).strip()
+            posicion = por_texto.get(texto)
+            if posicion is None:
+                clave = ' '.join(tokenizar(texto)) if terminos(texto) else None
+                if clave is None:
+                    posicion = -1
+                elif clave in posiciones:
+                    posicion = posiciones[clave]
+                else:
+                    posicion = posiciones[clave] = len(documentos)
+                    documentos.append(texto)
+                    repeticiones.append(0)
+                por_texto[texto] = posicion
+            if posicion >= 0:
+                repeticiones[posicion] += 1
+
+        postings = {}
+        longitudes = []
+        for numero, texto in enumerate(documentos):
+            frecuencias = Counter(terminos(texto))
+            longitudes.append(sum(frecuencias.values()))
+            for termino, frecuencia in frecuencias.items():
+                postings.setdefault(termino, []).append([numero, frecuencia])
+        return cls(documentos, repeticiones, agrupar_duplicados(documentos), postings, longitudes)
+
+    def a_dict(self):
+        return {'version': VERSION_INDICE, 'documentos': self.documentos, 'repeticiones': self.repeticiones,
+                'grupos': self.grupos, 'longitudes': self.longitudes, 'postings': self.postings}
+
+    @classmethod
+    def desde_dict(cls, datos):
+        return cls(datos['documentos'], datos['repeticiones'], datos['grupos'], datos['postings'], datos['longitudes'])
+
+    def relevantes(self):
+        """Una sugerencia por grupo de casi duplicados, en orden de aparición"""
+        return [texto for i, texto in enumerate(self.documentos) if self.grupos[i] == i]
+
+    def temas(self, documentos=None, n=20, excluir=()):
+        """Términos más frecuentes: [(término, sugerencias que lo usan, apariciones)]"""
+        permitidos = None if documentos is None else set(documentos)
+        resumen = []
+        for termino, lista in self.postings.items():
+            if termino in excluir:
+                continue
+            usados = [(d, f) for d, f in lista if permitidos is None or d in permitidos]
+            if usados:
+                resumen.append((termino, sum(self.repeticiones[d] for d, _ in usados),
+                                sum(self.repeticiones[d] * f for d, f in usados)))
+        resumen.sort(key=lambda x: (-x[1], -x[2], x[0]))
+        return resumen[:n]
+
+    def buscar(self, consulta, limite=20, n_temas=10):
+        """
+        Sugerencias ordenadas por BM25 para la consulta (cualquiera de sus
+        términos), una por grupo de casi duplicados, con la frecuencia de cada
+        término pedido y los temas que más aparecen junto a ellos.
+        """
+        pedidos = list(dict.fromkeys(terminos(consulta)))
+        puntajes = {}
+        frecuencias = {}
+        for pedido in pedidos:
+            documentos_termino = {}
+            for forma in variantes(pedido):
+                for documento, frecuencia in self.postings.get(forma, []):
+                    documentos_termino[documento] = documentos_termino.get(documento, 0) + frecuencia
+            frecuencias[pedido] = {
+                'sugerencias': sum(self.repeticiones[d] for d in documentos_termino),
+                'apariciones': sum(self.repeticiones[d] * f for d, f in documentos_termino.items())
+            }
+            if not documentos_termino:
+                continue
+            idf = math.log(1 + (len(self.documentos) - len(documentos_termino) + 0.5) / (len(documentos_termino) + 0.5))
+            for documento, frecuencia in documentos_termino.items():
+                normalizacion = K1 * (1 - B + B * self.longitudes[documento] / self.longitud_media)
+                puntajes[documento] = puntajes.get(documento, 0.0) + idf * frecuencia * (K1 + 1) / (frecuencia + normalizacion)
+
+        # Cada grupo aparece una vez, con su texto de mayor puntaje
+        resultados = []
+        vistos = set()
+        for documento, puntaje in sorted(puntajes.items(), key=lambda x: (-x[1], x[0])):
+            grupo = self.grupos[documento]
+            if grupo in vistos:
+                continue
+            vistos.add(grupo)
+            resultados.append({'texto': self.documentos[documento], 'puntaje': round(puntaje, 4),
+                               'duplicados': self.tamanos_grupo[grupo] - 1})
+
+        excluir = set().union(*(variantes(p) for p in pedidos))
+        return {
+            'consulta': consulta,
+            'terminos': pedidos,
+            'total_coincidencias': len(resultados),
+            'resultados': resultados[:limite],
+            'frecuencia_terminos': frecuencias,
+            'temas_relacionados': [{'termino': t, 'sugerencias': d, 'apariciones': a}
+                                   for t, d, a in self.temas(puntajes, n_temas, excluir)]
+        }
+
+    def resumen(self, n_temas=20):
+        """Totales y temas más frecuentes de todas las sugerencias con contenido"""
+        return {
+            'relevantes': sum(self.repeticiones),
+            'distintas': len(self.documentos),
+            'grupos': len(self.tamanos_grupo),
+            'temas': [{'termino': t, 'sugerencias': d, 'apariciones': a} for t, d, a in self.temas(n=n_temas)]
+        }
+
+
+def guardar_indice(indice, ruta=RUTA_INDICE_SUGERENCIAS):
+    """Guarda el índice (JSON) de forma atómica"""
+    directorio = os.path.dirname(ruta) or '.'
+    os.makedirs(directorio, exist_ok=True)
+    fd, temporal = tempfile.mkstemp(dir=directorio, prefix='.tmp_', suffix='.json')
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        json.dump(indice.a_dict(), f, ensure_ascii=False, separators=(',', ':'))
+    os.chmod(temporal, 0o644)
+    os.replace(temporal, ruta)
+    return ruta
+
+
+def leer_indice(ruta=RUTA_INDICE_SUGERENCIAS):
+    """Índice guardado (None si no existe o es de otra versión)"""
+    try:
+        with open(ruta, 'r', encoding='utf-8') as f:
+            datos = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+    return IndiceSugerencias.desde_dict(datos) if datos.get('version') == VERSION_INDICE else None
@@ -0,0 +1,96 @@
+# tests/conftest.py
+#
+# Los módulos del proyecto están en la raíz y usan rutas relativas al
+# directorio de trabajo (respuestas_cisco.csv, static/...), así que las
+# pruebas trabajan sobre una encuesta sintética en un directorio temporal.
+
+import os
+import shutil
+import sys
+
+import pytest
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if RAIZ not in sys.path:
+    sys.path.insert(0, RAIZ)
+os.environ.setdefault('MPLBACKEND', 'Agg')
+# Sin hilo recargador: las pruebas llaman a app.recargar_si_cambio() cuando lo necesitan
+os.environ.setdefault('INTERVALO_RECARGA', '0')
+
+FILAS = 300
+SEMILLA = 7
+
+
+@pytest.fixture(scope='session')
+def ruta_csv(tmp_path_factory):
+    """CSV sintético (sintetico.py) con la forma de la encuesta real"""
+    from sintetico import generar_encuesta, guardar_encuesta
+
+    directorio = tmp_path_factory.mktemp('encuesta')
+    (directorio / 'static' / 'images').mkdir(parents=True)
+    ruta = directorio / 'respuestas_cisco.csv'
+    guardar_encuesta(generar_encuesta(FILAS, SEMILLA, ruta_fuente=os.path.join(RAIZ, 'respuestas_cisco.csv')), ruta)
+    return ruta
+
+
+@pytest.fixture(scope='session')
+def resultados_analisis(ruta_csv):
+    """Resultados de analisis.py (sin dibujar gráficos) sobre el CSV sintético"""
+    anterior = os.getcwd()
+    os.chdir(ruta_csv.parent)
+    try:
+        import analisis
+        analisis.GRAFO.reiniciar()
+        return analisis.GRAFO.obtener('resultados_json')
+    finally:
+        os.chdir(anterior)
+
+
+@pytest.fixture(scope='session')
+def directorio_datos(ruta_csv, resultados_analisis):
+    """
+    Directorio con lo que exporta analisis.py para la app: resultados, índices
+    de sugerencias y de contactos y snapshot del dashboard (sin los gráficos)
+    """
+    anterior = os.getcwd()
+    os.chdir(ruta_csv.parent)
+    try:
+        import analisis
+        analisis.GRAFO.obtener('indice_contactos')
+        analisis.exportar_snapshot_dashboard(analisis.GRAFO.obtener('modalidad_por_ciclo'))
+    finally:
+        os.chdir(anterior)
+    return ruta_csv.parent
+
+
+def preparar_app(directorio, monkeypatch):
+    """app.py trabajando sobre `directorio`, con un snapshot recién construido y cachés vacías"""
+    monkeypatch.chdir(directorio)
+    import app
+    from eventos import Difusor
+    monkeypatch.setattr(app, 'ESPERA_RECARGA', 0)
+    monkeypatch.setattr(app, 'SNAPSHOT', app.construir_snapshot())
+    # Las copias de los datos conservan los mtime, así que comparten versión: historial nuevo en cada prueba
+    monkeypatch.setattr(app, 'DIFUSOR', Difusor(app.SNAPSHOT.version))
+    for cache in (app.CACHE_GRAFICOS, app.CACHE_SECCIONES, app.CACHE_PERIODOS):
+        cache.limpiar()
+    return app
+
+
+@pytest.fixture
+def aplicacion(directorio_datos, monkeypatch):
+    """Módulo app sobre los datos de prueba (solo lectura)"""
+    return preparar_app(directorio_datos, monkeypatch)
+
+
+@pytest.fixture
+def aplicacion_copia(directorio_datos, tmp_path, monkeypatch):
+    """Módulo app sobre una copia de los datos de prueba que la prueba puede modificar"""
+    copia = tmp_path / 'datos'
+    shutil.copytree(directorio_datos, copia)
+    return preparar_app(copia, monkeypatch)
+
+
+@pytest.fixture
+def cliente(aplicacion):
+    return aplicacion.app.test_client()
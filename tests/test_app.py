@@ -0,0 +1,237 @@
+# tests/test_app.py
+"""
+Rutas y estado de app.py sobre la encuesta sintética: recarga del snapshot,
+respuestas cacheadas con validadores HTTP, gráficos a pedido y contactos.
+"""
+
+import gzip
+import json
+import os
+import subprocess
+import sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def reescribir_resultados(contenido):
+    with open('static/resultados_analisis.json', 'w', encoding='utf-8') as f:
+        f.write(contenido)
+
+
+# --- Recarga en caliente ---
+
+def test_recarga_sin_cambios_no_reconstruye(aplicacion):
+    anterior = aplicacion.SNAPSHOT
+    assert aplicacion.recargar_si_cambio() is False
+    assert aplicacion.SNAPSHOT is anterior
+
+
+def test_recarga_publica_los_resultados_nuevos(aplicacion_copia):
+    app = aplicacion_copia
+    anterior = app.SNAPSHOT
+    resultados = dict(anterior.resultados, sugerencias=['Más cursos de Linux'])
+    reescribir_resultados(json.dumps(resultados, ensure_ascii=False))
+
+    assert app.recargar_si_cambio() is True
+    assert app.SNAPSHOT.resultados['sugerencias'] == ['Más cursos de Linux']
+    assert app.SNAPSHOT.version != anterior.version
+    assert app.app.test_client().get('/api/results').get_json()['sugerencias'] == ['Más cursos de Linux']
+
+
+def test_recarga_con_json_a_medio_escribir_conserva_el_snapshot(aplicacion_copia):
+    app = aplicacion_copia
+    anterior = app.SNAPSHOT
+    with open('static/resultados_analisis.json', 'r', encoding='utf-8') as f:
+        contenido = f.read()
+    reescribir_resultados(contenido[:len(contenido) // 2])
+
+    assert app.recargar_si_cambio() is False
+    assert app.SNAPSHOT is anterior
+
+
+def test_arranque_con_json_invalido_sirve_el_dashboard(aplicacion_copia):
+    app = aplicacion_copia
+    reescribir_resultados('{"meta": ')
+    app.SNAPSHOT = app.construir_snapshot()
+    cliente = app.app.test_client()
+
+    assert app.SNAPSHOT.resultados is None
+    assert cliente.get('/').status_code == 200
+    assert cliente.get('/api/results').get_json()['resumen'] == dict(app.SNAPSHOT.resumen)
+    assert cliente.get('/api/results/preferencias').status_code == 503
+
+
+# --- /api/results y /download/results cacheados ---
+
+def test_api_results_responde_304_con_el_mismo_etag(cliente):
+    respuesta = cliente.get('/api/results')
+    assert respuesta.status_code == 200
+    etag = respuesta.headers['ETag']
+
+    repetida = cliente.get('/api/results', headers={'If-None-Match': etag})
+    assert repetida.status_code == 304
+    assert repetida.data == b''
+    assert cliente.get('/api/results', headers={'If-None-Match': '"otro"'}).status_code == 200
+
+
+def test_api_results_responde_304_con_if_modified_since(cliente):
+    ultima_modificacion = cliente.get('/api/results').headers['Last-Modified']
+    assert cliente.get('/api/results', headers={'If-Modified-Since': ultima_modificacion}).status_code == 304
+
+
+def test_api_results_gzip_es_el_mismo_json(cliente):
+    plano = cliente.get('/api/results', headers={'Accept-Encoding': 'identity'})
+    comprimido = cliente.get('/api/results', headers={'Accept-Encoding': 'gzip'})
+    assert comprimido.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in comprimido.headers['Vary']
+    assert comprimido.headers['ETag'] != plano.headers['ETag']
+    assert json.loads(gzip.decompress(comprimido.data)) == plano.get_json()
+
+
+def test_descarga_de_resultados_es_el_archivo(cliente):
+    respuesta = cliente.get('/download/results', headers={'Accept-Encoding': 'identity'})
+    assert 'attachment' in respuesta.headers['Content-Disposition']
+    with open('static/resultados_analisis.json', 'rb') as f:
+        assert respuesta.data == f.read()
+
+
+# --- Snapshot sin pandas ---
+
+def test_servir_desde_el_snapshot_no_importa_pandas(directorio_datos):
+    # En otro proceso: en este pandas ya está cargado por las demás pruebas
+    codigo = ("import sys\n"
+              "from app import app, SNAPSHOT\n"
+              "cliente = app.test_client()\n"
+              "for ruta in ('/', '/api/results', '/api/results/preferencias', '/api/sugerencias'):\n"
+              "    assert cliente.get(ruta).status_code == 200, ruta\n"
+              "print(SNAPSHOT.resumen['Total de respuestas'], 'pandas' in sys.modules)\n")
+    entorno = dict(os.environ, PYTHONPATH=RAIZ, INTERVALO_RECARGA='0')
+    salida = subprocess.run([sys.executable, '-c', codigo], cwd=directorio_datos, env=entorno,
+                            capture_output=True, text=True, check=True).stdout.split()
+    assert salida[-1] == 'False'
+    assert int(salida[-2]) > 0
+
+
+def test_snapshot_de_otro_csv_se_ignora(aplicacion_copia):
+    from snapshot import leer_snapshot, hash_archivo
+
+    assert leer_snapshot(hash_archivo('respuestas_cisco.csv')) is not None
+    with open('respuestas_cisco.csv', 'a', encoding='utf-8') as f:
+        f.write('\n')
+    assert leer_snapshot(hash_archivo('respuestas_cisco.csv')) is None
+
+
+# --- Gráficos a pedido ---
+
+def test_grafico_filtrado_se_dibuja_una_vez(aplicacion, cliente):
+    ciclo = aplicacion.SNAPSHOT.indice_filtros.valor().vocabularios['ciclo'][0]
+    ruta = f'/charts/modalidad.png?ciclo={ciclo}'
+
+    respuesta = cliente.get(ruta)
+    assert respuesta.status_code == 200
+    assert respuesta.mimetype == 'image/png'
+    assert respuesta.data.startswith(b'\x89PNG')
+    assert (aplicacion.CACHE_GRAFICOS.fallos, len(aplicacion.CACHE_GRAFICOS)) == (1, 1)
+
+    repetida = cliente.get(ruta)
+    assert repetida.data == respuesta.data
+    assert aplicacion.CACHE_GRAFICOS.fallos == 1
+    assert cliente.get(ruta, headers={'If-None-Match': respuesta.headers['ETag']}).status_code == 304
+
+
+def test_grafico_sin_respuestas_da_404_y_no_ocupa_la_cache(aplicacion, cliente):
+    for valor in ('No existe', 'Tampoco existe'):
+        respuesta = cliente.get(f'/charts/modalidad.png?ciclo={valor}')
+        assert respuesta.status_code == 404
+        assert respuesta.get_json()['filtros'] == {'ciclo': [valor]}
+    assert len(aplicacion.CACHE_GRAFICOS) == 0
+    assert aplicacion.CACHE_GRAFICOS.bytes_usados == 0
+
+
+def test_grafico_desconocido_da_404(cliente):
+    assert cliente.get('/charts/no_existe.png').status_code == 404
+    assert cliente.get('/charts/modalidad.gif').status_code == 404
+
+
+def test_cache_lru_respeta_el_limite_con_claves_y_valores_vacios():
+    from cache import CacheLRU
+
+    cache = CacheLRU(200)
+    for i in range(100):
+        cache.obtener_o_calcular(('sin_respuestas', i), lambda: None)
+        cache.obtener_o_calcular(('vacio', i), lambda: b'')
+    assert 0 < cache.bytes_usados <= 200
+    assert len(cache) < 100
+
+
+# --- Secciones, campos y paginación ---
+
+def test_seccion_con_campos(aplicacion, cliente):
+    preferencias = aplicacion.SNAPSHOT.resultados['preferencias']
+    respuesta = cliente.get('/api/results/preferencias?fields=modalidad,disposicion')
+    assert respuesta.get_json() == {c: preferencias[c] for c in ('modalidad', 'disposicion')}
+    assert cliente.get('/api/results/preferencias?fields=no_existe').status_code == 400
+    assert cliente.get('/api/results/sugerencias?fields=texto').status_code == 400
+    assert cliente.get('/api/results/no_existe').status_code == 404
+
+
+def test_paginacion_recorre_todas_las_sugerencias(aplicacion, cliente):
+    sugerencias = aplicacion.SNAPSHOT.resultados['sugerencias']
+    assert len(sugerencias) > 7
+    items, ruta = [], '/api/results/sugerencias?limit=7'
+    while ruta:
+        pagina = cliente.get(ruta).get_json()
+        assert pagina['total'] == len(sugerencias)
+        assert len(pagina['items']) <= 7
+        items += pagina['items']
+        ruta = f"/api/results/sugerencias?limit=7&cursor={pagina['siguiente']}" if pagina['siguiente'] else None
+    assert items == sugerencias
+
+
+def test_cursor_de_resultados_anteriores_da_410(aplicacion_copia):
+    app = aplicacion_copia
+    cliente = app.app.test_client()
+    siguiente = cliente.get('/api/results/sugerencias?limit=2').get_json()['siguiente']
+    etag_preferencias = cliente.get('/api/results/preferencias').headers['ETag']
+
+    reescribir_resultados(json.dumps(dict(app.SNAPSHOT.resultados, sugerencias=['Una', 'Dos', 'Tres']),
+                                     ensure_ascii=False))
+    assert app.recargar_si_cambio() is True
+    assert cliente.get(f'/api/results/sugerencias?limit=2&cursor={siguiente}').status_code == 410
+    assert cliente.get('/api/results/sugerencias?cursor=x').status_code == 410
+    # Las secciones que no cambiaron conservan su ETag
+    assert cliente.get('/api/results/preferencias').headers['ETag'] == etag_preferencias
+
+
+# --- Contactos (datos personales) ---
+
+def test_contactos_deshabilitados_sin_token_configurado(aplicacion, cliente, monkeypatch):
+    monkeypatch.setattr(aplicacion, 'TOKEN_CONTACTOS', '')
+    assert cliente.get('/api/contactos', headers={'Authorization': 'Bearer '}).status_code == 403
+
+
+def test_contactos_exigen_el_token(aplicacion, cliente, monkeypatch):
+    monkeypatch.setattr(aplicacion, 'TOKEN_CONTACTOS', 'secreto')
+    for ruta in ('/api/contactos', '/api/contactos/opciones'):
+        sin_token = cliente.get(ruta)
+        assert sin_token.status_code == 401
+        assert sin_token.headers['WWW-Authenticate'] == 'Bearer'
+        assert 'correos' not in sin_token.get_json()
+        assert cliente.get(ruta, headers={'Authorization': 'Bearer otro'}).status_code == 401
+        assert cliente.get(ruta, headers={'Authorization': 'Basic secreto'}).status_code == 401
+
+
+def test_contactos_con_token_no_se_cachean(aplicacion, cliente, monkeypatch):
+    monkeypatch.setattr(aplicacion, 'TOKEN_CONTACTOS', 'secreto')
+    indice = aplicacion.SNAPSHOT.indice_contactos.valor()
+    curso = next(iter(indice.opciones()['curso']))
+    cabeceras = {'Authorization': 'Bearer secreto'}
+
+    respuesta = cliente.get(f'/api/contactos?curso={curso}&limit=5', headers=cabeceras)
+    assert respuesta.status_code == 200
+    assert respuesta.get_json() == indice.buscar({'curso': [curso]}, limite=5)
+    assert respuesta.get_json()['total'] > 0
+    assert {'no-store', 'private'} <= {d.strip() for d in respuesta.headers['Cache-Control'].split(',')}
+    opciones = cliente.get('/api/contactos/opciones', headers=cabeceras)
+    assert opciones.get_json() == indice.opciones()
+    assert 'no-store' in opciones.headers['Cache-Control']
@@ -0,0 +1,123 @@
+# tests/test_equivalencias.py
+"""
+Equivalencias que sostienen las optimizaciones: el modo por bloques escribe lo
+mismo que analisis.py con cualquier tamaño de bloque, los índices (bitmaps y
+coocurrencias) cuentan lo mismo que pandas y los intervalos de Wilson
+coinciden con valores publicados.
+"""
+
+import copy
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from bloques import agregar_csv
+from datos import COLUMNAS_UNICAS, cargar_encuesta, preparar_respuestas
+from esquema import SEPARADOR_OPCIONES
+from indices import IndiceBitmap
+from intervalos import bootstrap, calcular_intervalos, wilson
+
+
+def sin_fecha(resultados):
+    resultados = copy.deepcopy(resultados)
+    resultados['meta'].pop('fecha_analisis')
+    return resultados
+
+
+def incidencia(serie):
+    """Matriz respondiente × opción (DataFrame 0/1) a partir del texto normalizado"""
+    opciones = serie.str.split(SEPARADOR_OPCIONES).explode().dropna()
+    matriz = pd.crosstab(opciones.index, opciones).clip(upper=1)
+    return matriz.reindex(serie.index, fill_value=0)
+
+
+@pytest.fixture(scope='module')
+def encuesta(ruta_csv):
+    return cargar_encuesta(str(ruta_csv), usar_cache=False)
+
+
+@pytest.fixture(scope='module')
+def respuestas(ruta_csv):
+    return preparar_respuestas(pd.read_csv(ruta_csv))
+
+
+# --- Modo por bloques ---
+
+@pytest.mark.parametrize('filas_por_bloque', [50_000, 7, 1])
+def test_bloques_igual_que_analisis(ruta_csv, resultados_analisis, filas_por_bloque):
+    resultados = agregar_csv(str(ruta_csv), filas_por_bloque).resultados()
+    assert sin_fecha(resultados) == sin_fecha(resultados_analisis)
+
+
+# --- Índices ---
+
+def test_coocurrencias_igual_que_producto_denso(encuesta, respuestas):
+    for columna, indice in encuesta.multiples.items():
+        esperada = incidencia(respuestas[columna])[indice.vocabulario].to_numpy()
+        np.testing.assert_array_equal(indice.coocurrencias(), esperada.T @ esperada)
+        # Por bloques pequeños también
+        np.testing.assert_array_equal(indice.coocurrencias(filas_por_bloque=16), esperada.T @ esperada)
+
+
+def test_indice_bitmap_igual_que_pandas(encuesta, respuestas):
+    df = encuesta.respuestas
+    bitmap = IndiceBitmap(len(df))
+    for columna in COLUMNAS_UNICAS:
+        bitmap.agregar_unica(columna, df[columna])
+    for columna, indice in encuesta.multiples.items():
+        bitmap.agregar_multiple(columna, indice)
+
+    ciclos = df['ciclo'].dropna().unique().tolist()
+    modalidades = df['modalidad'].dropna().unique().tolist()
+    curso = encuesta.multiples['cursos_redes'].vocabulario[0]
+    consultas = [
+        {},
+        {'ciclo': ciclos[:1]},
+        {'ciclo': ciclos[:2], 'modalidad': modalidades[:1]},
+        {'cursos_redes': [curso]},
+        {'cursos_redes': [curso], 'ciclo': ciclos[:1]},
+        {'ciclo': ['No existe']},
+    ]
+    for filtros in consultas:
+        mascara = np.ones(len(df), dtype=bool)
+        for columna, valores in filtros.items():
+            if columna in COLUMNAS_UNICAS:
+                mascara &= df[columna].isin(valores).to_numpy()
+            else:
+                mascara &= incidencia(respuestas[columna]).reindex(columns=valores, fill_value=0).to_numpy().any(axis=1)
+
+        for objetivo in ['modalidad', 'disposicion', 'horario', 'cursos_ia']:
+            total, conteos = bitmap.agregar_consulta(objetivo, filtros)
+            if objetivo in COLUMNAS_UNICAS:
+                esperados = df.loc[mascara, objetivo].value_counts()
+            else:
+                esperados = incidencia(respuestas[objetivo])[mascara].sum()
+            assert total == int(mascara.sum())
+            assert conteos == {str(k): int(v) for k, v in esperados.items() if v > 0}
+
+
+# --- Intervalos ---
+
+def test_wilson_valores_publicados():
+    # Newcombe (1998), Statistics in Medicine 17:857-872, tabla I (método 3)
+    inferiores, superiores = wilson([81, 15, 0, 1], [263, 148, 20, 29])
+    np.testing.assert_allclose(inferiores, [0.2553, 0.0624, 0.0, 0.0061], atol=5e-5)
+    np.testing.assert_allclose(superiores, [0.3662, 0.1605, 0.1611, 0.1718], atol=5e-5)
+
+
+def test_bootstrap_se_acerca_a_wilson_con_muestras_grandes():
+    exitos, n = np.array([3_000, 500, 9_000]), np.array([10_000, 10_000, 10_000])
+    inferiores, superiores = bootstrap(exitos, n)
+    esperados = wilson(exitos, n)
+    np.testing.assert_allclose(inferiores, esperados[0], atol=0.003)
+    np.testing.assert_allclose(superiores, esperados[1], atol=0.003)
+
+
+def test_intervalos_degenerados_usan_wilson():
+    proporciones, inferiores, superiores = calcular_intervalos([0, 10, 4], [10, 10, 10])
+    esperados = wilson([0, 10, 4], [10, 10, 10])
+    np.testing.assert_allclose(proporciones, [0.0, 1.0, 0.4])
+    np.testing.assert_allclose(inferiores[:2], esperados[0][:2])
+    np.testing.assert_allclose(superiores[:2], esperados[1][:2])
+    assert np.all(inferiores <= proporciones + 1e-12) and np.all(proporciones <= superiores + 1e-12)
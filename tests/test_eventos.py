@@ -0,0 +1,97 @@
+# tests/test_eventos.py
+"""
+Actualizaciones en vivo: historial del Difusor, diferencias entre estados del
+dashboard y el flujo de /api/stream tras una recarga.
+"""
+
+import json
+import threading
+
+from eventos import Difusor, formatear_evento
+
+
+def leer_eventos(respuesta, cantidad):
+    """Primeros `cantidad` eventos (sin 'retry' ni latidos) de un text/event-stream"""
+    eventos = []
+    for trozo in respuesta.response:
+        texto = trozo.decode('utf-8') if isinstance(trozo, bytes) else trozo
+        if texto.startswith('event: '):
+            lineas = dict(linea.split(': ', 1) for linea in texto.strip().split('\n'))
+            eventos.append((lineas['event'], lineas.get('id'), json.loads(lineas['data'])))
+            if len(eventos) == cantidad:
+                break
+    respuesta.close()
+    return eventos
+
+
+# --- Difusor ---
+
+def test_pendientes_desde_cada_version():
+    difusor = Difusor('v1', historial=2)
+    assert difusor.pendientes('v1') == []
+    difusor.publicar('v1', 'v2', {'a': 1})
+    difusor.publicar('v2', 'v3', {'b': 2})
+    assert [e.id for e in difusor.pendientes('v1')] == ['v2', 'v3']
+    assert [e.datos for e in difusor.pendientes('v2')] == [{'b': 2}]
+    assert difusor.pendientes('v3') == []
+
+    # Fuera del historial (o versión desconocida): hace falta el estado completo
+    difusor.publicar('v3', 'v4', {'c': 3})
+    assert difusor.pendientes('v1') is None
+    assert difusor.pendientes('otra') is None
+
+
+def test_esperar_despierta_al_publicar():
+    difusor = Difusor('v1')
+    threading.Timer(0.05, difusor.publicar, args=('v1', 'v2', {'a': 1})).start()
+    assert [e.id for e in difusor.esperar('v1', 5)] == ['v2']
+    assert difusor.esperar('v2', 0.01) == []
+
+
+def test_formato_de_evento():
+    assert formatear_evento('cambios', {'año': 1}, 'v2') == 'event: cambios\nid: v2\ndata: {"año":1}\n\n'
+
+
+# --- Diferencias y /api/stream ---
+
+def test_diferencias_solo_lo_que_cambio(aplicacion):
+    anterior = {'resumen': {'total': 10, 'modalidad': 'Virtual'},
+                'secciones': {'cursos_populares': {'redes': {'A': 1}, 'ia': {'B': 2}}, 'vieja': {'x': 1}}}
+    nuevo = {'resumen': {'total': 11, 'modalidad': 'Virtual'},
+             'secciones': {'cursos_populares': {'redes': {'A': 1}, 'ia': {'B': 3}}}}
+    assert aplicacion.diferencias(anterior, nuevo) == {
+        'resumen': {'total': 11},
+        'secciones': {'cursos_populares': {'ia': {'B': 3}}, 'vieja': None}
+    }
+    assert aplicacion.diferencias(nuevo, nuevo) == {}
+
+
+def test_stream_version_desconocida_recibe_el_estado(aplicacion, cliente):
+    (nombre, version, datos), = leer_eventos(cliente.get('/api/stream?desde=desconocida', buffered=False), 1)
+    assert nombre == 'estado'
+    assert version == aplicacion.SNAPSHOT.version
+    assert datos == aplicacion.partes_dashboard(aplicacion.SNAPSHOT)
+
+
+def test_stream_tras_recarga_envia_solo_los_cambios(aplicacion_copia, monkeypatch):
+    app = aplicacion_copia
+    monkeypatch.setattr(app, 'LATIDO_STREAM', 0.05)
+    anterior = app.SNAPSHOT
+    with open('static/resultados_analisis.json', 'w', encoding='utf-8') as f:
+        json.dump(dict(anterior.resultados, sugerencias=['Una sugerencia']), f, ensure_ascii=False)
+    assert app.recargar_si_cambio() is True
+
+    cliente = app.app.test_client()
+    (nombre, version, datos), = leer_eventos(cliente.get(f'/api/stream?desde={anterior.version}',
+                                                         buffered=False), 1)
+    assert (nombre, version) == ('cambios', app.SNAPSHOT.version)
+    # Cambian las sugerencias y, como mucho, la fecha de actualización del pie de página
+    assert datos['secciones'] == {'sugerencias': {'total': 1}}
+    assert set(datos) <= {'secciones', 'pagina'}
+
+
+def test_stream_lleno_responde_503(aplicacion, cliente, monkeypatch):
+    monkeypatch.setattr(aplicacion, 'MAX_CLIENTES_STREAM', 0)
+    respuesta = cliente.get('/api/stream')
+    assert respuesta.status_code == 503
+    assert respuesta.headers['Retry-After'] == '30'
@@ -0,0 +1,71 @@
+# tests/test_periodos.py
+"""
+Particiones por periodo: los agregados se calculan una vez por CSV y las
+tendencias y comparaciones coinciden con los resultados de cada periodo.
+"""
+
+import os
+
+import pytest
+
+from periodos import actualizar_periodo, comparar, importar_periodo, leer_agregados, listar_periodos, tendencias
+from sintetico import generar_encuesta, guardar_encuesta
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PERIODOS = {'2024-2': (120, 1), '2025-1': (200, 2)}
+
+
+@pytest.fixture
+def periodos(aplicacion_copia, tmp_path):
+    """Dos periodos sintéticos importados en el directorio de la app"""
+    for periodo, (filas, semilla) in PERIODOS.items():
+        ruta = tmp_path / f'{periodo}.csv'
+        guardar_encuesta(generar_encuesta(filas, semilla, ruta_fuente=os.path.join(RAIZ, 'respuestas_cisco.csv')), ruta)
+        importar_periodo(periodo, str(ruta))
+    return aplicacion_copia
+
+
+def test_periodo_sin_cambios_no_se_recalcula(periodos):
+    assert listar_periodos() == list(PERIODOS)
+    datos, recalculado = actualizar_periodo('2024-2')
+    assert recalculado is False
+    assert datos == leer_agregados('2024-2')
+
+
+def test_tendencias_y_acumulado(periodos):
+    serie = tendencias()
+    resultados = [leer_agregados(p)['resultados'] for p in PERIODOS]
+    assert serie['periodos'] == list(PERIODOS)
+    assert serie['total_respuestas'] == [r['meta']['total_respuestas'] for r in resultados]
+    for modalidad, valores in serie['modalidad'].items():
+        assert valores['conteos'] == [r['preferencias']['modalidad'].get(modalidad, 0) for r in resultados]
+        assert serie['acumulado']['modalidad'][modalidad] == sum(valores['conteos'])
+
+
+def test_comparar_es_la_diferencia_entre_periodos(periodos):
+    a, b = PERIODOS
+    diferencias = comparar(a, b)
+    resultados_a, resultados_b = (leer_agregados(p)['resultados'] for p in (a, b))
+    assert diferencias['total_respuestas'] == {'a': 120, 'b': 200}
+    for area, fila in diferencias['interes_por_area'].items():
+        assert fila['a'] == resultados_a['interes_por_area'].get(area, 0)
+        assert fila['b'] == resultados_b['interes_por_area'].get(area, 0)
+        assert fila['diferencia'] == fila['b'] - fila['a']
+        assert fila['diferencia_puntos'] == round(fila['porcentaje_b'] - fila['porcentaje_a'], 1)
+
+
+def test_rutas_de_periodos(periodos):
+    cliente = periodos.app.test_client()
+    lista = cliente.get('/api/periodos').get_json()['periodos']
+    assert [p['periodo'] for p in lista] == list(PERIODOS)
+
+    respuesta = cliente.get('/api/periodos/comparar?a=2024-2&b=2025-1')
+    assert respuesta.get_json() == comparar('2024-2', '2025-1')
+    assert cliente.get('/api/periodos/comparar?a=2024-2&b=2025-1',
+                       headers={'If-None-Match': respuesta.headers['ETag']}).status_code == 304
+    assert cliente.get('/api/periodos/tendencias?periodo=2025-1').get_json()['total_respuestas'] == [200]
+    assert cliente.get('/api/periodos/2025-1').get_json() == leer_agregados('2025-1')['resultados']
+
+    assert cliente.get('/api/periodos/comparar?a=2024-2').status_code == 400
+    assert cliente.get('/api/periodos/2030-1').status_code == 404
+    assert cliente.get('/api/periodos/comparar?a=2024-2&b=no-valido').status_code == 404
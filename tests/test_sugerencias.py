@@ -0,0 +1,79 @@
+# tests/test_sugerencias.py
+"""
+Índice de sugerencias: ranking BM25, casi duplicados agrupados con MinHash y
+respuestas sin contenido fuera del índice.
+"""
+
+import math
+
+import pytest
+
+from sugerencias import B, K1, IndiceSugerencias, terminos
+
+SUGERENCIAS = [
+    'Más cursos de Linux en horario nocturno',
+    'Mas cursos de linux en horario nocturno, por favor',
+    'más cursos de Linux en horario nocturno',
+    'Ninguna',
+    'nada',
+    'Certificaciones de ciberseguridad con laboratorios prácticos',
+    'Cursos de Python para análisis de datos',
+    'Python y ciencia de datos con proyectos reales',
+    'Curso de redes',
+]
+
+
+@pytest.fixture(scope='module')
+def indice():
+    return IndiceSugerencias.construir(SUGERENCIAS)
+
+
+def bm25(indice, termino, documento):
+    """Puntaje BM25 de un término, calculado directamente sobre los textos"""
+    tokens = [terminos(texto) for texto in indice.documentos]
+    con_termino = sum(termino in t for t in tokens)
+    idf = math.log(1 + (len(tokens) - con_termino + 0.5) / (con_termino + 0.5))
+    frecuencia = tokens[documento].count(termino)
+    media = sum(len(t) for t in tokens) / len(tokens)
+    return idf * frecuencia * (K1 + 1) / (frecuencia + K1 * (1 - B + B * len(tokens[documento]) / media))
+
+
+def test_repetidas_y_vacias(indice):
+    # Las dos variantes de mayúsculas/tildes son un solo documento; "Ninguna" y "nada" no se indexan
+    assert indice.documentos[0] == 'Más cursos de Linux en horario nocturno'
+    assert indice.repeticiones[0] == 2
+    assert len(indice.documentos) == 6
+    assert indice.resumen()['relevantes'] == 7
+
+
+def test_casi_duplicados_se_muestran_una_vez(indice):
+    resultados = indice.buscar('cursos linux')['resultados']
+    textos = [r['texto'] for r in resultados]
+    assert textos[0] == 'Más cursos de Linux en horario nocturno'
+    assert resultados[0]['duplicados'] == 2
+    assert not any('por favor' in texto for texto in textos)
+    assert indice.relevantes().count('Mas cursos de linux en horario nocturno, por favor') == 0
+
+
+def test_ranking_bm25(indice):
+    resultados = indice.buscar('python')['resultados']
+    esperados = sorted(((bm25(indice, 'python', d), d) for d in (3, 4)), reverse=True)
+    assert [r['texto'] for r in resultados] == [indice.documentos[d] for _, d in esperados]
+    assert [r['puntaje'] for r in resultados] == [round(p, 4) for p, _ in esperados]
+
+
+def test_singular_encuentra_plural(indice):
+    busqueda = indice.buscar('curso')
+    assert busqueda['frecuencia_terminos']['curso']['sugerencias'] == 5
+    assert busqueda['total_coincidencias'] == 3
+
+
+def test_indice_guardado_busca_igual(indice):
+    copia = IndiceSugerencias.desde_dict(indice.a_dict())
+    assert copia.buscar('cursos linux') == indice.buscar('cursos linux')
+
+
+def test_ruta_de_busqueda(aplicacion, cliente):
+    indice = aplicacion.SNAPSHOT.indice_sugerencias.valor()
+    assert cliente.get('/api/sugerencias?q=cursos&limit=3').get_json() == indice.buscar('cursos', 3)
+    assert cliente.get('/api/sugerencias').get_json() == indice.resumen()